@@ -27,6 +27,41 @@ else:
     signal.signal(SIGPIPE, SIG_IGN)
 
 
+# Keys and getinfo options of the dictionary returned by Curl.info()
+_INFO_OPTIONS = (
+    ('effective-url', pycurl.EFFECTIVE_URL),
+    ('http-code', pycurl.HTTP_CODE),
+    ('total-time', pycurl.TOTAL_TIME),
+    ('namelookup-time', pycurl.NAMELOOKUP_TIME),
+    ('connect-time', pycurl.CONNECT_TIME),
+    ('pretransfer-time', pycurl.PRETRANSFER_TIME),
+    ('redirect-time', pycurl.REDIRECT_TIME),
+    ('redirect-count', pycurl.REDIRECT_COUNT),
+    ('size-upload', pycurl.SIZE_UPLOAD),
+    ('size-download', pycurl.SIZE_DOWNLOAD),
+    ('speed-upload', pycurl.SPEED_UPLOAD),
+    ('header-size', pycurl.HEADER_SIZE),
+    ('request-size', pycurl.REQUEST_SIZE),
+    ('content-length-download', pycurl.CONTENT_LENGTH_DOWNLOAD),
+    ('content-length-upload', pycurl.CONTENT_LENGTH_UPLOAD),
+    ('content-type', pycurl.CONTENT_TYPE),
+    ('response-code', pycurl.RESPONSE_CODE),
+    ('speed-download', pycurl.SPEED_DOWNLOAD),
+    ('ssl-verifyresult', pycurl.SSL_VERIFYRESULT),
+    ('filetime', pycurl.INFO_FILETIME),
+    ('starttransfer-time', pycurl.STARTTRANSFER_TIME),
+    ('http-connectcode', pycurl.HTTP_CONNECTCODE),
+    ('httpauth-avail', pycurl.HTTPAUTH_AVAIL),
+    ('proxyauth-avail', pycurl.PROXYAUTH_AVAIL),
+    ('os-errno', pycurl.OS_ERRNO),
+    ('num-connects', pycurl.NUM_CONNECTS),
+    ('ssl-engines', pycurl.SSL_ENGINES),
+    ('cookielist', pycurl.INFO_COOKIELIST),
+    ('lastsocket', pycurl.LASTSOCKET),
+    ('ftp-entry-path', pycurl.FTP_ENTRY_PATH),
+)
+
+
 class Curl:
     "High-level interface to pycurl functions."
     def __init__(self, base_url="", fakeheaders=None):
@@ -53,9 +88,8 @@ class Curl:
         # Use password identification from .netrc automatically
         self.set_option(pycurl.NETRC, 1)
         self.set_option(pycurl.WRITEFUNCTION, self.payload_io.write)
-        def header_callback(x):
-            self.hdr += x.decode('ascii')
-        self.set_option(pycurl.HEADERFUNCTION, header_callback)
+        self.header_sink = pycurl.HeaderSink()
+        self.set_option(pycurl.WRITEHEADER, self.header_sink)
 
     def set_timeout(self, timeout):
         "Set timeout for a retrieving an object"
@@ -84,7 +118,12 @@ class Curl:
         self.payload_io.seek(0)
         self.payload_io.truncate()
         self.hdr = ""
-        self.handle.perform()
+        self.header_sink.clear()
+        try:
+            self.handle.perform()
+        finally:
+            # a failed transfer keeps the headers received before it failed
+            self.hdr = self.header_sink.getvalue().decode('ascii')
         self.payload = self.payload_io.getvalue()
         return self.payload
 
@@ -122,40 +161,8 @@ class Curl:
 
     def info(self):
         "Return a dictionary with all info on the last response."
-        m = {}
-        m['effective-url'] = self.handle.getinfo(pycurl.EFFECTIVE_URL)
-        m['http-code'] = self.handle.getinfo(pycurl.HTTP_CODE)
-        m['total-time'] = self.handle.getinfo(pycurl.TOTAL_TIME)
-        m['namelookup-time'] = self.handle.getinfo(pycurl.NAMELOOKUP_TIME)
-        m['connect-time'] = self.handle.getinfo(pycurl.CONNECT_TIME)
-        m['pretransfer-time'] = self.handle.getinfo(pycurl.PRETRANSFER_TIME)
-        m['redirect-time'] = self.handle.getinfo(pycurl.REDIRECT_TIME)
-        m['redirect-count'] = self.handle.getinfo(pycurl.REDIRECT_COUNT)
-        m['size-upload'] = self.handle.getinfo(pycurl.SIZE_UPLOAD)
-        m['size-download'] = self.handle.getinfo(pycurl.SIZE_DOWNLOAD)
-        m['speed-upload'] = self.handle.getinfo(pycurl.SPEED_UPLOAD)
-        m['header-size'] = self.handle.getinfo(pycurl.HEADER_SIZE)
-        m['request-size'] = self.handle.getinfo(pycurl.REQUEST_SIZE)
-        m['content-length-download'] = self.handle.getinfo(pycurl.CONTENT_LENGTH_DOWNLOAD)
-        m['content-length-upload'] = self.handle.getinfo(pycurl.CONTENT_LENGTH_UPLOAD)
-        m['content-type'] = self.handle.getinfo(pycurl.CONTENT_TYPE)
-        m['response-code'] = self.handle.getinfo(pycurl.RESPONSE_CODE)
-        m['speed-download'] = self.handle.getinfo(pycurl.SPEED_DOWNLOAD)
-        m['ssl-verifyresult'] = self.handle.getinfo(pycurl.SSL_VERIFYRESULT)
-        m['filetime'] = self.handle.getinfo(pycurl.INFO_FILETIME)
-        m['starttransfer-time'] = self.handle.getinfo(pycurl.STARTTRANSFER_TIME)
-        m['redirect-time'] = self.handle.getinfo(pycurl.REDIRECT_TIME)
-        m['redirect-count'] = self.handle.getinfo(pycurl.REDIRECT_COUNT)
-        m['http-connectcode'] = self.handle.getinfo(pycurl.HTTP_CONNECTCODE)
-        m['httpauth-avail'] = self.handle.getinfo(pycurl.HTTPAUTH_AVAIL)
-        m['proxyauth-avail'] = self.handle.getinfo(pycurl.PROXYAUTH_AVAIL)
-        m['os-errno'] = self.handle.getinfo(pycurl.OS_ERRNO)
-        m['num-connects'] = self.handle.getinfo(pycurl.NUM_CONNECTS)
-        m['ssl-engines'] = self.handle.getinfo(pycurl.SSL_ENGINES)
-        m['cookielist'] = self.handle.getinfo(pycurl.INFO_COOKIELIST)
-        m['lastsocket'] = self.handle.getinfo(pycurl.LASTSOCKET)
-        m['ftp-entry-path'] = self.handle.getinfo(pycurl.FTP_ENTRY_PATH)
-        return m
+        values = self.handle.getinfo_many([option for _, option in _INFO_OPTIONS])
+        return {name: values[option] for name, option in _INFO_OPTIONS}
 
     def answered(self, check):
         "Did a given check string occur in the last payload?"
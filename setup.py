@@ -618,16 +618,19 @@ PRETTY_SSL_LIBS = {
 def get_extension(argv, split_extension_source=False):
     if split_extension_source:
         sources = [
+            os.path.join("src", "chunkiter.c"),
             os.path.join("src", "docstrings.c"),
             os.path.join("src", "easy.c"),
             os.path.join("src", "easycb.c"),
             os.path.join("src", "easyinfo.c"),
             os.path.join("src", "easyopt.c"),
             os.path.join("src", "easyperform.c"),
+            os.path.join("src", "easysink.c"),
             os.path.join("src", "easyws.c"),
             os.path.join("src", "module.c"),
             os.path.join("src", "mime.c"),
             os.path.join("src", "multi.c"),
+            os.path.join("src", "optionset.c"),
             os.path.join("src", "oscompat.c"),
             os.path.join("src", "pythoncompat.c"),
             os.path.join("src", "share.c"),
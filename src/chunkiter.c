@@ -0,0 +1,446 @@
+#include "pycurl.h"
+#include "docstrings.h"
+
+/* A ChunkIterator yields the body of one transfer as it arrives. It borrows
+ * the handle's write callback for the duration of the transfer and drives the
+ * multi the handle is on from __next__, with the GIL released while waiting.
+ *
+ * Received data is collected in a buffer of at most `limit` bytes. When a
+ * chunk does not fit, the write callback pauses the transfer; libcurl keeps
+ * that chunk and delivers it again once __next__ has handed out the buffer
+ * and unpaused the transfer. Memory use is therefore bounded by the buffer
+ * size plus one chunk however slowly the consumer iterates. */
+
+
+/*************************************************************************
+// write callback
+**************************************************************************/
+
+static int
+chunk_iter_reserve(CurlChunkIteratorObject *self, size_t needed)
+{
+    char *buf;
+    size_t cap;
+
+    if (needed <= self->cap) {
+        return 0;
+    }
+    cap = self->cap ? self->cap : 16384;
+    while (cap < needed) {
+        if (cap > (size_t) PY_SSIZE_T_MAX / 2) {
+            cap = needed;
+            break;
+        }
+        cap *= 2;
+    }
+    if (cap > (size_t) PY_SSIZE_T_MAX) {
+        return -1;
+    }
+    buf = PyMem_RawRealloc(self->buf, cap);
+    if (buf == NULL) {
+        return -1;
+    }
+    self->buf = buf;
+    self->cap = cap;
+    return 0;
+}
+
+
+/* Runs without the GIL. */
+static size_t
+chunk_iter_write_callback(char *ptr, size_t size, size_t nmemb, void *stream)
+{
+    CurlChunkIteratorObject *self = (CurlChunkIteratorObject *) stream;
+    size_t total_size;
+    size_t ret;
+
+    /* returning less than requested makes libcurl fail with CURLE_WRITE_ERROR */
+    if (size == 0 || nmemb == 0) {
+        return 0;
+    }
+    total_size = size * nmemb;
+    if (total_size / size != nmemb) {
+        return 0;
+    }
+
+    PYCURL_MUTEX_LOCK(&self->lock);
+    if (self->len > 0 && total_size > self->limit - self->len) {
+        /* libcurl keeps the chunk and delivers it again when unpaused */
+        self->paused = 1;
+        ret = CURL_WRITEFUNC_PAUSE;
+    } else if (chunk_iter_reserve(self, self->len + total_size) != 0) {
+        ret = 0;
+    } else {
+        memcpy(self->buf + self->len, ptr, total_size);
+        self->len += total_size;
+        ret = total_size;
+    }
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    return ret;
+}
+
+
+/*************************************************************************
+// ChunkIterator
+**************************************************************************/
+
+/* Detach the iterator from its transfer: take the handle off the multi,
+ * give it back its own write callback and close a multi created by
+ * Curl.iter_chunks(). Safe to call more than once. Returns 0, or -1 with an
+ * exception set; an exception that was already set is kept. */
+static int
+chunk_iter_finish(CurlChunkIteratorObject *self)
+{
+    PyObject *exc_type, *exc_value, *exc_tb;
+    CurlObject *curl = self->curl;
+    int rv = 0;
+
+    if (self->finished) {
+        return 0;
+    }
+    self->finished = 1;
+
+    PyErr_Fetch(&exc_type, &exc_value, &exc_tb);
+    if (curl->handle != NULL && curl->multi_stack == self->multi) {
+        PyObject *v = PyObject_CallMethod((PyObject *) self->multi, "remove_handle", "O", (PyObject *) curl);
+        if (v == NULL) {
+            rv = -1;
+        }
+        Py_XDECREF(v);
+    }
+    /* even if the handle could not be removed, the write callback must not
+     * point at this iterator anymore */
+    if (curl->handle != NULL) {
+        util_curl_restore_write(curl);
+    }
+    if (self->owns_multi && rv == 0) {
+        PyObject *v = PyObject_CallMethod((PyObject *) self->multi, "close", NULL);
+        if (v == NULL) {
+            rv = -1;
+        }
+        Py_XDECREF(v);
+    }
+    if (exc_type != NULL) {
+        /* the original error wins */
+        if (rv != 0) {
+            PyErr_Clear();
+        }
+        PyErr_Restore(exc_type, exc_value, exc_tb);
+        rv = -1;
+    }
+    return rv;
+}
+
+
+PYCURL_INTERNAL PyObject *
+chunk_iter_new(CurlMultiObject *multi, CurlObject *curl, Py_ssize_t buffer_size, int owns_multi)
+{
+    CurlChunkIteratorObject *self;
+    PyObject *v;
+
+    if (buffer_size <= 0) {
+        PyErr_SetString(PyExc_ValueError, "buffer_size must be greater than zero");
+        return NULL;
+    }
+    if (check_curl_state(curl, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "iter_chunks") != 0) {
+        return NULL;
+    }
+
+    self = PyObject_GC_New(CurlChunkIteratorObject, p_CurlChunkIterator_Type);
+    if (self == NULL) {
+        return NULL;
+    }
+    self->curl = (CurlObject *) Py_NewRef((PyObject *) curl);
+    self->multi = (CurlMultiObject *) Py_NewRef((PyObject *) multi);
+    self->owns_multi = owns_multi;
+    self->buf = NULL;
+    self->len = 0;
+    self->cap = 0;
+    self->limit = (size_t) buffer_size;
+    self->paused = 0;
+    self->done = 0;
+    self->finished = 1;
+    self->result = CURLE_OK;
+#if PY_VERSION_HEX < 0x030D0000
+    self->lock = PyThread_allocate_lock();
+    if (self->lock == NULL) {
+        Py_DECREF(self);
+        return PyErr_NoMemory();
+    }
+#else
+    memset(&self->lock, 0, sizeof(self->lock));
+#endif
+    PyObject_GC_Track(self);
+
+    curl_easy_setopt(curl->handle, CURLOPT_WRITEFUNCTION, chunk_iter_write_callback);
+    curl_easy_setopt(curl->handle, CURLOPT_WRITEDATA, self);
+    self->finished = 0;
+    v = PyObject_CallMethod((PyObject *) multi, "add_handle", "O", (PyObject *) curl);
+    if (v == NULL) {
+        /* the handle is not ours to remove, only to restore */
+        self->finished = 1;
+        util_curl_restore_write(curl);
+        Py_DECREF(self);
+        return NULL;
+    }
+    Py_DECREF(v);
+    return (PyObject *) self;
+}
+
+
+static int
+chunk_iter_has_data(void *arg)
+{
+    CurlChunkIteratorObject *self = (CurlChunkIteratorObject *) arg;
+    size_t len;
+
+    PYCURL_MUTEX_LOCK(&self->lock);
+    len = self->len;
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    return len > 0;
+}
+
+
+static PyObject *
+do_chunk_iter_next(CurlChunkIteratorObject *self)
+{
+    PyObject *chunk;
+    int paused;
+
+    if (self->finished) {
+        return NULL;
+    }
+    if (!self->done && !chunk_iter_has_data(self)) {
+        int rv = util_multi_run_until(self->multi, self->curl, chunk_iter_has_data, self, &self->result);
+        if (rv < 0) {
+            (void) chunk_iter_finish(self);
+            return NULL;
+        }
+        if (rv > 0) {
+            self->done = 1;
+        }
+    }
+
+    PYCURL_MUTEX_LOCK(&self->lock);
+    chunk = PyBytes_FromStringAndSize(self->buf, (Py_ssize_t) self->len);
+    if (chunk != NULL) {
+        self->len = 0;
+    }
+    paused = self->paused;
+    self->paused = 0;
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    if (chunk == NULL) {
+        (void) chunk_iter_finish(self);
+        return NULL;
+    }
+
+    if (PyBytes_GET_SIZE(chunk) > 0) {
+        if (paused) {
+            PyObject *v = PyObject_CallMethod((PyObject *) self->curl, "pause", "i", CURLPAUSE_CONT);
+            if (v == NULL) {
+                Py_DECREF(chunk);
+                (void) chunk_iter_finish(self);
+                return NULL;
+            }
+            Py_DECREF(v);
+        }
+        return chunk;
+    }
+    Py_DECREF(chunk);
+
+    /* the transfer is complete and all of its data has been handed out */
+    if (chunk_iter_finish(self) != 0) {
+        return NULL;
+    }
+    if (self->result != CURLE_OK) {
+        create_and_set_error_object(self->curl, (int) self->result);
+    }
+    return NULL;
+}
+
+
+static PyObject *
+do_chunk_iter_close(CurlChunkIteratorObject *self, PyObject *Py_UNUSED(ignored))
+{
+    if (chunk_iter_finish(self) != 0) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+
+/* __next__ and close() drive the multi and change the Curl object directly,
+ * so they run in a critical section on both, like the methods of those
+ * objects. The handle and the multi are only cleared by tp_clear, after
+ * which the iterator is finished. */
+static PyObject *
+do_chunk_iter_next_locked(CurlChunkIteratorObject *self)
+{
+    PyObject *res;
+
+    if (self->finished) {
+        return NULL;
+    }
+    Py_BEGIN_CRITICAL_SECTION2(self->multi, self->curl);
+    res = do_chunk_iter_next(self);
+    Py_END_CRITICAL_SECTION2();
+    return res;
+}
+
+
+static PyObject *
+do_chunk_iter_close_locked(CurlChunkIteratorObject *self, PyObject *ignored)
+{
+    PyObject *res;
+
+    if (self->finished) {
+        Py_RETURN_NONE;
+    }
+    Py_BEGIN_CRITICAL_SECTION2(self->multi, self->curl);
+    res = do_chunk_iter_close(self, ignored);
+    Py_END_CRITICAL_SECTION2();
+    return res;
+}
+
+
+static int
+do_chunk_iter_traverse(CurlChunkIteratorObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->curl);
+    Py_VISIT(self->multi);
+    return 0;
+}
+
+
+static int
+do_chunk_iter_clear(CurlChunkIteratorObject *self)
+{
+    if (self->curl != NULL && self->multi != NULL) {
+        if (chunk_iter_finish(self) != 0) {
+            PyErr_WriteUnraisable((PyObject *) self->curl);
+        }
+    }
+    Py_CLEAR(self->curl);
+    Py_CLEAR(self->multi);
+    return 0;
+}
+
+
+static void
+do_chunk_iter_dealloc(CurlChunkIteratorObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    do_chunk_iter_clear(self);
+    PyMem_RawFree(self->buf);
+    self->buf = NULL;
+#if PY_VERSION_HEX < 0x030D0000
+    if (self->lock != NULL) {
+        PyThread_free_lock(self->lock);
+        self->lock = NULL;
+    }
+#endif
+    PyObject_GC_Del(self);
+}
+
+
+/*************************************************************************
+// entry points
+**************************************************************************/
+
+static char *iter_chunks_keywords[] = {"curl", "buffer_size", NULL};
+
+
+PYCURL_INTERNAL PyObject *
+do_multi_iter_chunks(CurlMultiObject *self, PyObject *args, PyObject *kwds)
+{
+    CurlObject *curl;
+    Py_ssize_t buffer_size = PYCURL_CHUNK_ITER_BUFFER_SIZE;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O!|n:iter_chunks", iter_chunks_keywords,
+                                     p_Curl_Type, &curl, &buffer_size)) {
+        return NULL;
+    }
+    return chunk_iter_new(self, curl, buffer_size, 0);
+}
+
+
+PYCURL_INTERNAL PyObject *
+do_curl_iter_chunks(CurlObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *multi;
+    PyObject *it;
+    Py_ssize_t buffer_size = PYCURL_CHUNK_ITER_BUFFER_SIZE;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|n:iter_chunks", iter_chunks_keywords + 1,
+                                     &buffer_size)) {
+        return NULL;
+    }
+    if (self->multi_stack != NULL) {
+        PyErr_SetString(ErrorObject, "cannot iterate a curl object added to a CurlMulti, use CurlMulti.iter_chunks()");
+        return NULL;
+    }
+    multi = PyObject_CallNoArgs((PyObject *) p_CurlMulti_Type);
+    if (multi == NULL) {
+        return NULL;
+    }
+    /* on failure the multi holds no handles and is closed when released */
+    it = chunk_iter_new((CurlMultiObject *) multi, self, buffer_size, 1);
+    Py_DECREF(multi);
+    return it;
+}
+
+
+/*************************************************************************
+// type definition
+**************************************************************************/
+
+static PyMethodDef chunkiterobject_methods[] = {
+    {"close", (PyCFunction)do_chunk_iter_close_locked, METH_NOARGS, chunkiterator_close_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+
+PYCURL_INTERNAL PyTypeObject CurlChunkIterator_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "pycurl.ChunkIterator",     /* tp_name */
+    sizeof(CurlChunkIteratorObject), /* tp_basicsize */
+    0,                          /* tp_itemsize */
+    (destructor)do_chunk_iter_dealloc, /* tp_dealloc */
+    0,                          /* tp_print */
+    0,                          /* tp_getattr */
+    0,                          /* tp_setattr */
+    0,                          /* tp_reserved */
+    0,                          /* tp_repr */
+    0,                          /* tp_as_number */
+    0,                          /* tp_as_sequence */
+    0,                          /* tp_as_mapping */
+    0,                          /* tp_hash  */
+    0,                          /* tp_call */
+    0,                          /* tp_str */
+    0,                          /* tp_getattro */
+    0,                          /* tp_setattro */
+    0,                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC, /* tp_flags */
+    chunkiterator_doc,          /* tp_doc */
+    (traverseproc)do_chunk_iter_traverse, /* tp_traverse */
+    (inquiry)do_chunk_iter_clear, /* tp_clear */
+    0,                          /* tp_richcompare */
+    0,                          /* tp_weaklistoffset */
+    PyObject_SelfIter,          /* tp_iter */
+    (iternextfunc)do_chunk_iter_next_locked, /* tp_iternext */
+    chunkiterobject_methods,    /* tp_methods */
+    0,                          /* tp_members */
+    0,                          /* tp_getset */
+    0,                          /* tp_base */
+    0,                          /* tp_dict */
+    0,                          /* tp_descr_get */
+    0,                          /* tp_descr_set */
+    0,                          /* tp_dictoffset */
+    0,                          /* tp_init */
+    0,                          /* tp_alloc */
+    0,                          /* tp_new */
+    PyObject_GC_Del,            /* tp_free */
+};
+
+/* vi:ts=4:et:nowrap
+ */
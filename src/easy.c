@@ -323,16 +323,18 @@ error:
     return NULL;
 }
 
-/* duphandle */
-PYCURL_INTERNAL CurlObject *
-do_curl_duphandle(CurlObject *self, PyObject *Py_UNUSED(ignored))
+/* duphandle; the caller has checked the state of `self` */
+static CurlObject *
+util_curl_duphandle(CurlObject *self)
 {
     PyTypeObject *subtype;
     CurlObject *dup;
     int res;
     int *ptr;
 
-    if (check_curl_state(self, PYCURL_REQUIRE_HANDLE, "duphandle") != 0) {
+    /* an MmapSink maps one transfer's body at a time */
+    if (self->writedata_fp != NULL && Py_IS_TYPE(self->writedata_fp, p_CurlMmapSink_Type)) {
+        PyErr_SetString(ErrorObject, "cannot clone a curl handle that writes to an MmapSink");
         return NULL;
     }
 
@@ -383,6 +385,7 @@ do_curl_duphandle(CurlObject *self, PyObject *Py_UNUSED(ignored))
         curl_easy_setopt(dup->handle, CURLOPT_WRITEDATA, dup);
     }
     dup->w_cb_memoryview = self->w_cb_memoryview;
+    dup->w_cb_min_chunk = self->w_cb_min_chunk;
     if (self->h_cb != NULL) {
         dup->h_cb = Py_NewRef(self->h_cb);
         curl_easy_setopt(dup->handle, CURLOPT_WRITEHEADER, dup);
@@ -475,6 +478,22 @@ do_curl_duphandle(CurlObject *self, PyObject *Py_UNUSED(ignored))
     dup->readdata_fp = Py_XNewRef(self->readdata_fp);
     dup->writedata_fp = Py_XNewRef(self->writedata_fp);
     dup->writeheader_fp = Py_XNewRef(self->writeheader_fp);
+    if (self->read_source != PYCURL_READ_SOURCE_NONE) {
+        if (util_curl_dup_read_source(dup, self) != 0) {
+            goto error;
+        }
+        curl_easy_setopt(dup->handle, CURLOPT_READDATA, dup);
+        if (self->seek_cb == NULL) {
+            curl_easy_setopt(dup->handle, CURLOPT_SEEKDATA, dup);
+        }
+    }
+    /* native sinks look themselves up through the handle's data pointer */
+    if (dup->writedata_fp != NULL) {
+        curl_easy_setopt(dup->handle, CURLOPT_WRITEDATA, dup);
+    }
+    if (dup->writeheader_fp != NULL) {
+        curl_easy_setopt(dup->handle, CURLOPT_WRITEHEADER, dup);
+    }
 
     /* Assign and incref postfields object */
     dup->postfields_obj = Py_XNewRef(self->postfields_obj);
@@ -534,6 +553,102 @@ error:
 }
 
 
+PYCURL_INTERNAL CurlObject *
+do_curl_duphandle(CurlObject *self, PyObject *Py_UNUSED(ignored))
+{
+    if (check_curl_state(self, PYCURL_REQUIRE_HANDLE, "duphandle") != 0) {
+        return NULL;
+    }
+    return util_curl_duphandle(self);
+}
+
+
+static int
+util_curl_is_native_sink(PyObject *obj)
+{
+    return obj != NULL &&
+        (PyObject_TypeCheck(obj, p_CurlBufferSink_Type) ||
+         Py_IS_TYPE(obj, p_CurlFdSink_Type) ||
+         Py_IS_TYPE(obj, p_CurlMmapSink_Type));
+}
+
+
+PYCURL_INTERNAL PyObject *
+do_curl_duphandle_many(CurlObject *self, PyObject *args, PyObject *kwds)
+{
+    Py_ssize_t i, n = -1;
+    PyObject *urls = Py_None;
+    PyObject *seq = NULL, *result = NULL;
+    static char *kwlist[] = {"n", "urls", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|nO:duphandle_many", kwlist, &n, &urls)) {
+        return NULL;
+    }
+    if (check_curl_state(self, PYCURL_REQUIRE_HANDLE, "duphandle_many") != 0) {
+        return NULL;
+    }
+    /* the clones would all write into the same sink at once */
+    if (util_curl_is_native_sink(self->writedata_fp) ||
+        util_curl_is_native_sink(self->writeheader_fp)) {
+        PyErr_SetString(ErrorObject,
+                        "cannot invoke duphandle_many() - the curl handle writes to a sink, "
+                        "set one on each clone instead");
+        return NULL;
+    }
+    if (urls != Py_None) {
+        seq = PySequence_Fast(urls, "duphandle_many urls must be an iterable of strings");
+        if (seq == NULL) {
+            return NULL;
+        }
+        if (n == -1) {
+            n = PySequence_Fast_GET_SIZE(seq);
+        } else if (n != PySequence_Fast_GET_SIZE(seq)) {
+            PyErr_SetString(PyExc_ValueError, "duphandle_many urls must have n items");
+            goto error;
+        }
+    } else if (n < 0) {
+        PyErr_SetString(PyExc_ValueError, "duphandle_many requires a non-negative n or urls");
+        goto error;
+    }
+
+    result = PyList_New(n);
+    if (result == NULL) {
+        goto error;
+    }
+    for (i = 0; i < n; i++) {
+        CurlObject *dup = util_curl_duphandle(self);
+
+        if (dup == NULL) {
+            goto error;
+        }
+        PyList_SET_ITEM(result, i, (PyObject *) dup);
+        if (seq != NULL) {
+            PyObject *encoded_obj;
+            char *url;
+            CURLcode res;
+
+            url = PyText_AsString_NoNUL(PySequence_Fast_GET_ITEM(seq, i), &encoded_obj);
+            if (url == NULL) {
+                goto error;
+            }
+            res = curl_easy_setopt(dup->handle, CURLOPT_URL, url);
+            Py_XDECREF(encoded_obj);
+            if (res != CURLE_OK) {
+                create_and_set_error_object(dup, (int) res);
+                goto error;
+            }
+        }
+    }
+    Py_XDECREF(seq);
+    return result;
+
+error:
+    Py_XDECREF(result);
+    Py_XDECREF(seq);
+    return NULL;
+}
+
+
 /* util function shared by close() and clear() */
 PYCURL_INTERNAL void
 util_curl_xdecref(CurlObject *self, int flags, CURL *handle)
@@ -552,6 +667,10 @@ util_curl_xdecref(CurlObject *self, int flags, CURL *handle)
     if (flags & PYCURL_MEMGROUP_CALLBACK) {
         /* Decrement refcount for python callbacks. */
         Py_CLEAR(self->w_cb);
+        PyMem_RawFree(self->w_cb_pending);
+        self->w_cb_pending = NULL;
+        self->w_cb_pending_len = self->w_cb_pending_cap = 0;
+        self->w_cb_min_chunk = 0;
         Py_CLEAR(self->h_cb);
         Py_CLEAR(self->r_cb);
         Py_CLEAR(self->pro_cb);
@@ -588,6 +707,7 @@ util_curl_xdecref(CurlObject *self, int flags, CURL *handle)
     if (flags & PYCURL_MEMGROUP_FILE) {
         /* Decrement refcount for python file objects. */
         Py_CLEAR(self->readdata_fp);
+        util_curl_release_read_source(self);
         Py_CLEAR(self->writedata_fp);
         Py_CLEAR(self->writeheader_fp);
     }
@@ -758,7 +878,11 @@ do_curl_close(CurlObject *self, PyObject *Py_UNUSED(ignored))
 
 static PyObject *do_curl_get_closed(CurlObject *self, void *Py_UNUSED(closure))
 {
-    if (self->handle == NULL) {
+    int closed;
+    Py_BEGIN_CRITICAL_SECTION(self);
+    closed = (self->handle == NULL);
+    Py_END_CRITICAL_SECTION();
+    if (closed) {
         Py_RETURN_TRUE;
     } else {
         Py_RETURN_FALSE;
@@ -978,41 +1102,83 @@ do_curl_share(CurlObject *self, PyObject *Py_UNUSED(ignored))
 
 /* --------------- methods --------------- */
 
+PYCURL_LOCKED_METHOD(do_curl_close, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_duphandle, CurlObject)
+PYCURL_LOCKED_METHOD_KW(do_curl_duphandle_many, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_errstr, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_errstr_raw, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_getinfo, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_getinfo_raw, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_getinfo_many, CurlObject)
+PYCURL_LOCKED_METHOD_KW(do_curl_iter_chunks, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_multi, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_pause, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_perform, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_perform_rb, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_perform_rs, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_recv, CurlObject)
+PYCURL_LOCKED_METHOD_KW(do_curl_recv_into, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_reset, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_send, CurlObject)
+PYCURL_LOCKED_METHOD_KW(do_curl_setopt, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_setopt_many, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_setopt_string, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_share, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_stats, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_unpause, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_unsetopt, CurlObject)
+#if defined(HAVE_CURL_OPENSSL)
+PYCURL_LOCKED_METHOD(do_curl_set_ca_certs, CurlObject)
+#endif
+#ifdef HAVE_CURL_WEBSOCKETS
+PYCURL_LOCKED_METHOD_KW(do_curl_ws_send, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_ws_recv, CurlObject)
+PYCURL_LOCKED_METHOD_KW(do_curl_ws_recv_into, CurlObject)
+PYCURL_LOCKED_METHOD(do_curl_ws_meta, CurlObject)
+PYCURL_LOCKED_METHOD_KW(do_curl_ws_close, CurlObject)
+#endif
+
+
 PYCURL_INTERNAL PyMethodDef curlobject_methods[] = {
-    {"close", (PyCFunction)do_curl_close, METH_NOARGS, curl_close_doc},
-    {"duphandle", (PyCFunction)do_curl_duphandle, METH_NOARGS, curl_duphandle_doc},
-    {"errstr", (PyCFunction)do_curl_errstr, METH_NOARGS, curl_errstr_doc},
-    {"errstr_raw", (PyCFunction)do_curl_errstr_raw, METH_NOARGS, curl_errstr_raw_doc},
-    {"getinfo", (PyCFunction)do_curl_getinfo, METH_VARARGS, curl_getinfo_doc},
-    {"getinfo_raw", (PyCFunction)do_curl_getinfo_raw, METH_VARARGS, curl_getinfo_raw_doc},
-    {"multi", (PyCFunction)do_curl_multi, METH_NOARGS, curl_multi_doc},
-    {"pause", (PyCFunction)do_curl_pause, METH_VARARGS, curl_pause_doc},
-    {"perform", (PyCFunction)do_curl_perform, METH_NOARGS, curl_perform_doc},
-    {"perform_rb", (PyCFunction)do_curl_perform_rb, METH_NOARGS, curl_perform_rb_doc},
-    {"perform_rs", (PyCFunction)do_curl_perform_rs, METH_NOARGS, curl_perform_rs_doc},
-    {"recv", (PyCFunction)do_curl_recv, METH_VARARGS, curl_recv_doc},
-    {"recv_into", (PyCFunction)do_curl_recv_into, METH_VARARGS | METH_KEYWORDS, curl_recv_into_doc},
-    {"reset", (PyCFunction)do_curl_reset, METH_NOARGS, curl_reset_doc},
-    {"send", (PyCFunction)do_curl_send, METH_VARARGS, curl_send_doc},
-    {"setopt", (PyCFunction)do_curl_setopt, METH_VARARGS | METH_KEYWORDS, curl_setopt_doc},
-    {"setopt_string", (PyCFunction)do_curl_setopt_string, METH_VARARGS, curl_setopt_string_doc},
-    {"share", (PyCFunction)do_curl_share, METH_NOARGS, curl_share_doc},
-    {"unpause", (PyCFunction)do_curl_unpause, METH_NOARGS, curl_unpause_doc},
-    {"unsetopt", (PyCFunction)do_curl_unsetopt, METH_VARARGS, curl_unsetopt_doc},
+    {"close", (PyCFunction)do_curl_close_locked, METH_NOARGS, curl_close_doc},
+    {"duphandle", (PyCFunction)do_curl_duphandle_locked, METH_NOARGS, curl_duphandle_doc},
+    {"duphandle_many", (PyCFunction)do_curl_duphandle_many_locked, METH_VARARGS | METH_KEYWORDS, curl_duphandle_many_doc},
+    {"errstr", (PyCFunction)do_curl_errstr_locked, METH_NOARGS, curl_errstr_doc},
+    {"errstr_raw", (PyCFunction)do_curl_errstr_raw_locked, METH_NOARGS, curl_errstr_raw_doc},
+    {"getinfo", (PyCFunction)do_curl_getinfo_locked, METH_VARARGS, curl_getinfo_doc},
+    {"getinfo_raw", (PyCFunction)do_curl_getinfo_raw_locked, METH_VARARGS, curl_getinfo_raw_doc},
+    {"getinfo_many", (PyCFunction)do_curl_getinfo_many_locked, METH_VARARGS, curl_getinfo_many_doc},
+    {"iter_chunks", (PyCFunction)do_curl_iter_chunks_locked, METH_VARARGS | METH_KEYWORDS, curl_iter_chunks_doc},
+    {"multi", (PyCFunction)do_curl_multi_locked, METH_NOARGS, curl_multi_doc},
+    {"pause", (PyCFunction)do_curl_pause_locked, METH_VARARGS, curl_pause_doc},
+    {"perform", (PyCFunction)do_curl_perform_locked, METH_NOARGS, curl_perform_doc},
+    {"perform_rb", (PyCFunction)do_curl_perform_rb_locked, METH_NOARGS, curl_perform_rb_doc},
+    {"perform_rs", (PyCFunction)do_curl_perform_rs_locked, METH_NOARGS, curl_perform_rs_doc},
+    {"recv", (PyCFunction)do_curl_recv_locked, METH_VARARGS, curl_recv_doc},
+    {"recv_into", (PyCFunction)do_curl_recv_into_locked, METH_VARARGS | METH_KEYWORDS, curl_recv_into_doc},
+    {"reset", (PyCFunction)do_curl_reset_locked, METH_NOARGS, curl_reset_doc},
+    {"send", (PyCFunction)do_curl_send_locked, METH_VARARGS, curl_send_doc},
+    {"setopt", (PyCFunction)do_curl_setopt_locked, METH_VARARGS | METH_KEYWORDS, curl_setopt_doc},
+    {"setopt_many", (PyCFunction)do_curl_setopt_many_locked, METH_VARARGS, curl_setopt_many_doc},
+    {"setopt_string", (PyCFunction)do_curl_setopt_string_locked, METH_VARARGS, curl_setopt_string_doc},
+    {"share", (PyCFunction)do_curl_share_locked, METH_NOARGS, curl_share_doc},
+    {"stats", (PyCFunction)do_curl_stats_locked, METH_NOARGS, curl_stats_doc},
+    {"unpause", (PyCFunction)do_curl_unpause_locked, METH_NOARGS, curl_unpause_doc},
+    {"unsetopt", (PyCFunction)do_curl_unsetopt_locked, METH_VARARGS, curl_unsetopt_doc},
 #if defined(HAVE_CURL_OPENSSL)
-    {"set_ca_certs", (PyCFunction)do_curl_set_ca_certs, METH_VARARGS, curl_set_ca_certs_doc},
+    {"set_ca_certs", (PyCFunction)do_curl_set_ca_certs_locked, METH_VARARGS, curl_set_ca_certs_doc},
 #endif
 #ifdef HAVE_CURL_WEBSOCKETS
-    {"ws_send", (PyCFunction)do_curl_ws_send, METH_VARARGS | METH_KEYWORDS, curl_ws_send_doc},
-    {"ws_recv", (PyCFunction)do_curl_ws_recv, METH_VARARGS, curl_ws_recv_doc},
-    {"ws_recv_into", (PyCFunction)do_curl_ws_recv_into, METH_VARARGS | METH_KEYWORDS, curl_ws_recv_into_doc},
-    {"ws_meta", (PyCFunction)do_curl_ws_meta, METH_NOARGS, curl_ws_meta_doc},
-    {"ws_close", (PyCFunction)do_curl_ws_close, METH_VARARGS | METH_KEYWORDS, curl_ws_close_doc},
+    {"ws_send", (PyCFunction)do_curl_ws_send_locked, METH_VARARGS | METH_KEYWORDS, curl_ws_send_doc},
+    {"ws_recv", (PyCFunction)do_curl_ws_recv_locked, METH_VARARGS, curl_ws_recv_doc},
+    {"ws_recv_into", (PyCFunction)do_curl_ws_recv_into_locked, METH_VARARGS | METH_KEYWORDS, curl_ws_recv_into_doc},
+    {"ws_meta", (PyCFunction)do_curl_ws_meta_locked, METH_NOARGS, curl_ws_meta_doc},
+    {"ws_close", (PyCFunction)do_curl_ws_close_locked, METH_VARARGS | METH_KEYWORDS, curl_ws_close_doc},
 #endif
     {"__getstate__", (PyCFunction)do_curl_getstate, METH_NOARGS, NULL},
     {"__setstate__", (PyCFunction)do_curl_setstate, METH_VARARGS, NULL},
     {"__enter__", (PyCFunction)do_curl_enter, METH_NOARGS, NULL},
-    {"__exit__", (PyCFunction)do_curl_close, METH_VARARGS, NULL},
+    {"__exit__", (PyCFunction)do_curl_close_locked, METH_VARARGS, NULL},
     {NULL, NULL, 0, NULL}
 };
 
@@ -1035,8 +1201,10 @@ do_curl_getattro(PyObject *o, PyObject *n)
     if( !v && PyErr_ExceptionMatches(PyExc_AttributeError) )
     {
         PyErr_Clear();
+        Py_BEGIN_CRITICAL_SECTION(o);
         v = my_getattro(o, n, ((CurlObject *)o)->dict,
                         curlobject_constants, curlobject_methods);
+        Py_END_CRITICAL_SECTION();
     }
     return v;
 }
@@ -1044,8 +1212,12 @@ do_curl_getattro(PyObject *o, PyObject *n)
 PYCURL_INTERNAL int
 do_curl_setattro(PyObject *o, PyObject *name, PyObject *v)
 {
+    int res;
     assert_curl_state((CurlObject *)o);
-    return my_setattro(&((CurlObject *)o)->dict, name, v);
+    Py_BEGIN_CRITICAL_SECTION(o);
+    res = my_setattro(&((CurlObject *)o)->dict, name, v);
+    Py_END_CRITICAL_SECTION();
+    return res;
 }
 
 PYCURL_INTERNAL PyTypeObject Curl_Type = {
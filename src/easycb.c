@@ -61,39 +61,22 @@ callback_return_value_to_int(PyObject *ret_obj, const char *callback_name, int *
 }
 
 
-static size_t
-util_write_callback(int flags, char *ptr, size_t size, size_t nmemb, void *stream)
+/* Calls the write or header callback with total_size bytes at ptr and stores
+ * the value libcurl expects back in *ret_out. Requires the GIL; returns -1
+ * with an exception set on failure. */
+static int
+util_write_callback_call(CurlObject *self, int flags, char *ptr, Py_ssize_t total_size, size_t *ret_out)
 {
-    CurlObject *self;
     PyObject *arg;
     PyObject *arglist;
-    PyObject *result = NULL;
-    size_t ret = 0;     /* assume error */
+    PyObject *result;
     PyObject *cb;
-    Py_ssize_t total_size;
     int as_memoryview;
     int track_ws_write_callback;
     int prev_ws_write_callback = 0;
-    PYCURL_DECLARE_THREAD_STATE;
-
-    /* acquire thread */
-    self = (CurlObject *)stream;
-
-    PYCURL_BEGIN_CALLBACK(util_write_callback, ret);
+    int rv = -1;
 
-    /* check args */
     cb = flags ? self->h_cb : self->w_cb;
-    if (cb == NULL)
-        goto silent_error;
-    if (size <= 0 || nmemb <= 0)
-        goto done;
-    total_size = (Py_ssize_t)(size * nmemb);
-    if (total_size < 0 || (size_t)total_size / size != nmemb) {
-        PyErr_SetString(ErrorObject, "integer overflow in write callback");
-        goto verbose_error;
-    }
-
-    /* run callback */
     as_memoryview = flags ? self->h_cb_memoryview : self->w_cb_memoryview;
     if (as_memoryview) {
         arg = PyMemoryView_FromMemory(ptr, total_size, PyBUF_READ);
@@ -101,12 +84,12 @@ util_write_callback(int flags, char *ptr, size_t size, size_t nmemb, void *strea
         arg = PyBytes_FromStringAndSize(ptr, total_size);
     }
     if (arg == NULL) {
-        goto verbose_error;
+        return -1;
     }
     arglist = PyTuple_Pack(1, arg);
     Py_DECREF(arg);
     if (arglist == NULL)
-        goto verbose_error;
+        return -1;
     track_ws_write_callback = (flags == 0);
     if (track_ws_write_callback) {
         prev_ws_write_callback = self->ws_write_cb_running;
@@ -127,28 +110,61 @@ util_write_callback(int flags, char *ptr, size_t size, size_t nmemb, void *strea
     }
     Py_DECREF(arglist);
     if (result == NULL)
-        goto verbose_error;
+        return -1;
 
     /* handle result */
     if (result == Py_None) {
-        ret = total_size;           /* None means success */
+        *ret_out = total_size;      /* None means success */
+        rv = 0;
     }
     else if (PyLong_Check(result)) {
         long value = PyLong_AsLong(result);
 
-        if (value == -1 && PyErr_Occurred()) {
-            goto verbose_error;
+        if (!(value == -1 && PyErr_Occurred())) {
+            *ret_out = (size_t) value;
+            rv = 0;
         }
-        ret = (size_t) value;
     }
     else {
         PyErr_SetString(ErrorObject, "write callback must return int or None");
+    }
+    Py_DECREF(result);
+    return rv;
+}
+
+
+static size_t
+util_write_callback(int flags, char *ptr, size_t size, size_t nmemb, void *stream)
+{
+    CurlObject *self;
+    size_t ret = 0;     /* assume error */
+    Py_ssize_t total_size;
+    PYCURL_DECLARE_THREAD_STATE;
+
+    /* acquire thread */
+    self = (CurlObject *)stream;
+
+    PYCURL_BEGIN_CALLBACK(util_write_callback, ret);
+
+    /* check args */
+    if ((flags ? self->h_cb : self->w_cb) == NULL)
+        goto silent_error;
+    if (size <= 0 || nmemb <= 0)
+        goto done;
+    total_size = (Py_ssize_t)(size * nmemb);
+    if (total_size < 0 || (size_t)total_size / size != nmemb) {
+        PyErr_SetString(ErrorObject, "integer overflow in write callback");
+        goto verbose_error;
+    }
+
+    /* run callback */
+    if (util_write_callback_call(self, flags, ptr, total_size, &ret) != 0) {
+        ret = 0;
         goto verbose_error;
     }
 
 done:
 silent_error:
-    Py_XDECREF(result);
     PYCURL_END_CALLBACK(ret);
 verbose_error:
     print_callback_error_if_regular_exception();
@@ -156,10 +172,105 @@ verbose_error:
 }
 
 
+/* Makes room for needed more bytes in the min_chunk buffer. Runs without
+ * the GIL. */
+static int
+write_pending_reserve(CurlObject *self, size_t needed)
+{
+    size_t cap;
+    char *buf;
+
+    if (self->w_cb_pending_cap - self->w_cb_pending_len >= needed) {
+        return 0;
+    }
+    cap = self->w_cb_pending_cap ? self->w_cb_pending_cap : self->w_cb_min_chunk;
+    while (cap - self->w_cb_pending_len < needed) {
+        if (cap > PY_SSIZE_T_MAX / 2) {
+            return -1;
+        }
+        cap *= 2;
+    }
+    buf = PyMem_RawRealloc(self->w_cb_pending, cap);
+    if (buf == NULL) {
+        return -1;
+    }
+    self->w_cb_pending = buf;
+    self->w_cb_pending_cap = cap;
+    return 0;
+}
+
+
 PYCURL_INTERNAL size_t
 write_callback(char *ptr, size_t size, size_t nmemb, void *stream)
 {
-    return util_write_callback(0, ptr, size, nmemb, stream);
+    CurlObject *self = (CurlObject *)stream;
+    size_t total_size, pending_len, ret;
+
+    if (self->w_cb_min_chunk == 0) {
+        return util_write_callback(0, ptr, size, nmemb, stream);
+    }
+
+    /* min_chunk: hold data back until enough has accumulated, so that
+     * the callback (and the GIL) is only entered for large chunks */
+    total_size = size * nmemb;
+    if (total_size == 0) {
+        return 0;
+    }
+    if (total_size / size != nmemb) {
+        return 0;
+    }
+    if (self->w_cb_pending_len == 0 && total_size >= self->w_cb_min_chunk) {
+        return util_write_callback(0, ptr, size, nmemb, stream);
+    }
+    if (write_pending_reserve(self, total_size) != 0) {
+        return 0;
+    }
+    memcpy(self->w_cb_pending + self->w_cb_pending_len, ptr, total_size);
+    self->w_cb_pending_len += total_size;
+    if (self->w_cb_pending_len < self->w_cb_min_chunk) {
+        return total_size;
+    }
+
+    pending_len = self->w_cb_pending_len;
+    ret = util_write_callback(0, self->w_cb_pending, 1, pending_len, stream);
+    if (ret == pending_len) {
+        self->w_cb_pending_len = 0;
+        return total_size;
+    }
+    if (ret == CURL_WRITEFUNC_PAUSE) {
+        /* libcurl delivers this chunk again once the transfer is
+         * unpaused, so only keep what was held back before it */
+        self->w_cb_pending_len -= total_size;
+        return CURL_WRITEFUNC_PAUSE;
+    }
+    self->w_cb_pending_len = 0;
+    return 0;
+}
+
+/* Delivers data still held back by min_chunk once the transfer is over.
+ * Requires the GIL. A failing callback is reported as during the transfer:
+ * regular exceptions are printed and CURLE_WRITE_ERROR is returned, while
+ * KeyboardInterrupt and the like are left pending for the caller. */
+PYCURL_INTERNAL CURLcode
+write_callback_flush(CurlObject *self)
+{
+    size_t pending_len = self->w_cb_pending_len;
+    size_t ret;
+
+    self->w_cb_pending_len = 0;
+    if (pending_len == 0 || self->w_cb == NULL) {
+        return CURLE_OK;
+    }
+    if (util_write_callback_call(self, 0, self->w_cb_pending, (Py_ssize_t) pending_len, &ret) != 0) {
+        print_callback_error_if_regular_exception();
+    }
+    else if (ret == pending_len) {
+        return CURLE_OK;
+    }
+    /* pausing is not possible anymore, so it fails like a short write */
+    snprintf(self->error, sizeof(self->error), "%s",
+        curl_easy_strerror(CURLE_WRITE_ERROR));
+    return CURLE_WRITE_ERROR;
 }
 
 PYCURL_INTERNAL size_t
@@ -113,19 +113,13 @@ static PyObject *convert_certinfo(struct curl_certinfo *cinfo, int decode)
 }
 #endif
 
-PYCURL_INTERNAL PyObject *
-do_curl_getinfo_raw(CurlObject *self, PyObject *args)
+/* Return the value of a getinfo option, with strings as bytes. The caller
+ * has checked the state of `self`. */
+static PyObject *
+util_curl_getinfo_raw(CurlObject *self, int option)
 {
-    int option;
     int res;
 
-    if (!PyArg_ParseTuple(args, "i:getinfo_raw", &option)) {
-        return NULL;
-    }
-    if (check_curl_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "getinfo") != 0) {
-        return NULL;
-    }
-
     switch (option) {
     case CURLINFO_FILETIME:
     case CURLINFO_HEADER_SIZE:
@@ -328,6 +322,21 @@ PYCURL_IGNORE_DEPRECATED_END
 }
 
 
+PYCURL_INTERNAL PyObject *
+do_curl_getinfo_raw(CurlObject *self, PyObject *args)
+{
+    int option;
+
+    if (!PyArg_ParseTuple(args, "i:getinfo_raw", &option)) {
+        return NULL;
+    }
+    if (check_curl_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "getinfo") != 0) {
+        return NULL;
+    }
+    return util_curl_getinfo_raw(self, option);
+}
+
+
 static PyObject *
 decode_string_list(PyObject *list)
 {
@@ -360,16 +369,14 @@ err:
 }
 
 
-PYCURL_INTERNAL PyObject *
-do_curl_getinfo(CurlObject *self, PyObject *args)
+/* Return the value of a getinfo option, with strings decoded. The caller
+ * has checked the state of `self`. */
+static PyObject *
+util_curl_getinfo(CurlObject *self, int option)
 {
-    int option, res;
+    int res;
     PyObject *rv;
 
-    if (!PyArg_ParseTuple(args, "i:getinfo", &option)) {
-        return NULL;
-    }
-
 #ifdef HAVE_CURLOPT_CERTINFO
     if (option == CURLINFO_CERTINFO) {
         /* Return a list of lists of 2-tuples */
@@ -383,7 +390,7 @@ do_curl_getinfo(CurlObject *self, PyObject *args)
     }
 #endif
 
-    rv = do_curl_getinfo_raw(self, args);
+    rv = util_curl_getinfo_raw(self, option);
     if (rv == NULL) {
         return rv;
     }
@@ -428,6 +435,222 @@ do_curl_getinfo(CurlObject *self, PyObject *args)
 }
 
 
+PYCURL_INTERNAL PyObject *
+do_curl_getinfo(CurlObject *self, PyObject *args)
+{
+    int option;
+
+    if (!PyArg_ParseTuple(args, "i:getinfo", &option)) {
+        return NULL;
+    }
+    if (check_curl_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "getinfo") != 0) {
+        return NULL;
+    }
+    return util_curl_getinfo(self, option);
+}
+
+
+PYCURL_INTERNAL PyObject *
+do_curl_getinfo_many(CurlObject *self, PyObject *args)
+{
+    PyObject *options, *seq, *result;
+    Py_ssize_t i, n;
+
+    if (!PyArg_ParseTuple(args, "O:getinfo_many", &options)) {
+        return NULL;
+    }
+    if (check_curl_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "getinfo") != 0) {
+        return NULL;
+    }
+    seq = PySequence_Fast(options, "getinfo_many argument must be an iterable of getinfo options");
+    if (seq == NULL) {
+        return NULL;
+    }
+    result = PyDict_New();
+    if (result == NULL) {
+        goto error;
+    }
+    n = PySequence_Fast_GET_SIZE(seq);
+    for (i = 0; i < n; i++) {
+        PyObject *key = PySequence_Fast_GET_ITEM(seq, i);
+        PyObject *value;
+        int option;
+
+        if (pycurl_long_as_int(key, &option) != 0) {
+            goto error;
+        }
+        value = util_curl_getinfo(self, option);
+        if (value == NULL || PyDict_SetItem(result, key, value) != 0) {
+            Py_XDECREF(value);
+            goto error;
+        }
+        Py_DECREF(value);
+    }
+    Py_DECREF(seq);
+    return result;
+
+error:
+    Py_XDECREF(result);
+    Py_DECREF(seq);
+    return NULL;
+}
+
+
+/* --------------- stats --------------- */
+
+static PyStructSequence_Field transfer_stats_fields[] = {
+    {"total_time", "total time of the transfer, in microseconds"},
+    {"namelookup_time", "time until name resolution completed, in microseconds"},
+    {"connect_time", "time until the connection was established, in microseconds"},
+    {"appconnect_time", "time until the TLS handshake completed, in microseconds"},
+    {"pretransfer_time", "time until the transfer was about to begin, in microseconds"},
+    {"posttransfer_time", "time until the request was sent, in microseconds"},
+    {"starttransfer_time", "time until the first byte was received, in microseconds"},
+    {"redirect_time", "time spent following redirects, in microseconds"},
+    {"queue_time", "time spent queued before the transfer started, in microseconds"},
+    {"size_download", "bytes of body downloaded"},
+    {"size_upload", "bytes of body uploaded"},
+    {"speed_download", "average download speed, in bytes per second"},
+    {"speed_upload", "average upload speed, in bytes per second"},
+    {"content_length_download", "announced length of the download, or -1"},
+    {"content_length_upload", "announced length of the upload, or -1"},
+    {"header_size", "bytes of headers received"},
+    {"request_size", "bytes of requests sent"},
+    {"response_code", "last response code"},
+    {"http_version", "HTTP version of the last connection, a CURL_HTTP_VERSION_* value"},
+    {"redirect_count", "number of redirects followed"},
+    {"num_connects", "number of new connections made"},
+    {"primary_port", "port of the last connection"},
+    {"local_port", "local port of the last connection"},
+    {NULL, NULL}
+};
+
+PYCURL_INTERNAL PyStructSequence_Desc transfer_stats_desc = {
+    "pycurl.TransferStats",
+    "Transfer metrics returned by Curl.stats(). Fields not supported by the\n"
+    "libcurl version pycurl was built against are None.",
+    transfer_stats_fields,
+    sizeof(transfer_stats_fields) / sizeof(transfer_stats_fields[0]) - 1
+};
+
+
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 55, 0)
+static PyObject *
+stats_off_t(CurlObject *self, CURLINFO info)
+{
+    curl_off_t v = 0;
+
+    if (curl_easy_getinfo(self->handle, info, &v) != CURLE_OK) {
+        Py_RETURN_NONE;
+    }
+    return PyLong_FromLongLong((long long) v);
+}
+#endif
+
+
+static PyObject *
+stats_long(CurlObject *self, CURLINFO info)
+{
+    long v = 0;
+
+    if (curl_easy_getinfo(self->handle, info, &v) != CURLE_OK) {
+        Py_RETURN_NONE;
+    }
+    return PyLong_FromLong(v);
+}
+
+
+#define STATS_NONE Py_NewRef(Py_None)
+
+PYCURL_INTERNAL PyObject *
+do_curl_stats(CurlObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *stats;
+    PyObject *values[sizeof(transfer_stats_fields) / sizeof(transfer_stats_fields[0]) - 1];
+    Py_ssize_t i, n = 0;
+
+    if (check_curl_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "stats") != 0) {
+        return NULL;
+    }
+
+    /* in the order of transfer_stats_fields */
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 61, 0)
+    values[n++] = stats_off_t(self, CURLINFO_TOTAL_TIME_T);
+    values[n++] = stats_off_t(self, CURLINFO_NAMELOOKUP_TIME_T);
+    values[n++] = stats_off_t(self, CURLINFO_CONNECT_TIME_T);
+    values[n++] = stats_off_t(self, CURLINFO_APPCONNECT_TIME_T);
+    values[n++] = stats_off_t(self, CURLINFO_PRETRANSFER_TIME_T);
+#else
+    for (i = 0; i < 5; i++) {
+        values[n++] = STATS_NONE;
+    }
+#endif
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(8, 10, 0)
+    values[n++] = stats_off_t(self, CURLINFO_POSTTRANSFER_TIME_T);
+#else
+    values[n++] = STATS_NONE;
+#endif
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 61, 0)
+    values[n++] = stats_off_t(self, CURLINFO_STARTTRANSFER_TIME_T);
+    values[n++] = stats_off_t(self, CURLINFO_REDIRECT_TIME_T);
+#else
+    values[n++] = STATS_NONE;
+    values[n++] = STATS_NONE;
+#endif
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(8, 6, 0)
+    values[n++] = stats_off_t(self, CURLINFO_QUEUE_TIME_T);
+#else
+    values[n++] = STATS_NONE;
+#endif
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 55, 0)
+    values[n++] = stats_off_t(self, CURLINFO_SIZE_DOWNLOAD_T);
+    values[n++] = stats_off_t(self, CURLINFO_SIZE_UPLOAD_T);
+    values[n++] = stats_off_t(self, CURLINFO_SPEED_DOWNLOAD_T);
+    values[n++] = stats_off_t(self, CURLINFO_SPEED_UPLOAD_T);
+    values[n++] = stats_off_t(self, CURLINFO_CONTENT_LENGTH_DOWNLOAD_T);
+    values[n++] = stats_off_t(self, CURLINFO_CONTENT_LENGTH_UPLOAD_T);
+#else
+    for (i = 0; i < 6; i++) {
+        values[n++] = STATS_NONE;
+    }
+#endif
+    values[n++] = stats_long(self, CURLINFO_HEADER_SIZE);
+    values[n++] = stats_long(self, CURLINFO_REQUEST_SIZE);
+    values[n++] = stats_long(self, CURLINFO_RESPONSE_CODE);
+#ifdef HAVE_CURLINFO_HTTP_VERSION
+    values[n++] = stats_long(self, CURLINFO_HTTP_VERSION);
+#else
+    values[n++] = STATS_NONE;
+#endif
+    values[n++] = stats_long(self, CURLINFO_REDIRECT_COUNT);
+    values[n++] = stats_long(self, CURLINFO_NUM_CONNECTS);
+#ifdef HAVE_CURLINFO_PRIMARY_PORT
+    values[n++] = stats_long(self, CURLINFO_PRIMARY_PORT);
+#else
+    values[n++] = STATS_NONE;
+#endif
+#ifdef HAVE_CURLINFO_LOCAL_PORT
+    values[n++] = stats_long(self, CURLINFO_LOCAL_PORT);
+#else
+    values[n++] = STATS_NONE;
+#endif
+    assert(n == transfer_stats_desc.n_in_sequence);
+
+    stats = PyStructSequence_New(transfer_stats_type);
+    for (i = 0; i < n; i++) {
+        if (stats == NULL || values[i] == NULL) {
+            Py_CLEAR(stats);
+            Py_XDECREF(values[i]);
+            continue;
+        }
+        PyStructSequence_SET_ITEM(stats, i, values[i]);
+    }
+    return stats;
+}
+
+#undef STATS_NONE
+
+
 PYCURL_INTERNAL PyObject *
 do_curl_errstr(CurlObject *self, PyObject *Py_UNUSED(ignored))
 {
@@ -38,6 +38,19 @@ pycurl_list_or_tuple_to_slist(int which, PyObject *obj, Py_ssize_t len)
 }
 
 
+/* Drop a native READDATA source along with the seek function installed for
+ * it, unless SEEKFUNCTION was set from Python. */
+static void
+util_curl_clear_read_source(CurlObject *self)
+{
+    if (self->read_source != PYCURL_READ_SOURCE_NONE && self->seek_cb == NULL) {
+        curl_easy_setopt(self->handle, CURLOPT_SEEKFUNCTION, NULL);
+        curl_easy_setopt(self->handle, CURLOPT_SEEKDATA, NULL);
+    }
+    util_curl_release_read_source(self);
+}
+
+
 static PyObject *
 util_curl_unsetopt(CurlObject *self, int option)
 {
@@ -81,6 +94,10 @@ util_curl_unsetopt(CurlObject *self, int option)
         break;
     case CURLOPT_WRITEHEADER:
         SETOPT((void *) 0);
+        /* a native sink also installed the header function */
+        if (self->writeheader_fp != NULL) {
+            SETOPT2(CURLOPT_HEADERFUNCTION, NULL);
+        }
         Py_CLEAR(self->writeheader_fp);
         break;
     case CURLOPT_CAINFO:
@@ -195,17 +212,28 @@ PYCURL_IGNORE_DEPRECATED_END
         if ((res = curl_easy_setopt(self->handle, CURLOPT_WRITEDATA, stdout)) != CURLE_OK)
             goto error;
         Py_CLEAR(self->w_cb);
+        Py_CLEAR(self->writedata_fp);
+        self->w_cb_min_chunk = 0;
+        self->w_cb_pending_len = 0;
         break;
 
     /* Same for READFUNCTION, with stdin as the default */
     case CURLOPT_READFUNCTION:
-        SETOPT(NULL);
-        if ((res = curl_easy_setopt(self->handle, CURLOPT_READDATA, stdin)) != CURLE_OK)
-            goto error;
+    case CURLOPT_READDATA:
+        SETOPT2(CURLOPT_READFUNCTION, NULL);
+        SETOPT2(CURLOPT_READDATA, stdin);
         Py_CLEAR(self->r_cb);
+        Py_CLEAR(self->readdata_fp);
+        util_curl_clear_read_source(self);
+        break;
+
+    case CURLOPT_HEADERFUNCTION:
+        SETOPT(NULL);
+        SETOPT2(CURLOPT_WRITEHEADER, NULL);
+        Py_CLEAR(self->h_cb);
+        Py_CLEAR(self->writeheader_fp);
         break;
 
-    CLEAR_CALLBACK(CURLOPT_HEADERFUNCTION, CURLOPT_WRITEHEADER, self->h_cb);
 PYCURL_IGNORE_DEPRECATED_BEGIN
     CLEAR_CALLBACK(CURLOPT_PROGRESSFUNCTION, CURLOPT_PROGRESSDATA, self->pro_cb);
 PYCURL_IGNORE_DEPRECATED_END
@@ -224,7 +252,17 @@ PYCURL_IGNORE_DEPRECATED_END
 #ifdef HAVE_CURL_7_19_6_OPTS
     CLEAR_CALLBACK(CURLOPT_SSH_KEYFUNCTION, CURLOPT_SSH_KEYDATA, self->ssh_key_cb);
 #endif
-    CLEAR_CALLBACK(CURLOPT_SEEKFUNCTION, CURLOPT_SEEKDATA, self->seek_cb);
+    case CURLOPT_SEEKFUNCTION:
+        /* a native READDATA source goes back to seeking natively */
+        if (self->read_source != PYCURL_READ_SOURCE_NONE) {
+            SETOPT((curl_seek_callback) source_seek_callback);
+            SETOPT2(CURLOPT_SEEKDATA, self);
+        } else {
+            SETOPT(NULL);
+            SETOPT2(CURLOPT_SEEKDATA, NULL);
+        }
+        Py_CLEAR(self->seek_cb);
+        break;
 #if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 80, 0)
     CLEAR_CALLBACK(CURLOPT_PREREQFUNCTION, CURLOPT_PREREQDATA, self->prereq_cb);
 #endif
@@ -331,15 +369,10 @@ do_curl_setopt_blob(CurlObject *self, int option, PyObject *obj)
 #endif
 
 
-static PyObject *
-do_curl_setopt_string_impl(CurlObject *self, int option, PyObject *obj)
+/* Classify `option` by how setopt() takes a string value for it */
+PYCURL_INTERNAL int
+util_curl_string_option_kind(int option)
 {
-    char *str = NULL;
-    Py_ssize_t len = -1;
-    PyObject *encoded_obj;
-    int res;
-
-    /* Check that the option specified a string as well as the input */
     switch (option) {
 PYCURL_IGNORE_DEPRECATED_BEGIN
     case CURLOPT_EGDSOCKET:
@@ -349,9 +382,7 @@ PYCURL_IGNORE_DEPRECATED_BEGIN
     case CURLOPT_SOCKS5_GSSAPI_SERVICE:
 #endif
 PYCURL_IGNORE_DEPRECATED_END
-        if (PyErr_WarnEx(PyExc_DeprecationWarning, "setopt option is deprecated", 1) != 0) {
-            return NULL;
-        }
+        return PYCURL_STRING_OPTION_DEPRECATED;
     case CURLOPT_CAINFO:
     case CURLOPT_CAPATH:
     case CURLOPT_COOKIE:
@@ -482,11 +513,35 @@ PYCURL_IGNORE_DEPRECATED_END
 #if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(8, 8, 0)
     case CURLOPT_ECH:
 #endif
+        return PYCURL_STRING_OPTION;
+    case CURLOPT_POSTFIELDS:
+        return PYCURL_STRING_OPTION_POSTFIELDS;
+    default:
+        return PYCURL_STRING_OPTION_NONE;
+    }
+}
+
+
+static PyObject *
+do_curl_setopt_string_impl(CurlObject *self, int option, PyObject *obj)
+{
+    char *str = NULL;
+    Py_ssize_t len = -1;
+    PyObject *encoded_obj;
+    int res;
+
+    /* Check that the option specified a string as well as the input */
+    switch (util_curl_string_option_kind(option)) {
+    case PYCURL_STRING_OPTION_DEPRECATED:
+        if (PyErr_WarnEx(PyExc_DeprecationWarning, "setopt option is deprecated", 1) != 0) {
+            return NULL;
+        }
+    case PYCURL_STRING_OPTION:
         str = PyText_AsString_NoNUL(obj, &encoded_obj);
         if (str == NULL)
             return NULL;
         break;
-    case CURLOPT_POSTFIELDS:
+    case PYCURL_STRING_OPTION_POSTFIELDS:
         if (PyText_AsStringAndSize(obj, &str, &len, &encoded_obj) != 0)
             return NULL;
         /* automatically set POSTFIELDSIZE */
@@ -576,6 +631,20 @@ do_curl_setopt_int(CurlObject *self, int option, PyObject *obj)
 }
 
 
+
+
+/* Classify `option` by how setopt() takes an integer value for it */
+PYCURL_INTERNAL int
+util_curl_int_option_kind(int option)
+{
+    if (IS_LONG_OPTION(option)) {
+        return PYCURL_INT_OPTION_LONG;
+    } else if (IS_OFF_T_OPTION(option)) {
+        return PYCURL_INT_OPTION_OFF_T;
+    }
+    return PYCURL_INT_OPTION_NONE;
+}
+
 #undef IS_LONG_OPTION
 #undef IS_OFF_T_OPTION
 
@@ -856,54 +925,56 @@ error:
 }
 
 
-static PyObject *
-do_curl_setopt_list(CurlObject *self, int option, int which, PyObject *obj)
+/* Return where `self` keeps the slist set for `option`, or NULL if
+ * `option` does not take a list of strings */
+PYCURL_INTERNAL CurlSlistObject **
+util_curl_slist_slot(CurlObject *self, int option)
 {
-    CurlSlistObject **old_slist_obj = NULL;
-    struct curl_slist *slist = NULL;
-    Py_ssize_t len;
-    int res;
-
     switch (option) {
     case CURLOPT_HTTP200ALIASES:
-        old_slist_obj = &self->http200aliases;
-        break;
+        return &self->http200aliases;
     case CURLOPT_HTTPHEADER:
-        old_slist_obj = &self->httpheader;
-        break;
+        return &self->httpheader;
 #if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 37, 0)
     case CURLOPT_PROXYHEADER:
-        old_slist_obj = &self->proxyheader;
-        break;
+        return &self->proxyheader;
 #endif
     case CURLOPT_POSTQUOTE:
-        old_slist_obj = &self->postquote;
-        break;
+        return &self->postquote;
     case CURLOPT_PREQUOTE:
-        old_slist_obj = &self->prequote;
-        break;
+        return &self->prequote;
     case CURLOPT_QUOTE:
-        old_slist_obj = &self->quote;
-        break;
+        return &self->quote;
     case CURLOPT_TELNETOPTIONS:
-        old_slist_obj = &self->telnetoptions;
-        break;
+        return &self->telnetoptions;
 #ifdef HAVE_CURLOPT_RESOLVE
     case CURLOPT_RESOLVE:
-        old_slist_obj = &self->resolve;
-        break;
+        return &self->resolve;
 #endif
 #ifdef HAVE_CURL_7_20_0_OPTS
     case CURLOPT_MAIL_RCPT:
-        old_slist_obj = &self->mail_rcpt;
-        break;
+        return &self->mail_rcpt;
 #endif
 #ifdef HAVE_CURLOPT_CONNECT_TO
     case CURLOPT_CONNECT_TO:
-        old_slist_obj = &self->connect_to;
-        break;
+        return &self->connect_to;
 #endif
     default:
+        return NULL;
+    }
+}
+
+
+static PyObject *
+do_curl_setopt_list(CurlObject *self, int option, int which, PyObject *obj)
+{
+    CurlSlistObject **old_slist_obj;
+    struct curl_slist *slist = NULL;
+    Py_ssize_t len;
+    int res;
+
+    old_slist_obj = util_curl_slist_slot(self, option);
+    if (old_slist_obj == NULL) {
         /* None of the list options were recognized, raise exception */
         PyErr_SetString(PyExc_TypeError, "lists are not supported for this option");
         return NULL;
@@ -940,7 +1011,7 @@ do_curl_setopt_list(CurlObject *self, int option, int which, PyObject *obj)
 
 
 static PyObject *
-do_curl_setopt_callable(CurlObject *self, int option, PyObject *obj, int use_memoryview_flag)
+do_curl_setopt_callable(CurlObject *self, int option, PyObject *obj, int use_memoryview_flag, Py_ssize_t min_chunk)
 {
     /* We use function types here to make sure that our callback
      * definitions exactly match the <curl/curl.h> interface.
@@ -983,6 +1054,8 @@ do_curl_setopt_callable(CurlObject *self, int option, PyObject *obj, int use_mem
         Py_CLEAR(self->w_cb);
         self->w_cb = obj;
         self->w_cb_memoryview = (use_memoryview_flag == 1) ? 1 : 0;
+        self->w_cb_min_chunk = (min_chunk > 0) ? (size_t) min_chunk : 0;
+        self->w_cb_pending_len = 0;
         curl_easy_setopt(self->handle, CURLOPT_WRITEFUNCTION, w_cb);
         curl_easy_setopt(self->handle, CURLOPT_WRITEDATA, self);
         break;
@@ -998,6 +1071,7 @@ do_curl_setopt_callable(CurlObject *self, int option, PyObject *obj, int use_mem
     case CURLOPT_READFUNCTION:
         Py_INCREF(obj);
         Py_CLEAR(self->readdata_fp);
+        util_curl_clear_read_source(self);
         Py_CLEAR(self->r_cb);
         self->r_cb = obj;
         curl_easy_setopt(self->handle, CURLOPT_READFUNCTION, r_cb);
@@ -1279,6 +1353,83 @@ do_curl_setopt_curlurl(CurlObject *self, PyObject *obj)
 #endif
 
 
+/* Route WRITEDATA/WRITEHEADER to a native sink. The sink is kept in the
+ * matching *_fp slot, where the GIL-free callbacks in easysink.c look it up. */
+PYCURL_INTERNAL PyObject *
+do_curl_setopt_sink(CurlObject *self, int option, PyObject *obj)
+{
+    const curl_write_callback w_cb = sink_write_callback;
+    const curl_write_callback h_cb = sink_header_callback;
+
+    switch (option) {
+    case CURLOPT_WRITEDATA:
+        Py_CLEAR(self->w_cb);
+        self->w_cb_min_chunk = 0;
+        self->w_cb_pending_len = 0;
+        Py_XSETREF(self->writedata_fp, Py_NewRef(obj));
+        curl_easy_setopt(self->handle, CURLOPT_WRITEFUNCTION, w_cb);
+        curl_easy_setopt(self->handle, CURLOPT_WRITEDATA, self);
+        break;
+    case CURLOPT_WRITEHEADER:
+        if (Py_IS_TYPE(obj, p_CurlMmapSink_Type)) {
+            PyErr_SetString(PyExc_TypeError, "MmapSink is only supported for WRITEDATA");
+            return NULL;
+        }
+        Py_CLEAR(self->h_cb);
+        Py_XSETREF(self->writeheader_fp, Py_NewRef(obj));
+        curl_easy_setopt(self->handle, CURLOPT_HEADERFUNCTION, h_cb);
+        curl_easy_setopt(self->handle, CURLOPT_WRITEHEADER, self);
+        break;
+    default:
+        PyErr_SetString(PyExc_TypeError, "sinks are only supported for WRITEDATA and WRITEHEADER");
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+
+/* Point libcurl's write callback back at what WRITEFUNCTION/WRITEDATA were
+ * last set to, after something like iter_chunks() borrowed it. */
+PYCURL_INTERNAL void
+util_curl_restore_write(CurlObject *self)
+{
+    if (self->w_cb != NULL) {
+        curl_easy_setopt(self->handle, CURLOPT_WRITEFUNCTION, write_callback);
+        curl_easy_setopt(self->handle, CURLOPT_WRITEDATA, self);
+    } else if (self->writedata_fp != NULL) {
+        curl_easy_setopt(self->handle, CURLOPT_WRITEFUNCTION, sink_write_callback);
+        curl_easy_setopt(self->handle, CURLOPT_WRITEDATA, self);
+    } else {
+        curl_easy_setopt(self->handle, CURLOPT_WRITEFUNCTION, NULL);
+        curl_easy_setopt(self->handle, CURLOPT_WRITEDATA, stdout);
+    }
+}
+
+
+/* Serve READDATA given as a buffer or file descriptor from C. The object is
+ * kept in readdata_fp; the callbacks in easysink.c read from the source. */
+static PyObject *
+do_curl_setopt_read_source(CurlObject *self, PyObject *obj)
+{
+    const curl_read_callback r_cb = source_read_callback;
+    const curl_seek_callback seek_cb = source_seek_callback;
+
+    if (util_curl_set_read_source(self, obj) != 0) {
+        return NULL;
+    }
+    Py_CLEAR(self->r_cb);
+    Py_XSETREF(self->readdata_fp, Py_NewRef(obj));
+    curl_easy_setopt(self->handle, CURLOPT_READFUNCTION, r_cb);
+    curl_easy_setopt(self->handle, CURLOPT_READDATA, self);
+    /* a SEEKFUNCTION set from Python takes precedence */
+    if (self->seek_cb == NULL) {
+        curl_easy_setopt(self->handle, CURLOPT_SEEKFUNCTION, seek_cb);
+        curl_easy_setopt(self->handle, CURLOPT_SEEKDATA, self);
+    }
+    Py_RETURN_NONE;
+}
+
+
 PYCURL_INTERNAL PyObject *
 do_curl_setopt_filelike(CurlObject *self, int option, PyObject *obj)
 {
@@ -1331,33 +1482,46 @@ do_curl_setopt_filelike(CurlObject *self, int option, PyObject *obj)
 }
 
 
+/* Whether `option` can be a libcurl option number at all */
+PYCURL_INTERNAL int
+util_curl_option_in_range(int option)
+{
+    if (option <= 0)
+        return 0;
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 71, 0)
+    if (option >= (int)CURLOPTTYPE_BLOB + OPTIONS_SIZE)
+        return 0;
+#else
+    if (option >= (int)CURLOPTTYPE_OFF_T + OPTIONS_SIZE)
+        return 0;
+#endif
+    if (option % 10000 >= OPTIONS_SIZE)
+        return 0;
+    return 1;
+}
+
+
 PYCURL_INTERNAL PyObject *
 do_curl_setopt(CurlObject *self, PyObject *args, PyObject *kwargs)
 {
     int option;
     PyObject *obj;
-    int which;
     int use_memoryview_flag = -1;  /* sentinel: kwarg not supplied */
-    static char *kwlist[] = {"option", "value", "use_memoryview", NULL};
+    PyObject *min_chunk_obj = NULL;
+    Py_ssize_t min_chunk = 0;
+    static char *kwlist[] = {"option", "value", "use_memoryview", "min_chunk", NULL};
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "iO|$p:setopt",
-                                     kwlist, &option, &obj, &use_memoryview_flag))
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "iO|$pO!:setopt",
+                                     kwlist, &option, &obj, &use_memoryview_flag,
+                                     &PyLong_Type, &min_chunk_obj))
         return NULL;
     if (check_curl_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "setopt") != 0)
         return NULL;
 
-    /* early checks of option value */
-    if (option <= 0)
-        goto error;
-#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 71, 0)
-    if (option >= (int)CURLOPTTYPE_BLOB + OPTIONS_SIZE)
-        goto error;
-#else
-    if (option >= (int)CURLOPTTYPE_OFF_T + OPTIONS_SIZE)
-        goto error;
-#endif
-    if (option % 10000 >= OPTIONS_SIZE)
-        goto error;
+    if (!util_curl_option_in_range(option)) {
+        PyErr_SetString(PyExc_TypeError, "invalid arguments to setopt");
+        return NULL;
+    }
 
     if (use_memoryview_flag != -1 &&
         option != CURLOPT_WRITEFUNCTION &&
@@ -1366,6 +1530,33 @@ do_curl_setopt(CurlObject *self, PyObject *args, PyObject *kwargs)
             "use_memoryview is only supported for WRITEFUNCTION and HEADERFUNCTION");
         return NULL;
     }
+    if (min_chunk_obj != NULL) {
+        if (option != CURLOPT_WRITEFUNCTION) {
+            PyErr_SetString(PyExc_TypeError,
+                "min_chunk is only supported for WRITEFUNCTION");
+            return NULL;
+        }
+        min_chunk = PyLong_AsSsize_t(min_chunk_obj);
+        if (min_chunk == -1 && PyErr_Occurred()) {
+            return NULL;
+        }
+        if (min_chunk < 0) {
+            PyErr_SetString(PyExc_ValueError, "min_chunk must not be negative");
+            return NULL;
+        }
+    }
+
+    return util_curl_setopt(self, option, obj, use_memoryview_flag, min_chunk);
+}
+
+
+/* Set one option. The caller has checked the state of `self` and that
+ * `option` is in range. */
+PYCURL_INTERNAL PyObject *
+util_curl_setopt(CurlObject *self, int option, PyObject *obj,
+                 int use_memoryview_flag, Py_ssize_t min_chunk)
+{
+    int which;
 
     /* Handle the case of None as the call of unsetopt() */
     if (obj == Py_None) {
@@ -1379,11 +1570,40 @@ do_curl_setopt(CurlObject *self, PyObject *args, PyObject *kwargs)
     }
 #endif
 
+    /* Handle the case of buffers and file descriptors to upload from. A
+     * buffer with a read() method, such as an mmap, is still read through
+     * it, from its current position. */
+    if (option == CURLOPT_READDATA &&
+        (PyLong_Check(obj) ||
+         (PyObject_CheckBuffer(obj) && !PyObject_HasAttrString(obj, "read")))) {
+        return do_curl_setopt_read_source(self, obj);
+    }
+
     /* Handle the case of string arguments */
     if (PyText_Check(obj)) {
         return do_curl_setopt_string_impl(self, option, obj);
     }
 
+    /* Handle the case of file descriptors for the write options */
+    if (PyLong_Check(obj) &&
+        (option == CURLOPT_WRITEDATA || option == CURLOPT_WRITEHEADER)) {
+        PyObject *sink, *rv;
+
+        /* True would otherwise write to file descriptor 1 */
+        if (PyBool_Check(obj)) {
+            PyErr_SetString(PyExc_TypeError, "booleans are not supported for this option");
+            return NULL;
+        }
+        /* FdSink raises ValueError for negative descriptors */
+        sink = PyObject_CallOneArg((PyObject *) p_CurlFdSink_Type, obj);
+        if (sink == NULL) {
+            return NULL;
+        }
+        rv = do_curl_setopt_sink(self, option, sink);
+        Py_DECREF(sink);
+        return rv;
+    }
+
     /* Handle the case of integer arguments */
     if (PyLong_Check(obj)) {
         return do_curl_setopt_int(self, option, obj);
@@ -1404,7 +1624,7 @@ do_curl_setopt(CurlObject *self, PyObject *args, PyObject *kwargs)
     /* Handle the case of function objects for callbacks */
     if (PyFunction_Check(obj) || PyCFunction_Check(obj) ||
         PyCallable_Check(obj) || PyMethod_Check(obj)) {
-        return do_curl_setopt_callable(self, option, obj, use_memoryview_flag);
+        return do_curl_setopt_callable(self, option, obj, use_memoryview_flag, min_chunk);
     }
     /* handle the SHARE case */
     if (option == CURLOPT_SHARE) {
@@ -1437,16 +1657,105 @@ do_curl_setopt(CurlObject *self, PyObject *args, PyObject *kwargs)
         option == CURLOPT_WRITEDATA ||
         option == CURLOPT_WRITEHEADER)
     {
+        /* BufferSink or its HeaderSink subtype, an FdSink or an MmapSink */
+        if (PyObject_TypeCheck(obj, p_CurlBufferSink_Type) ||
+            Py_IS_TYPE(obj, p_CurlFdSink_Type) ||
+            Py_IS_TYPE(obj, p_CurlMmapSink_Type)) {
+            return do_curl_setopt_sink(self, option, obj);
+        }
         return do_curl_setopt_filelike(self, option, obj);
     }
 
     /* Failed to match any of the function signatures -- return error */
-error:
     PyErr_SetString(PyExc_TypeError, "invalid arguments to setopt");
     return NULL;
 }
 
 
+PYCURL_INTERNAL PyObject *
+do_curl_setopt_many(CurlObject *self, PyObject *args)
+{
+    PyObject *mapping, *items;
+    PyObject *rv = NULL;
+    CurlObject *scratch = NULL;
+    Py_ssize_t i, n;
+    int *options;
+
+    if (!PyArg_ParseTuple(args, "O:setopt_many", &mapping)) {
+        return NULL;
+    }
+    if (!PyMapping_Check(mapping) || PyListOrTuple_Check(mapping)) {
+        PyErr_SetString(PyExc_TypeError, "setopt_many argument must be a mapping of options to values");
+        return NULL;
+    }
+    if (check_curl_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "setopt") != 0) {
+        return NULL;
+    }
+    items = PyMapping_Items(mapping);
+    if (items == NULL) {
+        return NULL;
+    }
+    n = PyList_GET_SIZE(items);
+    options = PyMem_New(int, n > 0 ? n : 1);
+    if (options == NULL) {
+        Py_DECREF(items);
+        return PyErr_NoMemory();
+    }
+
+    /* Check every option before setting any of them */
+    for (i = 0; i < n; i++) {
+        PyObject *key = PyTuple_GET_ITEM(PyList_GET_ITEM(items, i), 0);
+
+        if (!PyLong_Check(key)) {
+            PyErr_Format(PyExc_TypeError, "setopt_many options must be integers, not %.200s",
+                         Py_TYPE(key)->tp_name);
+            goto done;
+        }
+        if (pycurl_long_as_int(key, &options[i]) != 0) {
+            goto done;
+        }
+        if (!util_curl_option_in_range(options[i])) {
+            PyErr_Format(PyExc_TypeError, "invalid option to setopt_many: %d", options[i]);
+            goto done;
+        }
+    }
+
+    /* Check every value on a scratch handle, the way OptionSet does on its
+     * own, so that a bad value leaves this handle untouched */
+    scratch = (CurlObject *) PyObject_CallNoArgs((PyObject *) p_Curl_Type);
+    if (scratch == NULL) {
+        goto done;
+    }
+    for (i = 0; i < n; i++) {
+        PyObject *value = PyTuple_GET_ITEM(PyList_GET_ITEM(items, i), 1);
+        PyObject *v = util_curl_setopt(scratch, options[i], value, -1, 0);
+
+        if (v == NULL) {
+            goto done;
+        }
+        Py_DECREF(v);
+    }
+    Py_CLEAR(scratch);
+
+    for (i = 0; i < n; i++) {
+        PyObject *value = PyTuple_GET_ITEM(PyList_GET_ITEM(items, i), 1);
+        PyObject *v = util_curl_setopt(self, options[i], value, -1, 0);
+
+        if (v == NULL) {
+            goto done;
+        }
+        Py_DECREF(v);
+    }
+    rv = Py_NewRef(Py_None);
+
+done:
+    Py_XDECREF(scratch);
+    PyMem_Free(options);
+    Py_DECREF(items);
+    return rv;
+}
+
+
 PYCURL_INTERNAL PyObject *
 do_curl_setopt_string(CurlObject *self, PyObject *args)
 {
@@ -3,6 +3,17 @@
 
 /* --------------- perform --------------- */
 
+/* Reset per-transfer state before `self` starts a transfer, on its own or in
+ * a multi. Drops what a transfer abandoned on a multi left behind. */
+PYCURL_INTERNAL void
+util_curl_begin_transfer(CurlObject *self)
+{
+    self->w_cb_pending_len = 0;
+    (void) sink_finish_transfer(self, CURLE_OK);
+    util_curl_rewind_read_source(self);
+}
+
+
 PYCURL_INTERNAL PyObject *
 do_curl_perform(CurlObject *self, PyObject *Py_UNUSED(ignored))
 {
@@ -12,10 +23,18 @@ do_curl_perform(CurlObject *self, PyObject *Py_UNUSED(ignored))
         return NULL;
     }
 
+    util_curl_begin_transfer(self);
     PYCURL_BEGIN_ALLOW_THREADS
     res = curl_easy_perform(self->handle);
     PYCURL_END_ALLOW_THREADS
 
+    /* data held back by WRITEFUNCTION min_chunk is dropped on failure */
+    if (res == CURLE_OK) {
+        res = write_callback_flush(self);
+    }
+    self->w_cb_pending_len = 0;
+    res = sink_finish_transfer(self, res);
+
     if (check_pending_python_exception_or_signal() != 0) {
         return NULL;
     }
@@ -27,62 +46,147 @@ do_curl_perform(CurlObject *self, PyObject *Py_UNUSED(ignored))
 }
 
 
-PYCURL_INTERNAL PyObject *
-do_curl_perform_rb(CurlObject *self, PyObject *Py_UNUSED(ignored))
+/* Initial size of the bytes object perform_rb() collects into when the
+ * server does not announce the body's length */
+#define PYCURL_PERFORM_BODY_MIN_SIZE 16384
+
+/* The body collected by perform_rb() and perform_rs(): a bytes object filled
+ * in place and shrunk to `len` once the transfer is done. */
+typedef struct {
+    CurlObject *curl;
+    PyObject *bytes;
+    size_t len;
+} PerformBody;
+
+
+/* Grow the bytes object to hold at least `needed` bytes: to the announced
+ * body length when it covers `needed`, at least doubling either way. Requires
+ * the GIL. Returns 0, or -1 with an exception set. */
+static int
+perform_body_grow(PerformBody *body, size_t needed)
 {
-    PyObject *v, *io;
-    
-    /* NOTE: this tuple is never freed. */
-    static PyObject *empty_tuple = NULL;
-    
-    if (empty_tuple == NULL) {
-        empty_tuple = PyTuple_New(0);
-        if (empty_tuple == NULL) {
-            return NULL;
+    size_t cap = body->bytes != NULL ? (size_t) PyBytes_GET_SIZE(body->bytes) : 0;
+    size_t new_cap = cap ? cap : PYCURL_PERFORM_BODY_MIN_SIZE;
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 55, 0)
+    curl_off_t content_length = -1;
+#endif
+
+    if (needed > (size_t) PY_SSIZE_T_MAX) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    if (cap > 0) {
+        new_cap = cap <= (size_t) PY_SSIZE_T_MAX / 2 ? cap * 2 : (size_t) PY_SSIZE_T_MAX;
+    }
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 55, 0)
+    if (curl_easy_getinfo(body->curl->handle, CURLINFO_CONTENT_LENGTH_DOWNLOAD_T, &content_length) == CURLE_OK &&
+        content_length > 0 &&
+        (curl_off_t) (PY_SSIZE_T_MAX - body->len) >= content_length &&
+        body->len + (size_t) content_length >= needed &&
+        body->len + (size_t) content_length > new_cap) {
+        new_cap = body->len + (size_t) content_length;
+    }
+#endif
+    while (new_cap < needed) {
+        new_cap = new_cap <= (size_t) PY_SSIZE_T_MAX / 2 ? new_cap * 2 : needed;
+    }
+
+    if (body->bytes == NULL) {
+        body->bytes = PyBytes_FromStringAndSize(NULL, (Py_ssize_t) new_cap);
+        return body->bytes != NULL ? 0 : -1;
+    }
+    return _PyBytes_Resize(&body->bytes, (Py_ssize_t) new_cap);
+}
+
+
+/* WRITEFUNCTION of perform_rb() and perform_rs(). Copies the data into the
+ * bytes object without the GIL; takes it only to grow the object. */
+static size_t
+perform_body_write_callback(char *ptr, size_t size, size_t nmemb, void *stream)
+{
+    PerformBody *body = (PerformBody *) stream;
+    size_t total_size;
+
+    if (size == 0 || nmemb == 0) {
+        return 0;
+    }
+    total_size = size * nmemb;
+    if (total_size / size != nmemb || total_size > (size_t) PY_SSIZE_T_MAX - body->len) {
+        return 0;
+    }
+
+    if (body->bytes == NULL ||
+        body->len + total_size > (size_t) PyBytes_GET_SIZE(body->bytes)) {
+        CurlObject *self = body->curl;
+        PYCURL_DECLARE_THREAD_STATE;
+        int rv;
+
+        PYCURL_GET_THREAD_STATE;
+        if (!PYCURL_PYTHON_ENTER()) {
+            return 0;
+        }
+        /* a MemoryError stays set and is raised by perform */
+        rv = perform_body_grow(body, body->len + total_size);
+        PYCURL_PYTHON_LEAVE();
+        if (rv != 0) {
+            return 0;
         }
     }
-    
-    io = PyObject_Call(bytesio, empty_tuple, NULL);
-    if (io == NULL) {
+
+    memcpy(PyBytes_AS_STRING(body->bytes) + body->len, ptr, total_size);
+    body->len += total_size;
+    return total_size;
+}
+
+
+/* Perform with the body collected straight into a bytes object, then return
+ * it as is or decoded as UTF-8. The handle's own write target is restored
+ * afterwards. */
+static PyObject *
+util_curl_perform_collect(CurlObject *self, int decode)
+{
+    PerformBody body = {self, NULL, 0};
+    PyObject *v;
+
+    if (check_curl_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "perform") != 0) {
         return NULL;
     }
-    
-    v = do_curl_setopt_filelike(self, CURLOPT_WRITEDATA, io);
+
+    curl_easy_setopt(self->handle, CURLOPT_WRITEFUNCTION, perform_body_write_callback);
+    curl_easy_setopt(self->handle, CURLOPT_WRITEDATA, &body);
+    v = do_curl_perform(self, NULL);
+    util_curl_restore_write(self);
     if (v == NULL) {
-        Py_DECREF(io);
+        Py_XDECREF(body.bytes);
         return NULL;
     }
-#if PY_VERSION_HEX < 0x030C0000
     Py_DECREF(v);
-#endif
 
-    v = do_curl_perform(self, NULL);
-    if (v == NULL) {
-        Py_DECREF(io);
+    if (body.bytes == NULL) {
+        return decode ? PyUnicode_FromStringAndSize(NULL, 0) : PyBytes_FromStringAndSize(NULL, 0);
+    }
+    if (decode) {
+        v = PyUnicode_DecodeUTF8(PyBytes_AS_STRING(body.bytes), (Py_ssize_t) body.len, NULL);
+        Py_DECREF(body.bytes);
+        return v;
+    }
+    if (_PyBytes_Resize(&body.bytes, (Py_ssize_t) body.len) != 0) {
         return NULL;
     }
-#if PY_VERSION_HEX < 0x030C0000
-    Py_DECREF(v);
-#endif
+    return body.bytes;
+}
 
-    v = PyObject_CallMethod(io, "getvalue", NULL);
-    Py_DECREF(io);
-    return v;
+
+PYCURL_INTERNAL PyObject *
+do_curl_perform_rb(CurlObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return util_curl_perform_collect(self, 0);
 }
 
 PYCURL_INTERNAL PyObject *
 do_curl_perform_rs(CurlObject *self, PyObject *Py_UNUSED(ignored))
 {
-    PyObject *v, *decoded;
-
-    v = do_curl_perform_rb(self, NULL);
-    if (v == NULL) {
-        return NULL;
-    }
-
-    decoded = PyUnicode_FromEncodedObject(v, NULL, NULL);
-    Py_DECREF(v);
-    return decoded;
+    return util_curl_perform_collect(self, 1);
 }
 
 
@@ -0,0 +1,1348 @@
+#include "pycurl.h"
+#include "docstrings.h"
+#include <errno.h>
+#if defined(WIN32)
+#include <io.h>
+#else
+#include <unistd.h>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#endif
+
+/* Native sinks receive transfer data in C. Their write callbacks never take
+ * the GIL, so a transfer into a sink costs no Python calls per chunk.
+ *
+ * The callbacks run while the owning Curl object is marked as running, which
+ * rules out setopt() swapping the sink underneath them. The sink's own lock
+ * only serialises its buffer against Python callers on other threads. */
+
+/* Initial capacity of a BufferSink's buffer, doubled as it fills up */
+#define PYCURL_BUFFER_SINK_MIN_SIZE 16384
+
+
+/*************************************************************************
+// BufferSink
+**************************************************************************/
+
+/* Resize the buffer to exactly `cap` bytes. Caller holds the sink lock and
+ * may not hold the GIL, hence the raw allocator. */
+static int
+buffer_sink_resize(CurlBufferSinkObject *self, size_t cap)
+{
+    char *buf = PyMem_RawRealloc(self->buf, cap);
+
+    if (buf == NULL) {
+        return -1;
+    }
+    self->buf = buf;
+    self->cap = cap;
+    return 0;
+}
+
+
+/* Make room for at least `needed` bytes, growing geometrically. Returns 0 or
+ * -1 without setting an exception. */
+static int
+buffer_sink_reserve(CurlBufferSinkObject *self, size_t needed)
+{
+    size_t cap;
+
+    if (needed <= self->cap) {
+        return 0;
+    }
+    if (needed > (size_t) PY_SSIZE_T_MAX) {
+        return -1;
+    }
+    cap = self->cap ? self->cap : PYCURL_BUFFER_SINK_MIN_SIZE;
+    while (cap < needed) {
+        if (cap > (size_t) PY_SSIZE_T_MAX / 2) {
+            cap = needed;
+            break;
+        }
+        cap *= 2;
+    }
+    return buffer_sink_resize(self, cap);
+}
+
+
+/* Size the buffer for the whole body when the server announced its length,
+ * so that a transfer fills one allocation instead of doubling its way up.
+ * The buffer still at least doubles, as the body may outgrow its length
+ * (decoded content, several transfers into one sink), and growing by the
+ * length on every overflow would copy the buffer over and over. Falls back
+ * to geometric growth when the length is unknown, too small or cannot be
+ * allocated. */
+static int
+buffer_sink_reserve_for_transfer(CurlBufferSinkObject *self, size_t needed, CURL *handle)
+{
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 55, 0)
+    curl_off_t content_length = -1;
+
+    if (handle != NULL &&
+        curl_easy_getinfo(handle, CURLINFO_CONTENT_LENGTH_DOWNLOAD_T, &content_length) == CURLE_OK &&
+        content_length > 0 &&
+        (curl_off_t) (PY_SSIZE_T_MAX - self->len) >= content_length &&
+        self->len + (size_t) content_length >= needed) {
+        size_t cap = self->len + (size_t) content_length;
+        size_t doubled = PYCURL_BUFFER_SINK_MIN_SIZE;
+
+        if (self->cap > 0) {
+            doubled = self->cap <= (size_t) PY_SSIZE_T_MAX / 2 ? self->cap * 2 : self->cap;
+        }
+        if (cap < doubled) {
+            cap = doubled;
+        }
+        if (buffer_sink_resize(self, cap) == 0) {
+            return 0;
+        }
+    }
+#endif
+    return buffer_sink_reserve(self, needed);
+}
+
+
+/* Append data to the sink. Safe to call without the GIL. `handle` is the
+ * transfer the data belongs to, or NULL; it is only used to size the buffer. */
+PYCURL_INTERNAL int
+buffer_sink_append(CurlBufferSinkObject *self, const char *data, size_t len, CURL *handle)
+{
+    int rv = 0;
+
+    PYCURL_MUTEX_LOCK(&self->lock);
+    if (len > (size_t) PY_SSIZE_T_MAX - self->len) {
+        rv = -1;
+    } else if (self->len + len > self->cap &&
+        buffer_sink_reserve_for_transfer(self, self->len + len, handle) != 0) {
+        rv = -1;
+    } else {
+        memcpy(self->buf + self->len, data, len);
+        self->len += len;
+    }
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    return rv;
+}
+
+
+PYCURL_INTERNAL PyObject *
+do_buffer_sink_new(PyTypeObject *subtype, PyObject *args, PyObject *kwds)
+{
+    CurlBufferSinkObject *self;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "", empty_keywords)) {
+        return NULL;
+    }
+
+    self = (CurlBufferSinkObject *) subtype->tp_alloc(subtype, 0);
+    if (self == NULL) {
+        return NULL;
+    }
+    /* tp_alloc zeroes the object, which is a valid unlocked PyMutex */
+#if PY_VERSION_HEX < 0x030D0000
+    self->lock = PyThread_allocate_lock();
+    if (self->lock == NULL) {
+        Py_DECREF(self);
+        return PyErr_NoMemory();
+    }
+#endif
+    return (PyObject *) self;
+}
+
+
+static void
+do_buffer_sink_dealloc(CurlBufferSinkObject *self)
+{
+    if (self->weakreflist != NULL) {
+        PyObject_ClearWeakRefs((PyObject *) self);
+    }
+    PyMem_RawFree(self->buf);
+    self->buf = NULL;
+#if PY_VERSION_HEX < 0x030D0000
+    if (self->lock != NULL) {
+        PyThread_free_lock(self->lock);
+        self->lock = NULL;
+    }
+#endif
+    Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+
+static PyObject *
+do_buffer_sink_getvalue(CurlBufferSinkObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *v;
+
+    PYCURL_MUTEX_LOCK(&self->lock);
+    v = PyBytes_FromStringAndSize(self->buf, (Py_ssize_t) self->len);
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    return v;
+}
+
+
+static PyObject *
+do_buffer_sink_clear(CurlBufferSinkObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PYCURL_MUTEX_LOCK(&self->lock);
+    PyMem_RawFree(self->buf);
+    self->buf = NULL;
+    self->len = 0;
+    self->cap = 0;
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    Py_RETURN_NONE;
+}
+
+
+static Py_ssize_t
+do_buffer_sink_len(CurlBufferSinkObject *self)
+{
+    Py_ssize_t len;
+
+    PYCURL_MUTEX_LOCK(&self->lock);
+    len = (Py_ssize_t) self->len;
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    return len;
+}
+
+
+/*************************************************************************
+// HeaderSink
+**************************************************************************/
+
+/* Decode a header field, dropping surrounding whitespace. RFC 7230 leaves
+ * octets outside ASCII opaque, so they are passed through as latin-1. */
+static PyObject *
+header_sink_decode_field(const char *start, const char *end)
+{
+    while (start < end && (*start == ' ' || *start == '\t')) {
+        ++start;
+    }
+    while (end > start && (end[-1] == ' ' || end[-1] == '\t')) {
+        --end;
+    }
+    return PyUnicode_DecodeLatin1(start, end - start, NULL);
+}
+
+
+/* Append a response with the given status line (or None) to responses and
+ * return its header list as a borrowed reference. */
+static PyObject *
+header_sink_add_response(PyObject *responses, PyObject *status_line)
+{
+    PyObject *headers, *response;
+
+    headers = PyList_New(0);
+    if (headers == NULL) {
+        return NULL;
+    }
+    response = PyTuple_Pack(2, status_line, headers);
+    Py_DECREF(headers);
+    if (response == NULL) {
+        return NULL;
+    }
+    if (PyList_Append(responses, response) != 0) {
+        Py_DECREF(response);
+        return NULL;
+    }
+    Py_DECREF(response);
+    return headers;
+}
+
+
+/* Fold a continuation line into the value of the last header. */
+static int
+header_sink_fold(PyObject *headers, const char *start, const char *end)
+{
+    Py_ssize_t last = PyList_GET_SIZE(headers) - 1;
+    PyObject *pair = PyList_GET_ITEM(headers, last);
+    PyObject *more, *value, *folded;
+
+    more = header_sink_decode_field(start, end);
+    if (more == NULL) {
+        return -1;
+    }
+    value = PyUnicode_FromFormat("%U %U", PyTuple_GET_ITEM(pair, 1), more);
+    Py_DECREF(more);
+    if (value == NULL) {
+        return -1;
+    }
+    folded = PyTuple_Pack(2, PyTuple_GET_ITEM(pair, 0), value);
+    Py_DECREF(value);
+    if (folded == NULL) {
+        return -1;
+    }
+    /* steals the reference to folded */
+    return PyList_SetItem(headers, last, folded);
+}
+
+
+/* Parse collected header data into a list of (status_line, headers) tuples,
+ * one per response, where headers is a list of (name, value) tuples. Every
+ * line starting with "HTTP/" opens a new response, so redirects, 1xx
+ * responses and proxy CONNECT replies each get their own entry. Lines after
+ * the blank line ending a block (trailers) stay with that response. Caller
+ * holds the sink lock. */
+static PyObject *
+header_sink_parse(CurlBufferSinkObject *self)
+{
+    PyObject *responses;
+    PyObject *headers = NULL;
+    const char *p = self->buf;
+    const char *end = self->buf + self->len;
+
+    responses = PyList_New(0);
+    if (responses == NULL) {
+        return NULL;
+    }
+
+    while (p < end) {
+        const char *eol = memchr(p, '\n', end - p);
+        const char *next = eol != NULL ? eol + 1 : end;
+        const char *line_end = eol != NULL ? eol : end;
+        const char *colon;
+
+        if (line_end > p && line_end[-1] == '\r') {
+            --line_end;
+        }
+
+        if (line_end - p >= 5 && memcmp(p, "HTTP/", 5) == 0) {
+            PyObject *status_line = header_sink_decode_field(p, line_end);
+            if (status_line == NULL) {
+                goto error;
+            }
+            headers = header_sink_add_response(responses, status_line);
+            Py_DECREF(status_line);
+            if (headers == NULL) {
+                goto error;
+            }
+        } else if (p == line_end) {
+            /* blank line ending a header block */
+        } else if ((*p == ' ' || *p == '\t') &&
+                   headers != NULL && PyList_GET_SIZE(headers) > 0) {
+            if (header_sink_fold(headers, p, line_end) != 0) {
+                goto error;
+            }
+        } else if ((colon = memchr(p, ':', line_end - p)) != NULL) {
+            PyObject *name, *value, *pair;
+
+            if (headers == NULL) {
+                /* headers of a protocol without a status line */
+                headers = header_sink_add_response(responses, Py_None);
+                if (headers == NULL) {
+                    goto error;
+                }
+            }
+            name = header_sink_decode_field(p, colon);
+            if (name == NULL) {
+                goto error;
+            }
+            value = header_sink_decode_field(colon + 1, line_end);
+            if (value == NULL) {
+                Py_DECREF(name);
+                goto error;
+            }
+            pair = PyTuple_Pack(2, name, value);
+            Py_DECREF(name);
+            Py_DECREF(value);
+            if (pair == NULL) {
+                goto error;
+            }
+            if (PyList_Append(headers, pair) != 0) {
+                Py_DECREF(pair);
+                goto error;
+            }
+            Py_DECREF(pair);
+        }
+        p = next;
+    }
+    return responses;
+
+error:
+    Py_DECREF(responses);
+    return NULL;
+}
+
+
+/* Return a new reference to the final response's (status_line, headers)
+ * tuple, or a (None, []) tuple when nothing was collected. */
+static PyObject *
+header_sink_final_response(CurlBufferSinkObject *self)
+{
+    PyObject *responses, *response;
+    Py_ssize_t n;
+
+    PYCURL_MUTEX_LOCK(&self->lock);
+    responses = header_sink_parse(self);
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    if (responses == NULL) {
+        return NULL;
+    }
+    n = PyList_GET_SIZE(responses);
+    if (n > 0) {
+        response = Py_NewRef(PyList_GET_ITEM(responses, n - 1));
+    } else {
+        PyObject *headers = PyList_New(0);
+        if (headers == NULL) {
+            Py_DECREF(responses);
+            return NULL;
+        }
+        response = PyTuple_Pack(2, Py_None, headers);
+        Py_DECREF(headers);
+    }
+    Py_DECREF(responses);
+    return response;
+}
+
+
+/* ASCII case-insensitive comparison of header names */
+static int
+header_sink_name_matches(PyObject *name, PyObject *query)
+{
+    Py_ssize_t i, n = PyUnicode_GET_LENGTH(name);
+
+    if (n != PyUnicode_GET_LENGTH(query)) {
+        return 0;
+    }
+    for (i = 0; i < n; ++i) {
+        Py_UCS4 a = PyUnicode_READ_CHAR(name, i);
+        Py_UCS4 b = PyUnicode_READ_CHAR(query, i);
+
+        if (a >= 'A' && a <= 'Z') {
+            a += 'a' - 'A';
+        }
+        if (b >= 'A' && b <= 'Z') {
+            b += 'a' - 'A';
+        }
+        if (a != b) {
+            return 0;
+        }
+    }
+    return 1;
+}
+
+
+static PyObject *
+do_header_sink_responses(CurlBufferSinkObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *responses;
+
+    PYCURL_MUTEX_LOCK(&self->lock);
+    responses = header_sink_parse(self);
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    return responses;
+}
+
+
+static PyObject *
+do_header_sink_status_line(CurlBufferSinkObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *response, *v;
+
+    response = header_sink_final_response(self);
+    if (response == NULL) {
+        return NULL;
+    }
+    v = Py_NewRef(PyTuple_GET_ITEM(response, 0));
+    Py_DECREF(response);
+    return v;
+}
+
+
+static PyObject *
+do_header_sink_headers(CurlBufferSinkObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *response, *v;
+
+    response = header_sink_final_response(self);
+    if (response == NULL) {
+        return NULL;
+    }
+    v = Py_NewRef(PyTuple_GET_ITEM(response, 1));
+    Py_DECREF(response);
+    return v;
+}
+
+
+static PyObject *
+do_header_sink_get_all(CurlBufferSinkObject *self, PyObject *args)
+{
+    PyObject *query, *response, *headers, *values;
+    Py_ssize_t i;
+
+    if (!PyArg_ParseTuple(args, "U:get_all", &query)) {
+        return NULL;
+    }
+    response = header_sink_final_response(self);
+    if (response == NULL) {
+        return NULL;
+    }
+    headers = PyTuple_GET_ITEM(response, 1);
+    values = PyList_New(0);
+    if (values == NULL) {
+        Py_DECREF(response);
+        return NULL;
+    }
+    for (i = 0; i < PyList_GET_SIZE(headers); ++i) {
+        PyObject *pair = PyList_GET_ITEM(headers, i);
+
+        if (header_sink_name_matches(PyTuple_GET_ITEM(pair, 0), query) &&
+            PyList_Append(values, PyTuple_GET_ITEM(pair, 1)) != 0) {
+            Py_DECREF(values);
+            Py_DECREF(response);
+            return NULL;
+        }
+    }
+    Py_DECREF(response);
+    return values;
+}
+
+
+static PyObject *
+do_header_sink_get(CurlBufferSinkObject *self, PyObject *args)
+{
+    PyObject *query, *default_value = Py_None;
+    PyObject *response, *headers, *v = NULL;
+    Py_ssize_t i;
+
+    if (!PyArg_ParseTuple(args, "U|O:get", &query, &default_value)) {
+        return NULL;
+    }
+    response = header_sink_final_response(self);
+    if (response == NULL) {
+        return NULL;
+    }
+    headers = PyTuple_GET_ITEM(response, 1);
+    for (i = 0; i < PyList_GET_SIZE(headers); ++i) {
+        PyObject *pair = PyList_GET_ITEM(headers, i);
+
+        if (header_sink_name_matches(PyTuple_GET_ITEM(pair, 0), query)) {
+            v = Py_NewRef(PyTuple_GET_ITEM(pair, 1));
+            break;
+        }
+    }
+    Py_DECREF(response);
+    if (v == NULL) {
+        v = Py_NewRef(default_value);
+    }
+    return v;
+}
+
+
+/*************************************************************************
+// FdSink
+**************************************************************************/
+
+/* Write all of data to fd, retrying short writes. Safe to call without the
+ * GIL. Returns 0 or -1 with errno set. */
+static int
+fd_sink_write_all(int fd, const char *data, size_t len)
+{
+    while (len > 0) {
+#if defined(WIN32)
+        int n = _write(fd, data, (unsigned int) (len > INT_MAX ? INT_MAX : len));
+#else
+        ssize_t n = write(fd, data, len);
+#endif
+        if (n < 0) {
+            if (errno == EINTR) {
+                continue;
+            }
+            return -1;
+        }
+        data += n;
+        len -= (size_t) n;
+    }
+    return 0;
+}
+
+
+PYCURL_INTERNAL PyObject *
+do_fd_sink_new(PyTypeObject *subtype, PyObject *args, PyObject *kwds)
+{
+    CurlFdSinkObject *self;
+    PyObject *file;
+    int fd;
+    static char *kwlist[] = {"file", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O:FdSink", kwlist, &file)) {
+        return NULL;
+    }
+    /* accepts an int or any object with a fileno() method */
+    fd = PyObject_AsFileDescriptor(file);
+    if (fd < 0) {
+        return NULL;
+    }
+    if (!PyLong_Check(file)) {
+        /* anything the file object buffered has to land before our writes */
+        PyObject *v = PyObject_CallMethod(file, "flush", NULL);
+        if (v == NULL) {
+            if (!PyErr_ExceptionMatches(PyExc_AttributeError)) {
+                return NULL;
+            }
+            PyErr_Clear();
+        }
+        Py_XDECREF(v);
+    }
+
+    self = (CurlFdSinkObject *) subtype->tp_alloc(subtype, 0);
+    if (self == NULL) {
+        return NULL;
+    }
+    self->fd = fd;
+    /* keep the file object, and with it the descriptor, alive */
+    if (!PyLong_Check(file)) {
+        self->file = Py_NewRef(file);
+    }
+    return (PyObject *) self;
+}
+
+
+static int
+do_fd_sink_traverse(CurlFdSinkObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->file);
+    return 0;
+}
+
+
+static int
+do_fd_sink_clear(CurlFdSinkObject *self)
+{
+    Py_CLEAR(self->file);
+    return 0;
+}
+
+
+static void
+do_fd_sink_dealloc(CurlFdSinkObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    if (self->weakreflist != NULL) {
+        PyObject_ClearWeakRefs((PyObject *) self);
+    }
+    do_fd_sink_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+
+static PyObject *
+do_fd_sink_fileno(CurlFdSinkObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return PyLong_FromLong(self->fd);
+}
+
+
+/*************************************************************************
+// MmapSink
+**************************************************************************/
+
+#if !defined(WIN32)
+/* Map the announced body into the file at the current offset, preallocating
+ * the blocks first so that running out of space fails the transfer up front
+ * rather than with SIGBUS on a later memcpy. Returns 0 when mapped, 1 to fall
+ * back to write(2), or -1 with errno set to fail the transfer. Caller holds
+ * the sink lock. */
+static int
+mmap_sink_map(CurlMmapSinkObject *self, size_t length)
+{
+    struct stat st;
+    long page_size = sysconf(_SC_PAGESIZE);
+    off_t base;
+    int err;
+
+    if (page_size <= 0 || fstat(self->fd, &st) != 0 || !S_ISREG(st.st_mode)) {
+        return 1;
+    }
+    if ((curl_off_t) length > (curl_off_t) (PY_SSIZE_T_MAX - page_size) ||
+        self->start > CURL_OFF_T_C(0x7FFFFFFFFFFFFFFF) - (curl_off_t) length) {
+        return 1;
+    }
+#if defined(__linux__)
+    err = posix_fallocate(self->fd, (off_t) self->start, (off_t) length);
+    if (err == ENOSPC || err == EFBIG) {
+        errno = err;
+        return -1;
+    }
+    if (err != 0) {
+        return 1;
+    }
+#else
+    if (st.st_size < (off_t) (self->start + length) &&
+        ftruncate(self->fd, (off_t) (self->start + length)) != 0) {
+        return 1;
+    }
+#endif
+    base = (off_t) (self->start - self->start % page_size);
+    self->map_delta = (size_t) (self->start - base);
+    self->map_len = self->map_delta + length;
+    self->map = mmap(NULL, self->map_len, PROT_WRITE, MAP_SHARED, self->fd, base);
+    if (self->map == MAP_FAILED) {
+        /* e.g. a file opened write-only; undo the preallocation */
+        self->map = NULL;
+        err = errno;
+        if (st.st_size < (off_t) (self->start + length)) {
+            (void) ftruncate(self->fd, st.st_size);
+        }
+        errno = err;
+        return 1;
+    }
+    self->length = length;
+    return 0;
+}
+
+
+/* Drop the mapping and leave the file offset after the data written. The
+ * unused tail of the preallocation is truncated away when `truncate` is set.
+ * Caller holds the sink lock. */
+static int
+mmap_sink_unmap(CurlMmapSinkObject *self, int truncate)
+{
+    int rv = 0;
+
+    if (self->map == NULL) {
+        return 0;
+    }
+    if (munmap(self->map, self->map_len) != 0) {
+        rv = -1;
+    }
+    self->map = NULL;
+    if (truncate && self->pos < self->length &&
+        ftruncate(self->fd, (off_t) (self->start + self->pos)) != 0) {
+        rv = -1;
+    }
+    if (lseek(self->fd, (off_t) (self->start + self->pos), SEEK_SET) < 0) {
+        rv = -1;
+    }
+    return rv;
+}
+#endif
+
+
+/* Start writing a transfer's body. Maps it into the file when its length is
+ * known and the file allows it; otherwise the sink writes like an FdSink.
+ * Caller holds the sink lock. */
+static int
+mmap_sink_begin(CurlMmapSinkObject *self, CURL *handle)
+{
+    self->started = 1;
+    self->pos = 0;
+    self->length = 0;
+#if !defined(WIN32) && LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 55, 0)
+    {
+        curl_off_t content_length = -1;
+        off_t start = lseek(self->fd, 0, SEEK_CUR);
+
+        if (start >= 0 &&
+            curl_easy_getinfo(handle, CURLINFO_CONTENT_LENGTH_DOWNLOAD_T, &content_length) == CURLE_OK &&
+            content_length > 0 && (curl_off_t) (size_t) content_length == content_length) {
+            self->start = (curl_off_t) start;
+            if (mmap_sink_map(self, (size_t) content_length) < 0) {
+                return -1;
+            }
+        }
+    }
+#endif
+    return 0;
+}
+
+
+/* Write body data to the sink. Safe to call without the GIL. Data beyond the
+ * announced length, as with content decoding, is written after the mapped
+ * part. Returns 0 or -1 with errno set. */
+static int
+mmap_sink_write(CurlMmapSinkObject *self, const char *data, size_t len, CURL *handle)
+{
+    int rv = 0;
+
+    PYCURL_MUTEX_LOCK(&self->lock);
+    if (!self->started) {
+        rv = mmap_sink_begin(self, handle);
+    }
+#if !defined(WIN32)
+    if (rv == 0 && self->map != NULL) {
+        size_t n = self->length - self->pos;
+
+        if (n > len) {
+            n = len;
+        }
+        memcpy(self->map + self->map_delta + self->pos, data, n);
+        self->pos += n;
+        data += n;
+        len -= n;
+        if (len > 0) {
+            rv = mmap_sink_unmap(self, 0);
+        }
+    }
+#endif
+    if (rv == 0 && len > 0) {
+        rv = fd_sink_write_all(self->fd, data, len);
+        if (rv == 0) {
+            self->pos += len;
+        }
+    }
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    return rv;
+}
+
+
+/* End the transfer currently writing to the sink, if any: unmap and truncate
+ * the file to what was received. Safe to call without the GIL. Returns 0 or
+ * -1 with errno set. */
+static int
+mmap_sink_finish(CurlMmapSinkObject *self)
+{
+    int rv = 0;
+
+    PYCURL_MUTEX_LOCK(&self->lock);
+#if !defined(WIN32)
+    rv = mmap_sink_unmap(self, 1);
+#endif
+    self->started = 0;
+    PYCURL_MUTEX_UNLOCK(&self->lock);
+    return rv;
+}
+
+
+/* Called once a transfer of `self` has ended with `res`, and before a new one
+ * starts, to finish the body written to an MmapSink. Requires the GIL. Returns
+ * `res`, or CURLE_WRITE_ERROR when the transfer succeeded but the file could
+ * not be completed. */
+PYCURL_INTERNAL CURLcode
+sink_finish_transfer(CurlObject *self, CURLcode res)
+{
+    PyObject *sink = self->writedata_fp;
+
+    if (sink == NULL || !Py_IS_TYPE(sink, p_CurlMmapSink_Type)) {
+        return res;
+    }
+    if (mmap_sink_finish((CurlMmapSinkObject *) sink) != 0 && res == CURLE_OK) {
+        snprintf(self->error, sizeof(self->error), "%s: %s",
+            curl_easy_strerror(CURLE_WRITE_ERROR), strerror(errno));
+        return CURLE_WRITE_ERROR;
+    }
+    return res;
+}
+
+
+PYCURL_INTERNAL PyObject *
+do_mmap_sink_new(PyTypeObject *subtype, PyObject *args, PyObject *kwds)
+{
+    CurlMmapSinkObject *self;
+    PyObject *file;
+    int fd;
+    static char *kwlist[] = {"file", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O:MmapSink", kwlist, &file)) {
+        return NULL;
+    }
+    fd = PyObject_AsFileDescriptor(file);
+    if (fd < 0) {
+        return NULL;
+    }
+    if (!PyLong_Check(file)) {
+        PyObject *v = PyObject_CallMethod(file, "flush", NULL);
+        if (v == NULL) {
+            if (!PyErr_ExceptionMatches(PyExc_AttributeError)) {
+                return NULL;
+            }
+            PyErr_Clear();
+        }
+        Py_XDECREF(v);
+    }
+
+    self = (CurlMmapSinkObject *) subtype->tp_alloc(subtype, 0);
+    if (self == NULL) {
+        return NULL;
+    }
+    self->fd = fd;
+#if PY_VERSION_HEX < 0x030D0000
+    self->lock = PyThread_allocate_lock();
+    if (self->lock == NULL) {
+        Py_DECREF(self);
+        return PyErr_NoMemory();
+    }
+#endif
+    if (!PyLong_Check(file)) {
+        self->file = Py_NewRef(file);
+    }
+    return (PyObject *) self;
+}
+
+
+static int
+do_mmap_sink_traverse(CurlMmapSinkObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->file);
+    return 0;
+}
+
+
+static int
+do_mmap_sink_clear(CurlMmapSinkObject *self)
+{
+    Py_CLEAR(self->file);
+    return 0;
+}
+
+
+static void
+do_mmap_sink_dealloc(CurlMmapSinkObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    if (self->weakreflist != NULL) {
+        PyObject_ClearWeakRefs((PyObject *) self);
+    }
+    /* the file keeps whatever an abandoned transfer wrote to it */
+#if PY_VERSION_HEX < 0x030D0000
+    if (self->lock != NULL) {
+        (void) mmap_sink_finish(self);
+        PyThread_free_lock(self->lock);
+        self->lock = NULL;
+    }
+#else
+    (void) mmap_sink_finish(self);
+#endif
+    do_mmap_sink_clear(self);
+    Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+
+static PyObject *
+do_mmap_sink_fileno(CurlMmapSinkObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return PyLong_FromLong(self->fd);
+}
+
+
+/*************************************************************************
+// write callbacks
+**************************************************************************/
+
+static size_t
+util_sink_write_callback(int flags, char *ptr, size_t size, size_t nmemb, void *stream)
+{
+    CurlObject *self = (CurlObject *) stream;
+    PyObject *sink = flags ? self->writeheader_fp : self->writedata_fp;
+    size_t total_size;
+    int rv;
+
+    /* returning less than requested makes libcurl fail with CURLE_WRITE_ERROR */
+    if (sink == NULL || size == 0 || nmemb == 0) {
+        return 0;
+    }
+    total_size = size * nmemb;
+    if (total_size / size != nmemb) {
+        return 0;
+    }
+    if (Py_IS_TYPE(sink, p_CurlFdSink_Type)) {
+        rv = fd_sink_write_all(((CurlFdSinkObject *) sink)->fd, ptr, total_size);
+    } else if (Py_IS_TYPE(sink, p_CurlMmapSink_Type)) {
+        rv = mmap_sink_write((CurlMmapSinkObject *) sink, ptr, total_size, self->handle);
+    } else {
+        /* the announced length describes the body, not the headers */
+        rv = buffer_sink_append((CurlBufferSinkObject *) sink, ptr, total_size,
+                                flags ? NULL : self->handle);
+    }
+    if (rv != 0) {
+        return 0;
+    }
+    return total_size;
+}
+
+
+PYCURL_INTERNAL size_t
+sink_write_callback(char *ptr, size_t size, size_t nmemb, void *stream)
+{
+    return util_sink_write_callback(0, ptr, size, nmemb, stream);
+}
+
+
+PYCURL_INTERNAL size_t
+sink_header_callback(char *ptr, size_t size, size_t nmemb, void *stream)
+{
+    return util_sink_write_callback(1, ptr, size, nmemb, stream);
+}
+
+
+/*************************************************************************
+// read sources
+**************************************************************************/
+
+/* A buffer or file descriptor given as READDATA is read from C, without
+ * the GIL, and rewound natively when libcurl needs to resend the upload. */
+
+/* Take `obj`, a buffer-protocol object or an integer file descriptor, as the
+ * upload source of `self`. Requires the GIL; returns 0 or -1 with an
+ * exception set. */
+PYCURL_INTERNAL int
+util_curl_set_read_source(CurlObject *self, PyObject *obj)
+{
+    Py_buffer view;
+    int fd = -1;
+    curl_off_t start = -1;
+
+    if (PyLong_Check(obj)) {
+        fd = PyObject_AsFileDescriptor(obj);
+        if (fd < 0) {
+            return -1;
+        }
+        /* rewinds go back to where the upload started, if that is possible */
+#if defined(WIN32)
+        start = (curl_off_t) _lseeki64(fd, 0, SEEK_CUR);
+#else
+        start = (curl_off_t) lseek(fd, 0, SEEK_CUR);
+#endif
+        if (start < 0) {
+            start = -1;
+        }
+    }
+    else if (PyObject_GetBuffer(obj, &view, PyBUF_SIMPLE) != 0) {
+        return -1;
+    }
+
+    util_curl_release_read_source(self);
+    if (fd >= 0) {
+        self->read_source = PYCURL_READ_SOURCE_FD;
+        self->read_fd = fd;
+    }
+    else {
+        self->read_source = PYCURL_READ_SOURCE_BUFFER;
+        self->read_view = view;
+    }
+    self->read_start = start;
+    self->read_pos = 0;
+    return 0;
+}
+
+
+/* Go back to the start of the upload source before a transfer, so that every
+ * transfer sends the whole upload. Safe to call without the GIL. */
+PYCURL_INTERNAL void
+util_curl_rewind_read_source(CurlObject *self)
+{
+    self->read_pos = 0;
+    if (self->read_source == PYCURL_READ_SOURCE_FD && self->read_start >= 0) {
+#if defined(WIN32)
+        (void) _lseeki64(self->read_fd, self->read_start, SEEK_SET);
+#else
+        (void) lseek(self->read_fd, (off_t) self->read_start, SEEK_SET);
+#endif
+    }
+}
+
+
+/* Drop the upload source of `self`, if any. Requires the GIL. */
+PYCURL_INTERNAL void
+util_curl_release_read_source(CurlObject *self)
+{
+    if (self->read_source == PYCURL_READ_SOURCE_BUFFER) {
+        PyBuffer_Release(&self->read_view);
+    }
+    self->read_source = PYCURL_READ_SOURCE_NONE;
+}
+
+
+/* Give `dup` its own view of, or position in, the upload source of `self`.
+ * Requires the GIL; returns 0 or -1 with an exception set. */
+PYCURL_INTERNAL int
+util_curl_dup_read_source(CurlObject *dup, CurlObject *self)
+{
+    if (self->read_source == PYCURL_READ_SOURCE_BUFFER &&
+        PyObject_GetBuffer(self->read_view.obj, &dup->read_view, PyBUF_SIMPLE) != 0) {
+        return -1;
+    }
+    dup->read_source = self->read_source;
+    dup->read_fd = self->read_fd;
+    dup->read_start = self->read_start;
+    dup->read_pos = 0;
+    return 0;
+}
+
+
+PYCURL_INTERNAL size_t
+source_read_callback(char *ptr, size_t size, size_t nmemb, void *stream)
+{
+    CurlObject *self = (CurlObject *) stream;
+    size_t total_size = size * nmemb;
+
+    if (size != 0 && total_size / size != nmemb) {
+        return CURL_READFUNC_ABORT;
+    }
+    if (self->read_source == PYCURL_READ_SOURCE_BUFFER) {
+        size_t left = (size_t) (self->read_view.len - self->read_pos);
+
+        if (total_size > left) {
+            total_size = left;
+        }
+        memcpy(ptr, (char *) self->read_view.buf + self->read_pos, total_size);
+        self->read_pos += total_size;
+        return total_size;
+    }
+    if (self->read_source == PYCURL_READ_SOURCE_FD) {
+        for (;;) {
+#if defined(WIN32)
+            int n = _read(self->read_fd, ptr, (unsigned int) (total_size > INT_MAX ? INT_MAX : total_size));
+#else
+            ssize_t n = read(self->read_fd, ptr, total_size);
+#endif
+            if (n >= 0) {
+                return (size_t) n;
+            }
+            if (errno != EINTR) {
+                break;
+            }
+        }
+    }
+    return CURL_READFUNC_ABORT;
+}
+
+
+PYCURL_INTERNAL int
+source_seek_callback(void *stream, curl_off_t offset, int origin)
+{
+    CurlObject *self = (CurlObject *) stream;
+
+    if (self->read_source == PYCURL_READ_SOURCE_BUFFER) {
+        curl_off_t len = (curl_off_t) self->read_view.len;
+
+        if (origin == SEEK_CUR) {
+            offset += self->read_pos;
+        } else if (origin == SEEK_END) {
+            offset += len;
+        } else if (origin != SEEK_SET) {
+            return CURL_SEEKFUNC_CANTSEEK;
+        }
+        if (offset < 0 || offset > len) {
+            return CURL_SEEKFUNC_FAIL;
+        }
+        self->read_pos = offset;
+        return CURL_SEEKFUNC_OK;
+    }
+    if (self->read_source == PYCURL_READ_SOURCE_FD && self->read_start >= 0) {
+        curl_off_t pos;
+
+        /* offsets are relative to where the upload started */
+        if (origin == SEEK_SET) {
+            offset += self->read_start;
+        } else if (origin != SEEK_CUR) {
+            return CURL_SEEKFUNC_CANTSEEK;
+        }
+#if defined(WIN32)
+        pos = (curl_off_t) _lseeki64(self->read_fd, offset, origin);
+#else
+        pos = (curl_off_t) lseek(self->read_fd, (off_t) offset, origin);
+#endif
+        return pos < 0 ? CURL_SEEKFUNC_FAIL : CURL_SEEKFUNC_OK;
+    }
+    return CURL_SEEKFUNC_CANTSEEK;
+}
+
+
+/*************************************************************************
+// type definitions
+**************************************************************************/
+
+static PyMethodDef buffersinkobject_methods[] = {
+    {"clear", (PyCFunction)do_buffer_sink_clear, METH_NOARGS, buffersink_clear_doc},
+    {"getvalue", (PyCFunction)do_buffer_sink_getvalue, METH_NOARGS, buffersink_getvalue_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+
+static PySequenceMethods buffersinkobject_as_sequence = {
+    (lenfunc)do_buffer_sink_len, /* sq_length */
+};
+
+
+PYCURL_INTERNAL PyTypeObject CurlBufferSink_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "pycurl.BufferSink",        /* tp_name */
+    sizeof(CurlBufferSinkObject), /* tp_basicsize */
+    0,                          /* tp_itemsize */
+    (destructor)do_buffer_sink_dealloc, /* tp_dealloc */
+    0,                          /* tp_print */
+    0,                          /* tp_getattr */
+    0,                          /* tp_setattr */
+    0,                          /* tp_reserved */
+    0,                          /* tp_repr */
+    0,                          /* tp_as_number */
+    &buffersinkobject_as_sequence, /* tp_as_sequence */
+    0,                          /* tp_as_mapping */
+    0,                          /* tp_hash  */
+    0,                          /* tp_call */
+    0,                          /* tp_str */
+    0,                          /* tp_getattro */
+    0,                          /* tp_setattro */
+    0,                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,         /* tp_flags */
+    buffersink_doc,             /* tp_doc */
+    0,                          /* tp_traverse */
+    0,                          /* tp_clear */
+    0,                          /* tp_richcompare */
+    offsetof(CurlBufferSinkObject, weakreflist), /* tp_weaklistoffset */
+    0,                          /* tp_iter */
+    0,                          /* tp_iternext */
+    buffersinkobject_methods,   /* tp_methods */
+    0,                          /* tp_members */
+    0,                          /* tp_getset */
+    0,                          /* tp_base */
+    0,                          /* tp_dict */
+    0,                          /* tp_descr_get */
+    0,                          /* tp_descr_set */
+    0,                          /* tp_dictoffset */
+    0,                          /* tp_init */
+    PyType_GenericAlloc,        /* tp_alloc */
+    (newfunc)do_buffer_sink_new, /* tp_new */
+    PyObject_Del,               /* tp_free */
+};
+
+
+static PyMethodDef fdsinkobject_methods[] = {
+    {"fileno", (PyCFunction)do_fd_sink_fileno, METH_NOARGS, fdsink_fileno_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+
+static PyMethodDef mmapsinkobject_methods[] = {
+    {"fileno", (PyCFunction)do_mmap_sink_fileno, METH_NOARGS, mmapsink_fileno_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+
+static PyMethodDef headersinkobject_methods[] = {
+    {"get", (PyCFunction)do_header_sink_get, METH_VARARGS, headersink_get_doc},
+    {"get_all", (PyCFunction)do_header_sink_get_all, METH_VARARGS, headersink_get_all_doc},
+    {"headers", (PyCFunction)do_header_sink_headers, METH_NOARGS, headersink_headers_doc},
+    {"responses", (PyCFunction)do_header_sink_responses, METH_NOARGS, headersink_responses_doc},
+    {"status_line", (PyCFunction)do_header_sink_status_line, METH_NOARGS, headersink_status_line_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+
+/* A BufferSink that parses what it collected; tp_base is set in module init */
+PYCURL_INTERNAL PyTypeObject CurlHeaderSink_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "pycurl.HeaderSink",        /* tp_name */
+    sizeof(CurlBufferSinkObject), /* tp_basicsize */
+    0,                          /* tp_itemsize */
+    (destructor)do_buffer_sink_dealloc, /* tp_dealloc */
+    0,                          /* tp_print */
+    0,                          /* tp_getattr */
+    0,                          /* tp_setattr */
+    0,                          /* tp_reserved */
+    0,                          /* tp_repr */
+    0,                          /* tp_as_number */
+    0,                          /* tp_as_sequence */
+    0,                          /* tp_as_mapping */
+    0,                          /* tp_hash  */
+    0,                          /* tp_call */
+    0,                          /* tp_str */
+    0,                          /* tp_getattro */
+    0,                          /* tp_setattro */
+    0,                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,         /* tp_flags */
+    headersink_doc,             /* tp_doc */
+    0,                          /* tp_traverse */
+    0,                          /* tp_clear */
+    0,                          /* tp_richcompare */
+    offsetof(CurlBufferSinkObject, weakreflist), /* tp_weaklistoffset */
+    0,                          /* tp_iter */
+    0,                          /* tp_iternext */
+    headersinkobject_methods,   /* tp_methods */
+    0,                          /* tp_members */
+    0,                          /* tp_getset */
+    0,                          /* tp_base */
+    0,                          /* tp_dict */
+    0,                          /* tp_descr_get */
+    0,                          /* tp_descr_set */
+    0,                          /* tp_dictoffset */
+    0,                          /* tp_init */
+    PyType_GenericAlloc,        /* tp_alloc */
+    (newfunc)do_buffer_sink_new, /* tp_new */
+    PyObject_Del,               /* tp_free */
+};
+
+
+PYCURL_INTERNAL PyTypeObject CurlFdSink_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "pycurl.FdSink",            /* tp_name */
+    sizeof(CurlFdSinkObject),   /* tp_basicsize */
+    0,                          /* tp_itemsize */
+    (destructor)do_fd_sink_dealloc, /* tp_dealloc */
+    0,                          /* tp_print */
+    0,                          /* tp_getattr */
+    0,                          /* tp_setattr */
+    0,                          /* tp_reserved */
+    0,                          /* tp_repr */
+    0,                          /* tp_as_number */
+    0,                          /* tp_as_sequence */
+    0,                          /* tp_as_mapping */
+    0,                          /* tp_hash  */
+    0,                          /* tp_call */
+    0,                          /* tp_str */
+    0,                          /* tp_getattro */
+    0,                          /* tp_setattro */
+    0,                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC, /* tp_flags */
+    fdsink_doc,                 /* tp_doc */
+    (traverseproc)do_fd_sink_traverse, /* tp_traverse */
+    (inquiry)do_fd_sink_clear,  /* tp_clear */
+    0,                          /* tp_richcompare */
+    offsetof(CurlFdSinkObject, weakreflist), /* tp_weaklistoffset */
+    0,                          /* tp_iter */
+    0,                          /* tp_iternext */
+    fdsinkobject_methods,       /* tp_methods */
+    0,                          /* tp_members */
+    0,                          /* tp_getset */
+    0,                          /* tp_base */
+    0,                          /* tp_dict */
+    0,                          /* tp_descr_get */
+    0,                          /* tp_descr_set */
+    0,                          /* tp_dictoffset */
+    0,                          /* tp_init */
+    PyType_GenericAlloc,        /* tp_alloc */
+    (newfunc)do_fd_sink_new,    /* tp_new */
+    PyObject_GC_Del,            /* tp_free */
+};
+
+
+PYCURL_INTERNAL PyTypeObject CurlMmapSink_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "pycurl.MmapSink",          /* tp_name */
+    sizeof(CurlMmapSinkObject), /* tp_basicsize */
+    0,                          /* tp_itemsize */
+    (destructor)do_mmap_sink_dealloc, /* tp_dealloc */
+    0,                          /* tp_print */
+    0,                          /* tp_getattr */
+    0,                          /* tp_setattr */
+    0,                          /* tp_reserved */
+    0,                          /* tp_repr */
+    0,                          /* tp_as_number */
+    0,                          /* tp_as_sequence */
+    0,                          /* tp_as_mapping */
+    0,                          /* tp_hash  */
+    0,                          /* tp_call */
+    0,                          /* tp_str */
+    0,                          /* tp_getattro */
+    0,                          /* tp_setattro */
+    0,                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC, /* tp_flags */
+    mmapsink_doc,               /* tp_doc */
+    (traverseproc)do_mmap_sink_traverse, /* tp_traverse */
+    (inquiry)do_mmap_sink_clear, /* tp_clear */
+    0,                          /* tp_richcompare */
+    offsetof(CurlMmapSinkObject, weakreflist), /* tp_weaklistoffset */
+    0,                          /* tp_iter */
+    0,                          /* tp_iternext */
+    mmapsinkobject_methods,     /* tp_methods */
+    0,                          /* tp_members */
+    0,                          /* tp_getset */
+    0,                          /* tp_base */
+    0,                          /* tp_dict */
+    0,                          /* tp_descr_get */
+    0,                          /* tp_descr_set */
+    0,                          /* tp_dictoffset */
+    0,                          /* tp_init */
+    PyType_GenericAlloc,        /* tp_alloc */
+    (newfunc)do_mmap_sink_new,  /* tp_new */
+    PyObject_GC_Del,            /* tp_free */
+};
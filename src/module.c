@@ -26,6 +26,12 @@ PYCURL_INTERNAL PyTypeObject *p_CurlSlist_Type = NULL;
 PYCURL_INTERNAL PyTypeObject *p_CurlHttppost_Type = NULL;
 PYCURL_INTERNAL PyTypeObject *p_CurlMulti_Type = NULL;
 PYCURL_INTERNAL PyTypeObject *p_CurlShare_Type = NULL;
+PYCURL_INTERNAL PyTypeObject *p_CurlBufferSink_Type = NULL;
+PYCURL_INTERNAL PyTypeObject *p_CurlFdSink_Type = NULL;
+PYCURL_INTERNAL PyTypeObject *p_CurlMmapSink_Type = NULL;
+PYCURL_INTERNAL PyTypeObject *p_CurlHeaderSink_Type = NULL;
+PYCURL_INTERNAL PyTypeObject *p_CurlChunkIterator_Type = NULL;
+PYCURL_INTERNAL PyTypeObject *p_CurlOptionSet_Type = NULL;
 #ifdef HAVE_CURL_MIME
 PYCURL_INTERNAL PyTypeObject *p_CurlMime_Type = NULL;
 PYCURL_INTERNAL PyTypeObject *p_CurlMimePart_Type = NULL;
@@ -37,6 +43,7 @@ PYCURL_INTERNAL PyTypeObject *p_CurlUrl_Type = NULL;
 PYCURL_INTERNAL PyObject *khkey_type = NULL;
 #endif
 PYCURL_INTERNAL PyObject *curl_sockaddr_type = NULL;
+PYCURL_INTERNAL PyTypeObject *transfer_stats_type = NULL;
 #if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 74, 0)
 PYCURL_INTERNAL PyObject *hsts_entry_type = NULL;
 PYCURL_INTERNAL PyObject *hsts_index_type = NULL;
@@ -378,6 +385,8 @@ static void do_curlmod_free(void *unused) {
 #endif
     Py_XDECREF(curl_sockaddr_type);
     curl_sockaddr_type = NULL;
+    Py_XDECREF(transfer_stats_type);
+    transfer_stats_type = NULL;
 #if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 74, 0)
     Py_XDECREF(hsts_entry_type);
     hsts_entry_type = NULL;
@@ -530,6 +539,12 @@ PYCURL_IGNORE_DEPRECATED_END
     p_CurlHttppost_Type = &CurlHttppost_Type;
     p_CurlMulti_Type = &CurlMulti_Type;
     p_CurlShare_Type = &CurlShare_Type;
+    p_CurlBufferSink_Type = &CurlBufferSink_Type;
+    p_CurlFdSink_Type = &CurlFdSink_Type;
+    p_CurlMmapSink_Type = &CurlMmapSink_Type;
+    p_CurlHeaderSink_Type = &CurlHeaderSink_Type;
+    p_CurlChunkIterator_Type = &CurlChunkIterator_Type;
+    p_CurlOptionSet_Type = &CurlOptionSet_Type;
 #ifdef HAVE_CURL_MIME
     p_CurlMime_Type = &CurlMime_Type;
     p_CurlMimePart_Type = &CurlMimePart_Type;
@@ -542,6 +557,13 @@ PYCURL_IGNORE_DEPRECATED_END
     Py_SET_TYPE(&CurlHttppost_Type, &PyType_Type);
     Py_SET_TYPE(&CurlMulti_Type, &PyType_Type);
     Py_SET_TYPE(&CurlShare_Type, &PyType_Type);
+    Py_SET_TYPE(&CurlBufferSink_Type, &PyType_Type);
+    Py_SET_TYPE(&CurlFdSink_Type, &PyType_Type);
+    Py_SET_TYPE(&CurlMmapSink_Type, &PyType_Type);
+    Py_SET_TYPE(&CurlHeaderSink_Type, &PyType_Type);
+    CurlHeaderSink_Type.tp_base = &CurlBufferSink_Type;
+    Py_SET_TYPE(&CurlChunkIterator_Type, &PyType_Type);
+    Py_SET_TYPE(&CurlOptionSet_Type, &PyType_Type);
 #ifdef HAVE_CURL_MIME
     Py_SET_TYPE(&CurlMime_Type, &PyType_Type);
     Py_SET_TYPE(&CurlMimePart_Type, &PyType_Type);
@@ -566,6 +588,24 @@ PYCURL_IGNORE_DEPRECATED_END
     if (PyType_Ready(&CurlShare_Type) < 0)
         goto error;
 
+    if (PyType_Ready(&CurlBufferSink_Type) < 0)
+        goto error;
+
+    if (PyType_Ready(&CurlFdSink_Type) < 0)
+        goto error;
+
+    if (PyType_Ready(&CurlMmapSink_Type) < 0)
+        goto error;
+
+    if (PyType_Ready(&CurlHeaderSink_Type) < 0)
+        goto error;
+
+    if (PyType_Ready(&CurlChunkIterator_Type) < 0)
+        goto error;
+
+    if (PyType_Ready(&CurlOptionSet_Type) < 0)
+        goto error;
+
 #ifdef HAVE_CURL_MIME
     if (PyType_Ready(&CurlMime_Type) < 0)
         goto error;
@@ -637,6 +677,12 @@ PYCURL_IGNORE_DEPRECATED_END
     insobj2_modinit(d, NULL, "Curl", (PyObject *) p_Curl_Type);
     insobj2_modinit(d, NULL, "CurlMulti", (PyObject *) p_CurlMulti_Type);
     insobj2_modinit(d, NULL, "CurlShare", (PyObject *) p_CurlShare_Type);
+    insobj2_modinit(d, NULL, "BufferSink", (PyObject *) p_CurlBufferSink_Type);
+    insobj2_modinit(d, NULL, "FdSink", (PyObject *) p_CurlFdSink_Type);
+    insobj2_modinit(d, NULL, "MmapSink", (PyObject *) p_CurlMmapSink_Type);
+    insobj2_modinit(d, NULL, "HeaderSink", (PyObject *) p_CurlHeaderSink_Type);
+    insobj2_modinit(d, NULL, "ChunkIterator", (PyObject *) p_CurlChunkIterator_Type);
+    insobj2_modinit(d, NULL, "OptionSet", (PyObject *) p_CurlOptionSet_Type);
 #ifdef HAVE_CURL_MIME
     insobj2_modinit(d, NULL, "CurlMime", (PyObject *) p_CurlMime_Type);
     insobj2_modinit(d, NULL, "CurlMimePart", (PyObject *) p_CurlMimePart_Type);
@@ -1743,6 +1789,12 @@ PYCURL_IGNORE_DEPRECATED_END
     insint(d, "POLL_OUT", CURL_POLL_OUT);
     insint(d, "POLL_INOUT", CURL_POLL_INOUT);
     insint(d, "POLL_REMOVE", CURL_POLL_REMOVE);
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 66, 0)
+    /* constants for CurlMulti.poll */
+    insint(d, "WAIT_POLLIN", CURL_WAIT_POLLIN);
+    insint(d, "WAIT_POLLPRI", CURL_WAIT_POLLPRI);
+    insint(d, "WAIT_POLLOUT", CURL_WAIT_POLLOUT);
+#endif
 
     /* curl_lock_data: XXX do we need this in pycurl ??? */
     /* curl_lock_access: XXX do we need this in pycurl ??? */
@@ -1924,6 +1976,14 @@ PYCURL_IGNORE_DEPRECATED_END
         goto error;
     }
 
+    transfer_stats_type = PyStructSequence_NewType(&transfer_stats_desc);
+    if (transfer_stats_type == NULL) {
+        goto error;
+    }
+    if (PyDict_SetItemString(d, "TransferStats", (PyObject *) transfer_stats_type) < 0) {
+        goto error;
+    }
+
 #if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 74, 0)
     {
         PyObject *datetime_module = PyImport_ImportModule("datetime");
@@ -2018,6 +2078,8 @@ error:
     Py_XDECREF(khkey_type);
     #endif
     Py_XDECREF(curl_sockaddr_type);
+    Py_XDECREF(transfer_stats_type);
+    transfer_stats_type = NULL;
 #if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 74, 0)
     Py_XDECREF(hsts_entry_type);
     Py_XDECREF(hsts_index_type);
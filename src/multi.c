@@ -1,5 +1,9 @@
 #include "pycurl.h"
 #include "docstrings.h"
+#ifdef HAVE_EPOLL_DRIVER
+#include <errno.h>
+#include <unistd.h>
+#endif
 
 #define PYCURL_BEGIN_MULTI_CALLBACK(callback_name, retval) \
     PYCURL_BEGIN_CALLBACK_COMMON(PYCURL_GET_THREAD_STATE_MULTI, retval, callback_name)
@@ -127,6 +131,165 @@ do_multi_new(PyTypeObject *subtype, PyObject *args, PyObject *kwds)
     return self;
 }
 
+/* Stop collecting socket events, once libcurl no longer calls
+ * multi_socket_event_callback */
+static void
+util_multi_socket_events_stop(CurlMultiObject *self)
+{
+    self->collect_socket_events = 0;
+    PyMem_RawFree(self->socket_events);
+    self->socket_events = NULL;
+    self->num_socket_events = 0;
+    self->max_socket_events = 0;
+}
+
+
+#ifdef HAVE_EPOLL_DRIVER
+/*************************************************************************
+// epoll driver
+**************************************************************************/
+
+/* run(epoll=True) drives the multi with curl_multi_socket_action from an
+ * epoll set. libcurl's socket and timer callbacks are C functions that keep
+ * the set and a timerfd in it up to date, so Python is only entered for
+ * completed transfers. The driver is attached by the first such run() and
+ * keeps the callbacks until the multi is closed: libcurl reports a socket
+ * only when its state changes, so the set cannot be handed back to Python
+ * callbacks. */
+
+#define PYCURL_EPOLL_MAX_EVENTS 1024
+
+typedef struct CurlEpollDriver {
+    int epoll_fd;
+    int timer_fd;
+    struct epoll_event events[PYCURL_EPOLL_MAX_EVENTS];
+} CurlEpollDriver;
+
+
+/* CURLMOPT_SOCKETFUNCTION of the driver; called without the GIL */
+static int
+epoll_socket_callback(CURL *easy,
+                      curl_socket_t s,
+                      int what,
+                      void *userp,
+                      void *socketp)
+{
+    CurlEpollDriver *driver = (CurlEpollDriver *) userp;
+    struct epoll_event ev;
+
+    UNUSED(easy);
+    UNUSED(socketp);
+
+    if (what == CURL_POLL_REMOVE) {
+        /* fails harmlessly if closing the socket removed it already */
+        epoll_ctl(driver->epoll_fd, EPOLL_CTL_DEL, s, NULL);
+        return 0;
+    }
+    memset(&ev, 0, sizeof(ev));
+    if (what & CURL_POLL_IN) {
+        ev.events |= EPOLLIN;
+    }
+    if (what & CURL_POLL_OUT) {
+        ev.events |= EPOLLOUT;
+    }
+    ev.data.fd = s;
+    if (epoll_ctl(driver->epoll_fd, EPOLL_CTL_MOD, s, &ev) == 0) {
+        return 0;
+    }
+    if (errno == ENOENT && epoll_ctl(driver->epoll_fd, EPOLL_CTL_ADD, s, &ev) == 0) {
+        return 0;
+    }
+    return -1;
+}
+
+
+/* CURLMOPT_TIMERFUNCTION of the driver; called without the GIL */
+static int
+epoll_timer_callback(CURLM *multi,
+                     long timeout_ms,
+                     void *userp)
+{
+    CurlEpollDriver *driver = (CurlEpollDriver *) userp;
+    struct itimerspec its;
+
+    UNUSED(multi);
+
+    memset(&its, 0, sizeof(its));
+    if (timeout_ms > 0) {
+        its.it_value.tv_sec = timeout_ms / 1000;
+        its.it_value.tv_nsec = (timeout_ms % 1000) * 1000000;
+    } else if (timeout_ms == 0) {
+        /* expire right away; an all-zero value would disarm the timer */
+        its.it_value.tv_nsec = 1;
+    }
+    return timerfd_settime(driver->timer_fd, 0, &its, NULL) == 0 ? 0 : -1;
+}
+
+
+/* Attach the driver to `self` unless it already is. Returns 0, or -1 with
+ * an exception set. */
+static int
+util_multi_epoll_attach(CurlMultiObject *self)
+{
+    /* make sure that the callbacks match the <curl/multi.h> interface */
+    const curl_socket_callback s_cb = epoll_socket_callback;
+    const curl_multi_timer_callback t_cb = epoll_timer_callback;
+    CurlEpollDriver *driver;
+    struct epoll_event ev;
+
+    if (self->epoll != NULL) {
+        return 0;
+    }
+    if (self->s_cb != NULL || self->t_cb != NULL || self->collect_socket_events) {
+        PyErr_SetString(ErrorObject, "cannot use the epoll driver while M_SOCKETFUNCTION or M_TIMERFUNCTION is set, or socket events are collected");
+        return -1;
+    }
+    driver = PyMem_New(CurlEpollDriver, 1);
+    if (driver == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    driver->epoll_fd = epoll_create1(EPOLL_CLOEXEC);
+    driver->timer_fd = timerfd_create(CLOCK_MONOTONIC, TFD_NONBLOCK | TFD_CLOEXEC);
+    memset(&ev, 0, sizeof(ev));
+    ev.events = EPOLLIN;
+    ev.data.fd = driver->timer_fd;
+    if (driver->epoll_fd < 0 || driver->timer_fd < 0 ||
+        epoll_ctl(driver->epoll_fd, EPOLL_CTL_ADD, driver->timer_fd, &ev) != 0) {
+        PyErr_SetFromErrno(PyExc_OSError);
+        if (driver->epoll_fd >= 0) {
+            close(driver->epoll_fd);
+        }
+        if (driver->timer_fd >= 0) {
+            close(driver->timer_fd);
+        }
+        PyMem_Free(driver);
+        return -1;
+    }
+
+    curl_multi_setopt(self->multi_handle, CURLMOPT_SOCKETFUNCTION, s_cb);
+    curl_multi_setopt(self->multi_handle, CURLMOPT_SOCKETDATA, driver);
+    curl_multi_setopt(self->multi_handle, CURLMOPT_TIMERFUNCTION, t_cb);
+    curl_multi_setopt(self->multi_handle, CURLMOPT_TIMERDATA, driver);
+    self->epoll = driver;
+    return 0;
+}
+
+
+/* Free the driver of `self`, once its multi handle has been cleaned up */
+static void
+util_multi_epoll_free(CurlMultiObject *self)
+{
+    if (self->epoll != NULL) {
+        close(self->epoll->epoll_fd);
+        close(self->epoll->timer_fd);
+        PyMem_Free(self->epoll);
+        self->epoll = NULL;
+    }
+}
+#endif /* HAVE_EPOLL_DRIVER */
+
+
 static void
 util_multi_close(CurlMultiObject *self)
 {
@@ -142,6 +305,10 @@ util_multi_close(CurlMultiObject *self)
         PYCURL_END_ALLOW_THREADS
         self->multi_handle = NULL;
     }
+    util_multi_socket_events_stop(self);
+#ifdef HAVE_EPOLL_DRIVER
+    util_multi_epoll_free(self);
+#endif
 }
 
 
@@ -155,6 +322,7 @@ util_multi_xdecref(CurlMultiObject *self)
     Py_CLEAR(self->n_cb);
 #endif
     Py_CLEAR(self->socket_object_dict);
+    Py_CLEAR(self->done_stash);
 }
 
 
@@ -259,7 +427,11 @@ do_multi_close(CurlMultiObject *self, PyObject *Py_UNUSED(ignored))
 
 static PyObject *do_multi_get_closed(CurlMultiObject *self, void *Py_UNUSED(closure))
 {
-    if (self->multi_handle == NULL) {
+    int closed;
+    Py_BEGIN_CRITICAL_SECTION(self);
+    closed = (self->multi_handle == NULL);
+    Py_END_CRITICAL_SECTION();
+    if (closed) {
         Py_RETURN_TRUE;
     } else {
         Py_RETURN_FALSE;
@@ -287,6 +459,7 @@ do_multi_traverse(CurlMultiObject *self, visitproc visit, void *arg)
     VISIT(self->dict);
     VISIT(self->easy_object_refs);
     VISIT(self->socket_object_dict);
+    VISIT(self->done_stash);
     VISIT(self->t_cb);
     VISIT(self->s_cb);
 #ifdef HAVE_CURL_MULTI_NOTIFY
@@ -412,6 +585,40 @@ verbose_error:
 }
 
 
+/* CURLMOPT_SOCKETFUNCTION installed by collect_socket_events(). It only
+ * records the change, so it does not need the GIL. */
+static int
+multi_socket_event_callback(CURL *easy,
+                            curl_socket_t s,
+                            int what,
+                            void *userp,
+                            void *socketp)
+{
+    CurlMultiObject *self = (CurlMultiObject *) userp;
+    CurlSocketEvent *event;
+
+    UNUSED(easy);
+    UNUSED(socketp);
+
+    if (self->num_socket_events == self->max_socket_events) {
+        int size = self->max_socket_events > 0 ? self->max_socket_events * 2 : 16;
+        CurlSocketEvent *events;
+
+        events = PyMem_RawRealloc(self->socket_events, size * sizeof(CurlSocketEvent));
+        if (events == NULL) {
+            /* aborts all in-progress transfers */
+            return -1;
+        }
+        self->socket_events = events;
+        self->max_socket_events = size;
+    }
+    event = &self->socket_events[self->num_socket_events++];
+    event->fd = s;
+    event->what = what;
+    return 0;
+}
+
+
 #ifdef HAVE_CURL_MULTI_NOTIFY
 /* Map libcurl `easy` to its Python Curl, or NULL when unsafe. Borrowed ref. */
 static CurlObject *
@@ -636,6 +843,7 @@ do_multi_setopt_callable(CurlMultiObject *self, int option, PyObject *obj)
     case CURLMOPT_SOCKETFUNCTION:
         curl_multi_setopt(self->multi_handle, CURLMOPT_SOCKETFUNCTION, s_cb);
         curl_multi_setopt(self->multi_handle, CURLMOPT_SOCKETDATA, self);
+        util_multi_socket_events_stop(self);
         Py_INCREF(obj);
         Py_CLEAR(self->s_cb);
         self->s_cb = obj;
@@ -677,6 +885,7 @@ do_multi_setopt_none(CurlMultiObject *self, int option, PyObject *obj)
     case CURLMOPT_SOCKETFUNCTION:
         curl_multi_setopt(self->multi_handle, CURLMOPT_SOCKETFUNCTION, NULL);
         curl_multi_setopt(self->multi_handle, CURLMOPT_SOCKETDATA, NULL);
+        util_multi_socket_events_stop(self);
         Py_CLEAR(self->s_cb);
         break;
     case CURLMOPT_TIMERFUNCTION:
@@ -718,6 +927,12 @@ do_multi_setopt(CurlMultiObject *self, PyObject *args)
     if (option % 10000 >= MOPTIONS_SIZE)
         goto error;
 
+    if (self->epoll != NULL &&
+        (option == CURLMOPT_SOCKETFUNCTION || option == CURLMOPT_TIMERFUNCTION)) {
+        PyErr_SetString(ErrorObject, "M_SOCKETFUNCTION and M_TIMERFUNCTION belong to the epoll driver of this multi");
+        return NULL;
+    }
+
     /* Handle unsetting of options */
     if (obj == Py_None) {
         return do_multi_setopt_none(self, option, obj);
@@ -914,16 +1129,25 @@ do_multi_unassign(CurlMultiObject *self, PyObject *args)
 
 
 /* --------------- socket_action --------------- */
+
+static int
+util_multi_read_done(CurlMultiObject *self, int num_results, int *in_queue,
+                     PyObject *ok_list, PyObject *err_list);
+
 static PyObject *
-do_multi_socket_action(CurlMultiObject *self, PyObject *args)
+do_multi_socket_action(CurlMultiObject *self, PyObject *args, PyObject *kwds)
 {
     CURLMcode res;
     curl_socket_t socket;
     PyObject *socket_obj;
+    PyObject *done_list, *ret = NULL;
     int ev_bitmask;
     int running = -1;
+    int collect = 0;
+    int in_queue;
+    static char *kwlist[] = {"sock_fd", "ev_bitmask", "collect", NULL};
 
-    if (!PyArg_ParseTuple(args, "Oi:socket_action", &socket_obj, &ev_bitmask)) {
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "Oi|$p:socket_action", kwlist, &socket_obj, &ev_bitmask, &collect)) {
         return NULL;
     }
     if (PyLong_AsCurlSocket(socket_obj, &socket) != 0) {
@@ -944,8 +1168,20 @@ do_multi_socket_action(CurlMultiObject *self, PyObject *args)
     if (res != CURLM_OK) {
         CURLERROR_MSG("multi_socket_action failed");
     }
-    /* Return a tuple with the result and the number of running handles */
-    return Py_BuildValue("(ii)", (int)res, running);
+    if (!collect) {
+        /* Return a tuple with the result and the number of running handles */
+        return Py_BuildValue("(ii)", (int)res, running);
+    }
+
+    if ((done_list = PyList_New((Py_ssize_t)0)) == NULL) {
+        return NULL;
+    }
+    if (util_multi_read_done(self, INT_MAX, &in_queue, done_list, NULL) == 0) {
+        /* Return (number of running handles, [(curl, code), ...]) */
+        ret = Py_BuildValue("(iO)", running, done_list);
+    }
+    Py_DECREF(done_list);
+    return ret;
 }
 
 /* --------------- socket_all --------------- */
@@ -984,6 +1220,62 @@ do_multi_socket_all(CurlMultiObject *self, PyObject *Py_UNUSED(ignored))
 }
 
 
+/* --------------- socket events --------------- */
+
+static PyObject *
+do_multi_collect_socket_events(CurlMultiObject *self, PyObject *Py_UNUSED(ignored))
+{
+    const curl_socket_callback s_cb = multi_socket_event_callback;
+
+    if (check_multi_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "collect_socket_events") != 0) {
+        return NULL;
+    }
+    if (self->epoll != NULL) {
+        PyErr_SetString(ErrorObject, "M_SOCKETFUNCTION and M_TIMERFUNCTION belong to the epoll driver of this multi");
+        return NULL;
+    }
+    if (!self->collect_socket_events) {
+        curl_multi_setopt(self->multi_handle, CURLMOPT_SOCKETFUNCTION, s_cb);
+        curl_multi_setopt(self->multi_handle, CURLMOPT_SOCKETDATA, self);
+        Py_CLEAR(self->s_cb);
+        self->collect_socket_events = 1;
+    }
+    Py_RETURN_NONE;
+}
+
+
+static PyObject *
+do_multi_socket_events(CurlMultiObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *events;
+    int i;
+
+    if (check_multi_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "socket_events") != 0) {
+        return NULL;
+    }
+    if (!self->collect_socket_events) {
+        PyErr_SetString(ErrorObject, "socket events are not collected; call collect_socket_events() first");
+        return NULL;
+    }
+    events = PyList_New((Py_ssize_t) self->num_socket_events);
+    if (events == NULL) {
+        return NULL;
+    }
+    for (i = 0; i < self->num_socket_events; i++) {
+        const CurlSocketEvent *event = &self->socket_events[i];
+        PyObject *v = Py_BuildValue("(Ni)", PyLong_FromCurlSocket(event->fd), event->what);
+
+        if (v == NULL) {
+            Py_DECREF(events);
+            return NULL;
+        }
+        PyList_SET_ITEM(events, i, v);
+    }
+    self->num_socket_events = 0;
+    return events;
+}
+
+
 /* --------------- perform --------------- */
 
 static PyObject *
@@ -1045,14 +1337,10 @@ check_multi_add_remove(const CurlMultiObject *self, const CurlObject *obj)
 
 
 static PyObject *
-do_multi_add_handle(CurlMultiObject *self, PyObject *args)
+util_multi_add_handle(CurlMultiObject *self, CurlObject *obj)
 {
-    CurlObject *obj;
     CURLMcode res;
 
-    if (!PyArg_ParseTuple(args, "O!:add_handle", p_Curl_Type, &obj)) {
-        return NULL;
-    }
     if (check_multi_add_remove(self, obj) != 0) {
         return NULL;
     }
@@ -1070,6 +1358,7 @@ do_multi_add_handle(CurlMultiObject *self, PyObject *args)
     }
 
     assert(obj->multi_stack == NULL);
+    util_curl_begin_transfer(obj);
     /* Allow threads because callbacks can be invoked */
     PYCURL_BEGIN_ALLOW_THREADS
     res = curl_multi_add_handle(self->multi_handle, obj->handle);
@@ -1093,14 +1382,10 @@ do_multi_add_handle(CurlMultiObject *self, PyObject *args)
 
 
 static PyObject *
-do_multi_remove_handle(CurlMultiObject *self, PyObject *args)
+util_multi_remove_handle(CurlMultiObject *self, CurlObject *obj)
 {
-    CurlObject *obj;
     CURLMcode res;
 
-    if (!PyArg_ParseTuple(args, "O!:remove_handle", p_Curl_Type, &obj)) {
-        return NULL;
-    }
     if (check_multi_add_remove(self, obj) != 0) {
         return NULL;
     }
@@ -1131,6 +1416,39 @@ done:
 }
 
 
+/* Both handles change, so both are locked */
+static PyObject *
+do_multi_add_handle(CurlMultiObject *self, PyObject *args)
+{
+    CurlObject *obj;
+    PyObject *res;
+
+    if (!PyArg_ParseTuple(args, "O!:add_handle", p_Curl_Type, &obj)) {
+        return NULL;
+    }
+    Py_BEGIN_CRITICAL_SECTION2(self, obj);
+    res = util_multi_add_handle(self, obj);
+    Py_END_CRITICAL_SECTION2();
+    return res;
+}
+
+
+static PyObject *
+do_multi_remove_handle(CurlMultiObject *self, PyObject *args)
+{
+    CurlObject *obj;
+    PyObject *res;
+
+    if (!PyArg_ParseTuple(args, "O!:remove_handle", p_Curl_Type, &obj)) {
+        return NULL;
+    }
+    Py_BEGIN_CRITICAL_SECTION2(self, obj);
+    res = util_multi_remove_handle(self, obj);
+    Py_END_CRITICAL_SECTION2();
+    return res;
+}
+
+
 /* --------------- fdset ---------------------- */
 
 static PyObject *
@@ -1196,79 +1514,391 @@ error:
 }
 
 
+/* Raise pycurl.error for a failed multi call */
+static int
+util_multi_set_error(CURLMcode res, const char *msg)
+{
+    PyObject *v = Py_BuildValue("(is)", (int) res, msg);
+
+    if (v != NULL) {
+        PyErr_SetObject(ErrorObject, v);
+        Py_DECREF(v);
+    }
+    return -1;
+}
+
+
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 66, 0)
+/* --------------- poll --------------- */
+
+static PyObject *
+do_multi_poll(CurlMultiObject *self, PyObject *args, PyObject *kwds)
+{
+    double timeout;
+    PyObject *extra_fds = Py_None;
+    PyObject *seq = NULL, *ready = NULL, *ret = NULL;
+    struct curl_waitfd *fds = NULL;
+    Py_ssize_t i, n = 0;
+    int numfds = 0;
+    CURLMcode res;
+    static char *kwlist[] = {"timeout", "extra_fds", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "d|O:poll", kwlist, &timeout, &extra_fds)) {
+        return NULL;
+    }
+    if (check_multi_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "poll") != 0) {
+        return NULL;
+    }
+    if (!(timeout >= 0 && timeout * 1000 <= INT_MAX)) {
+        PyErr_SetString(PyExc_OverflowError, "invalid timeout period");
+        return NULL;
+    }
+
+    if (extra_fds != Py_None) {
+        seq = PySequence_Fast(extra_fds, "extra_fds must be an iterable of file descriptors");
+        if (seq == NULL) {
+            return NULL;
+        }
+        n = PySequence_Fast_GET_SIZE(seq);
+        fds = PyMem_New(struct curl_waitfd, n > 0 ? n : 1);
+        if (fds == NULL) {
+            PyErr_NoMemory();
+            goto done;
+        }
+        for (i = 0; i < n; i++) {
+            PyObject *item = PySequence_Fast_GET_ITEM(seq, i);
+            int fd, events = CURL_WAIT_POLLIN;
+
+            /* a file descriptor, or a (file descriptor, events) tuple */
+            if (PyTuple_Check(item)) {
+                if (PyTuple_GET_SIZE(item) != 2) {
+                    PyErr_SetString(PyExc_TypeError, "extra_fds items must be file descriptors or (fd, events) tuples");
+                    goto done;
+                }
+                if (pycurl_long_as_int(PyTuple_GET_ITEM(item, 1), &events) != 0) {
+                    goto done;
+                }
+                item = PyTuple_GET_ITEM(item, 0);
+            }
+            fd = PyObject_AsFileDescriptor(item);
+            if (fd < 0) {
+                goto done;
+            }
+            fds[i].fd = (curl_socket_t) fd;
+            fds[i].events = (short) events;
+            fds[i].revents = 0;
+        }
+    }
+
+    PYCURL_BEGIN_ALLOW_THREADS
+    res = curl_multi_poll(self->multi_handle, fds, (unsigned int) n, (int) (timeout * 1000), &numfds);
+    PYCURL_END_ALLOW_THREADS
+    if (res != CURLM_OK) {
+        util_multi_set_error(res, "poll failed");
+        goto done;
+    }
+
+    if ((ready = PyList_New((Py_ssize_t)0)) == NULL) {
+        goto done;
+    }
+    for (i = 0; i < n; i++) {
+        if (fds[i].revents != 0) {
+            PyObject *v = Py_BuildValue("(ii)", (int) fds[i].fd, (int) fds[i].revents);
+            if (v == NULL || PyList_Append(ready, v) != 0) {
+                Py_XDECREF(v);
+                goto done;
+            }
+            Py_DECREF(v);
+        }
+    }
+    /* Return (number of ready file descriptors, [(extra fd, revents)]) */
+    ret = Py_BuildValue("(iO)", numfds, ready);
+
+done:
+    Py_XDECREF(ready);
+    PyMem_Free(fds);
+    Py_XDECREF(seq);
+    return ret;
+}
+#endif
+
+
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 68, 0)
+/* --------------- wakeup --------------- */
+
+/* Safe to call from any thread while another one waits in poll() or run():
+ * only the handle itself has to exist. */
+static PyObject *
+do_multi_wakeup(CurlMultiObject *self, PyObject *Py_UNUSED(ignored))
+{
+    CURLMcode res;
+
+    if (check_multi_state(self, PYCURL_REQUIRE_HANDLE, "wakeup") != 0) {
+        return NULL;
+    }
+    res = curl_multi_wakeup(self->multi_handle);
+    if (res != CURLM_OK) {
+        CURLERROR_MSG("wakeup failed");
+    }
+    Py_RETURN_NONE;
+}
+#endif
+
+
 /* --------------- info_read --------------- */
 
+/* Look up the Curl object of a completed transfer and finish it: hand over
+ * data held back by WRITEFUNCTION min_chunk and complete an MmapSink.
+ * Returns a new reference, as the callback may drop the multi's reference
+ * to the handle, and stores the transfer's result in *result. If finishing
+ * raised, such as a KeyboardInterrupt in the callback, the exception is
+ * left set and the Curl object is still returned: libcurl has dequeued the
+ * message, so the caller must keep the result. Returns NULL with an
+ * exception set if the Curl object cannot be found. */
+static CurlObject *
+util_multi_finish_done(CURLMsg *msg, CURLcode *result)
+{
+    CurlObject *co = NULL;
+    CURLcode res;
+
+    /* Fetch the curl object that corresponds to the curl handle in the message */
+    res = curl_easy_getinfo(msg->easy_handle, CURLINFO_PRIVATE, (char **) &co);
+    if (res != CURLE_OK || co == NULL) {
+        PyObject *v = Py_BuildValue("(is)", (int) res, "Unable to fetch curl handle from curl object");
+        if (v != NULL) {
+            PyErr_SetObject(ErrorObject, v);
+            Py_DECREF(v);
+        }
+        return NULL;
+    }
+    assert(PyObject_IsInstance((PyObject *) co, (PyObject *) p_Curl_Type) == 1);
+    if (msg->msg != CURLMSG_DONE) {
+        /* FIXME: what does this mean ??? */
+    }
+    *result = msg->data.result;
+    Py_INCREF(co);
+    if (*result == CURLE_OK) {
+        *result = write_callback_flush(co);
+    }
+    co->w_cb_pending_len = 0;
+    *result = sink_finish_transfer(co, *result);
+    return co;
+}
+
+
+/* Put (curl, code) pairs back at the front of the done stash, where the next
+ * info_read() finds them. Keeps the exception that is set. */
+static void
+util_multi_stash_done(CurlMultiObject *self, PyObject *pairs)
+{
+    PyObject *exc_type, *exc_value, *exc_tb;
+
+    if (PyList_GET_SIZE(pairs) == 0) {
+        return;
+    }
+    PyErr_Fetch(&exc_type, &exc_value, &exc_tb);
+    if (self->done_stash == NULL) {
+        self->done_stash = PyList_New(0);
+    }
+    if (self->done_stash == NULL ||
+        PyList_SetSlice(self->done_stash, 0, 0, pairs) != 0) {
+        PyErr_WriteUnraisable((PyObject *) self);
+    }
+    PyErr_Restore(exc_type, exc_value, exc_tb);
+}
+
+
+/* Return a (curl, code) pair for a finished transfer. */
 static PyObject *
-do_multi_info_read(CurlMultiObject *self, PyObject *args)
+util_multi_code_entry(CurlObject *co, CURLcode result)
 {
-    PyObject *ret = NULL;
-    PyObject *ok_list = NULL, *err_list = NULL;
-    CURLMsg *msg;
-    int in_queue = 0, num_results = INT_MAX;
+    PyObject *code, *v;
 
-    /* Sanity checks */
-    if (!PyArg_ParseTuple(args, "|i:info_read", &num_results)) {
+    code = PyLong_FromLong((long) result);
+    if (code == NULL) {
         return NULL;
     }
-    if (num_results <= 0) {
-        PyErr_SetString(ErrorObject, "argument to info_read must be greater than zero");
+    v = PyTuple_New(2);
+    if (v == NULL) {
+        Py_DECREF(code);
         return NULL;
     }
-    /* curl_multi_info_read() is callback-safe (just drains a queue), so
-     * skip PYCURL_REQUIRE_NOT_RUNNING — M_NOTIFY_INFO_READ users drain
-     * results from inside the notify callback. */
-    if (check_multi_state(self, PYCURL_REQUIRE_HANDLE, "info_read") != 0) {
+    PyTuple_SET_ITEM(v, 0, Py_NewRef((PyObject *) co));
+    PyTuple_SET_ITEM(v, 1, code);
+    return v;
+}
+
+
+/* Return what info_read() reports for a finished transfer: the curl object
+ * itself on success, or a (curl, code, message) tuple on failure. */
+static PyObject *
+util_multi_done_entry(CurlObject *co, CURLcode result)
+{
+    PyObject *error_str;
+    PyObject *v;
+
+    if (result == CURLE_OK) {
+        return Py_NewRef((PyObject *) co);
+    }
+    error_str = PyUnicode_DecodeLocale(co->error, "surrogateescape");
+    if (error_str == NULL) {
         return NULL;
     }
+    v = Py_BuildValue("(OiO)", (PyObject *) co, (int) result, error_str);
+    Py_DECREF(error_str);
+    return v;
+}
 
-    if ((ok_list = PyList_New((Py_ssize_t)0)) == NULL) goto error;
-    if ((err_list = PyList_New((Py_ssize_t)0)) == NULL) goto error;
+
+/* Read up to `num_results` finished transfers into the lists and store the
+ * number of messages left in *in_queue. With `err_list` NULL every transfer
+ * is added to `ok_list` as a (curl, code) pair; otherwise as info_read()
+ * reports them. Returns 0, or -1 with an exception set; the transfers read
+ * by a call that fails are stashed for the next one, as libcurl will not
+ * report them again. */
+static int
+util_multi_read_done(CurlMultiObject *self, int num_results, int *in_queue,
+                     PyObject *ok_list, PyObject *err_list)
+{
+    CURLMsg *msg;
+    PyObject *pairs;
+    Py_ssize_t i;
+
+    *in_queue = 0;
+
+    /* (curl, code) pairs of the transfers read by this call. Transfers that
+     * completed while iter_chunks() ran the multi, or that a failed call
+     * read, come first. */
+    if (self->done_stash != NULL) {
+        Py_ssize_t n = PyList_GET_SIZE(self->done_stash);
+
+        if (n > num_results) {
+            n = num_results;
+        }
+        pairs = PyList_GetSlice(self->done_stash, 0, n);
+        if (pairs == NULL) {
+            return -1;
+        }
+        if (PyList_SetSlice(self->done_stash, 0, n, NULL) != 0) {
+            Py_DECREF(pairs);
+            return -1;
+        }
+        num_results -= (int) n;
+        *in_queue = (int) PyList_GET_SIZE(self->done_stash);
+    } else {
+        pairs = PyList_New(0);
+        if (pairs == NULL) {
+            return -1;
+        }
+    }
 
     /* Loop through up to 'num_results' messages */
     while (num_results-- > 0) {
-        CURLcode res;
-        CurlObject *co = NULL;
+        CURLcode result;
+        CurlObject *co;
+        PyObject *pair;
+        int rv;
 
-        if ((msg = curl_multi_info_read(self->multi_handle, &in_queue)) == NULL) {
+        if ((msg = curl_multi_info_read(self->multi_handle, in_queue)) == NULL) {
             break;
         }
-
-        /* Fetch the curl object that corresponds to the curl handle in the message */
-        res = curl_easy_getinfo(msg->easy_handle, CURLINFO_PRIVATE, (char **) &co);
-        if (res != CURLE_OK || co == NULL) {
-            Py_DECREF(err_list);
-            Py_DECREF(ok_list);
-            CURLERROR_MSG("Unable to fetch curl handle from curl object");
-        }
-        assert(PyObject_IsInstance((PyObject *) co, (PyObject *) p_Curl_Type) == 1);
-        if (msg->msg != CURLMSG_DONE) {
-            /* FIXME: what does this mean ??? */
+        co = util_multi_finish_done(msg, &result);
+        if (co == NULL) {
+            goto error;
         }
-        if (msg->data.result == CURLE_OK) {
-            /* Append curl object to list of objects which succeeded */
-            if (PyList_Append(ok_list, (PyObject *)co) != 0) {
-                goto error;
+        if (PyErr_Occurred()) {
+            /* finishing raised; keep the transfer with the others */
+            PyObject *exc_type, *exc_value, *exc_tb;
+
+            PyErr_Fetch(&exc_type, &exc_value, &exc_tb);
+            pair = util_multi_code_entry(co, result);
+            Py_DECREF(co);
+            if (pair == NULL || PyList_Append(pairs, pair) != 0) {
+                PyErr_WriteUnraisable((PyObject *) self);
             }
+            Py_XDECREF(pair);
+            PyErr_Restore(exc_type, exc_value, exc_tb);
+            goto error;
         }
-        else {
-            /* Create a result tuple that will get added to err_list. */
-            PyObject *error_str = NULL;
-            PyObject *v;
-            error_str = PyUnicode_DecodeLocale(co->error, "surrogateescape");
-            if (error_str == NULL) {
-                goto error;
-            }
-            v = Py_BuildValue("(OiO)", (PyObject *)co, (int)msg->data.result, error_str);
-            /* Append curl object to list of objects which failed */
-            if (v == NULL || PyList_Append(err_list, v) != 0) {
-                Py_XDECREF(error_str);
-                Py_XDECREF(v);
+        pair = util_multi_code_entry(co, result);
+        Py_DECREF(co);
+        if (pair == NULL) {
+            goto error;
+        }
+        rv = PyList_Append(pairs, pair);
+        Py_DECREF(pair);
+        if (rv != 0) {
+            goto error;
+        }
+    }
+
+    for (i = 0; i < PyList_GET_SIZE(pairs); i++) {
+        PyObject *pair = PyList_GET_ITEM(pairs, i);
+        PyObject *entry;
+        CURLcode result;
+        int rv;
+
+        if (err_list == NULL) {
+            rv = PyList_Append(ok_list, pair);
+        } else {
+            result = (CURLcode) PyLong_AsLong(PyTuple_GET_ITEM(pair, 1));
+            entry = util_multi_done_entry((CurlObject *) PyTuple_GET_ITEM(pair, 0), result);
+            if (entry == NULL) {
                 goto error;
             }
-            Py_DECREF(v);
-            Py_DECREF(error_str);
+            /* Append to the list of objects which succeeded or failed */
+            rv = PyList_Append(result == CURLE_OK ? ok_list : err_list, entry);
+            Py_DECREF(entry);
+        }
+        if (rv != 0) {
+            goto error;
         }
     }
+    Py_DECREF(pairs);
+    return 0;
+
+error:
+    util_multi_stash_done(self, pairs);
+    Py_DECREF(pairs);
+    return -1;
+}
+
+
+static int
+util_multi_info_read_args(CurlMultiObject *self, PyObject *args, const char *fmt, int *num_results)
+{
+    *num_results = INT_MAX;
+    if (!PyArg_ParseTuple(args, fmt, num_results)) {
+        return -1;
+    }
+    if (*num_results <= 0) {
+        PyErr_SetString(ErrorObject, "argument to info_read must be greater than zero");
+        return -1;
+    }
+    /* curl_multi_info_read() is callback-safe (just drains a queue), so
+     * skip PYCURL_REQUIRE_NOT_RUNNING — M_NOTIFY_INFO_READ users drain
+     * results from inside the notify callback. */
+    return check_multi_state(self, PYCURL_REQUIRE_HANDLE, "info_read");
+}
+
+
+static PyObject *
+do_multi_info_read(CurlMultiObject *self, PyObject *args)
+{
+    PyObject *ret = NULL;
+    PyObject *ok_list = NULL, *err_list = NULL;
+    int in_queue, num_results;
+
+    if (util_multi_info_read_args(self, args, "|i:info_read", &num_results) != 0) {
+        return NULL;
+    }
+
+    if ((ok_list = PyList_New((Py_ssize_t)0)) == NULL) goto error;
+    if ((err_list = PyList_New((Py_ssize_t)0)) == NULL) goto error;
+
+    if (util_multi_read_done(self, num_results, &in_queue, ok_list, err_list) != 0) {
+        goto error;
+    }
     /* Return (number of queued messages, [ok_objects], [error_objects]) */
     ret = Py_BuildValue("(iOO)", in_queue, ok_list, err_list);
 error:
@@ -1278,6 +1908,343 @@ error:
 }
 
 
+static PyObject *
+do_multi_info_read_codes(CurlMultiObject *self, PyObject *args)
+{
+    PyObject *ret = NULL;
+    PyObject *done_list;
+    int in_queue, num_results;
+
+    if (util_multi_info_read_args(self, args, "|i:info_read_codes", &num_results) != 0) {
+        return NULL;
+    }
+
+    if ((done_list = PyList_New((Py_ssize_t)0)) == NULL) {
+        return NULL;
+    }
+    if (util_multi_read_done(self, num_results, &in_queue, done_list, NULL) == 0) {
+        /* Return (number of queued messages, [(curl, code), ...]) */
+        ret = Py_BuildValue("(iO)", in_queue, done_list);
+    }
+    Py_DECREF(done_list);
+    return ret;
+}
+
+
+/* --------------- run until --------------- */
+
+/* Drain completion messages, keeping those of transfers other than `target`
+ * for info_read(). Returns 1 when `target` completed, storing its result,
+ * 0 when it did not, or -1 with an exception set. */
+static int
+util_multi_read_target_done(CurlMultiObject *self, CurlObject *target, CURLcode *target_result)
+{
+    CURLMsg *msg;
+    PyObject *exc_type, *exc_value, *exc_tb;
+    int in_queue = 0;
+    int found = 0;
+
+    while ((msg = curl_multi_info_read(self->multi_handle, &in_queue)) != NULL) {
+        CURLcode result;
+        CurlObject *co;
+        PyObject *entry;
+
+        co = util_multi_finish_done(msg, &result);
+        if (co == NULL) {
+            return -1;
+        }
+        if (co == target) {
+            Py_DECREF(co);
+            *target_result = result;
+            found = 1;
+            if (PyErr_Occurred()) {
+                return -1;
+            }
+            continue;
+        }
+        if (self->done_stash == NULL && (self->done_stash = PyList_New(0)) == NULL) {
+            Py_DECREF(co);
+            return -1;
+        }
+        /* stashed even if finishing raised, as libcurl has dequeued it */
+        PyErr_Fetch(&exc_type, &exc_value, &exc_tb);
+        entry = util_multi_code_entry(co, result);
+        Py_DECREF(co);
+        if (entry == NULL || PyList_Append(self->done_stash, entry) != 0) {
+            Py_XDECREF(entry);
+            Py_XDECREF(exc_type);
+            Py_XDECREF(exc_value);
+            Py_XDECREF(exc_tb);
+            return -1;
+        }
+        Py_DECREF(entry);
+        if (exc_type != NULL) {
+            PyErr_Restore(exc_type, exc_value, exc_tb);
+            return -1;
+        }
+    }
+    return found;
+}
+
+
+/* Call curl_multi_perform with the GIL released and store the number of
+ * running transfers in *running. Returns 0, or -1 with an exception set. */
+static int
+util_multi_perform_round(CurlMultiObject *self, int *running)
+{
+    CURLMcode res;
+
+    if (check_multi_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "perform") != 0) {
+        return -1;
+    }
+    PYCURL_BEGIN_ALLOW_THREADS
+    res = curl_multi_perform(self->multi_handle, running);
+    PYCURL_END_ALLOW_THREADS
+    if (check_pending_python_exception_or_signal() != 0) {
+        return -1;
+    }
+    if (res != CURLM_OK && res != CURLM_CALL_MULTI_PERFORM) {
+        return util_multi_set_error(res, "perform failed");
+    }
+    return 0;
+}
+
+
+/* Wait with the GIL released for activity on the transfers of `self`, for
+ * at most `timeout_ms`. Returns 0, or -1 with an exception set. */
+static int
+util_multi_poll_round(CurlMultiObject *self, int timeout_ms)
+{
+    CURLMcode res;
+
+    PYCURL_BEGIN_ALLOW_THREADS
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 66, 0)
+    res = curl_multi_poll(self->multi_handle, NULL, 0, timeout_ms, NULL);
+#else
+    res = curl_multi_wait(self->multi_handle, NULL, 0, timeout_ms, NULL);
+#endif
+    PYCURL_END_ALLOW_THREADS
+    if (check_pending_python_exception_or_signal() != 0) {
+        return -1;
+    }
+    if (res != CURLM_OK) {
+        return util_multi_set_error(res, "poll failed");
+    }
+    return 0;
+}
+
+
+/* Run the transfers of `self`, with the GIL released while waiting, until
+ * `target` completes or `stop(arg)` returns true. Transfers other than
+ * `target` that complete meanwhile are reported by the next info_read().
+ * Returns 1 when `target` completed, storing its result, 0 when stopped,
+ * or -1 with an exception set. */
+PYCURL_INTERNAL int
+util_multi_run_until(CurlMultiObject *self, CurlObject *target,
+                     int (*stop)(void *), void *arg, CURLcode *target_result)
+{
+    for (;;) {
+        int running = 0;
+        int rv;
+
+        if (target->multi_stack != self) {
+            PyErr_SetString(ErrorObject, "curl object not on this multi-stack");
+            return -1;
+        }
+        if (util_multi_perform_round(self, &running) != 0) {
+            return -1;
+        }
+        rv = util_multi_read_target_done(self, target, target_result);
+        if (rv != 0) {
+            return rv;
+        }
+        if (stop(arg)) {
+            return 0;
+        }
+        if (util_multi_poll_round(self, PYCURL_MULTI_POLL_INTERVAL_MS) != 0) {
+            return -1;
+        }
+    }
+}
+
+
+/* --------------- run --------------- */
+
+#ifdef HAVE_EPOLL_DRIVER
+/* Wait with the GIL released for at most `timeout_ms` for events of the
+ * epoll driver and pass them to curl_multi_socket_action, storing the number
+ * of running transfers in *running. A negative `timeout_ms` handles libcurl's
+ * timeouts instead of waiting. Returns 0, or -1 with an exception set. */
+static int
+util_multi_epoll_round(CurlMultiObject *self, int timeout_ms, int *running)
+{
+    CurlEpollDriver *driver = self->epoll;
+    CURLMcode res = CURLM_OK;
+    int i, n = 0, wait_errno = 0;
+
+    if (check_multi_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "run") != 0) {
+        return -1;
+    }
+    PYCURL_BEGIN_ALLOW_THREADS
+    if (timeout_ms < 0) {
+        res = curl_multi_socket_action(self->multi_handle, CURL_SOCKET_TIMEOUT, 0, running);
+    } else {
+        n = epoll_wait(driver->epoll_fd, driver->events, PYCURL_EPOLL_MAX_EVENTS, timeout_ms);
+        if (n < 0) {
+            wait_errno = errno;
+        }
+    }
+    for (i = 0; i < n && res == CURLM_OK; i++) {
+        const struct epoll_event *ev = &driver->events[i];
+
+        if (ev->data.fd == driver->timer_fd) {
+            uint64_t expirations;
+
+            if (read(driver->timer_fd, &expirations, sizeof(expirations)) < 0) {
+                /* raced with a rearm by an earlier event of this round */
+                continue;
+            }
+            res = curl_multi_socket_action(self->multi_handle, CURL_SOCKET_TIMEOUT, 0, running);
+        } else {
+            int mask = 0;
+
+            if (ev->events & EPOLLIN) {
+                mask |= CURL_CSELECT_IN;
+            }
+            if (ev->events & EPOLLOUT) {
+                mask |= CURL_CSELECT_OUT;
+            }
+            if (ev->events & (EPOLLERR | EPOLLHUP)) {
+                mask |= CURL_CSELECT_ERR;
+            }
+            res = curl_multi_socket_action(self->multi_handle, ev->data.fd, mask, running);
+        }
+    }
+    PYCURL_END_ALLOW_THREADS
+
+    if (check_pending_python_exception_or_signal() != 0) {
+        return -1;
+    }
+    if (n < 0 && wait_errno != EINTR) {
+        errno = wait_errno;
+        PyErr_SetFromErrno(PyExc_OSError);
+        return -1;
+    }
+    if (res != CURLM_OK) {
+        return util_multi_set_error(res, "multi_socket_action failed");
+    }
+    return 0;
+}
+#endif
+
+
+static PyObject *
+do_multi_run(CurlMultiObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *timeout_obj = Py_None, *on_done = Py_None;
+    double deadline = 0;
+    int running = 0, use_epoll = 0;
+    /* negative until the first wait, and after on_done */
+    int timeout_ms = -1;
+    static char *kwlist[] = {"timeout", "on_done", "epoll", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OO$p:run", kwlist, &timeout_obj, &on_done, &use_epoll)) {
+        return NULL;
+    }
+    if (timeout_obj != Py_None) {
+        double timeout = PyFloat_AsDouble(timeout_obj);
+
+        if (timeout == -1.0 && PyErr_Occurred()) {
+            return NULL;
+        }
+        if (!(timeout >= 0)) {
+            PyErr_SetString(PyExc_ValueError, "timeout must be None or a non-negative number");
+            return NULL;
+        }
+        deadline = pycurl_monotonic() + timeout;
+    }
+    if (on_done != Py_None && !PyCallable_Check(on_done)) {
+        PyErr_SetString(PyExc_TypeError, "on_done must be callable or None");
+        return NULL;
+    }
+    if (use_epoll) {
+#ifdef HAVE_EPOLL_DRIVER
+        if (check_multi_state(self, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "run") != 0) {
+            return NULL;
+        }
+        if (util_multi_epoll_attach(self) != 0) {
+            return NULL;
+        }
+#else
+        PyErr_SetString(ErrorObject, "the epoll driver is not available on this platform");
+        return NULL;
+#endif
+    }
+
+    for (;;) {
+#ifdef HAVE_EPOLL_DRIVER
+        if (use_epoll) {
+            if (util_multi_epoll_round(self, timeout_ms, &running) != 0) {
+                return NULL;
+            }
+        } else
+#endif
+        {
+            if (timeout_ms >= 0 && util_multi_poll_round(self, timeout_ms) != 0) {
+                return NULL;
+            }
+            if (util_multi_perform_round(self, &running) != 0) {
+                return NULL;
+            }
+        }
+        if (on_done != Py_None) {
+            PyObject *done_list, *v;
+            int in_queue;
+
+            done_list = PyList_New(0);
+            if (done_list == NULL) {
+                return NULL;
+            }
+            if (util_multi_read_done(self, INT_MAX, &in_queue, done_list, NULL) != 0) {
+                Py_DECREF(done_list);
+                return NULL;
+            }
+            if (PyList_GET_SIZE(done_list) > 0) {
+                v = PyObject_CallOneArg(on_done, done_list);
+                Py_DECREF(done_list);
+                if (v == NULL) {
+                    return NULL;
+                }
+                Py_DECREF(v);
+                /* on_done may have added handles */
+                if (running == 0) {
+                    timeout_ms = -1;
+                    continue;
+                }
+            } else {
+                Py_DECREF(done_list);
+            }
+        }
+        if (running == 0) {
+            break;
+        }
+        timeout_ms = PYCURL_MULTI_POLL_INTERVAL_MS;
+        if (timeout_obj != Py_None) {
+            double remaining = deadline - pycurl_monotonic();
+
+            if (remaining <= 0) {
+                break;
+            }
+            if (remaining * 1000 < timeout_ms) {
+                /* round up so that the deadline has passed when we wake */
+                timeout_ms = (int) (remaining * 1000) + 1;
+            }
+        }
+    }
+    return PyLong_FromLong(running);
+}
+
+
 /* --------------- select --------------- */
 
 static PyObject *
@@ -1401,23 +2368,59 @@ do_multi_sq_contains(PyObject *o, PyObject *obj)
 
 /* --------------- methods --------------- */
 
+PYCURL_LOCKED_METHOD(do_multi_close, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_fdset, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_info_read, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_info_read_codes, CurlMultiObject)
+PYCURL_LOCKED_METHOD_KW(do_multi_run, CurlMultiObject)
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 66, 0)
+PYCURL_LOCKED_METHOD_KW(do_multi_poll, CurlMultiObject)
+#endif
+PYCURL_LOCKED_METHOD_KW(do_multi_iter_chunks, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_perform, CurlMultiObject)
+PYCURL_LOCKED_METHOD_KW(do_multi_socket_action, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_socket_all, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_collect_socket_events, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_socket_events, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_setopt, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_timeout, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_assign, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_unassign, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_select, CurlMultiObject)
+#ifdef HAVE_CURL_MULTI_NOTIFY
+PYCURL_LOCKED_METHOD(do_multi_notify_enable, CurlMultiObject)
+PYCURL_LOCKED_METHOD(do_multi_notify_disable, CurlMultiObject)
+#endif
+
+
 PYCURL_INTERNAL PyMethodDef curlmultiobject_methods[] = {
     {"add_handle", (PyCFunction)do_multi_add_handle, METH_VARARGS, multi_add_handle_doc},
-    {"close", (PyCFunction)do_multi_close, METH_NOARGS, multi_close_doc},
-    {"fdset", (PyCFunction)do_multi_fdset, METH_NOARGS, multi_fdset_doc},
-    {"info_read", (PyCFunction)do_multi_info_read, METH_VARARGS, multi_info_read_doc},
-    {"perform", (PyCFunction)do_multi_perform, METH_NOARGS, multi_perform_doc},
-    {"socket_action", (PyCFunction)do_multi_socket_action, METH_VARARGS, multi_socket_action_doc},
-    {"socket_all", (PyCFunction)do_multi_socket_all, METH_NOARGS, multi_socket_all_doc},
-    {"setopt", (PyCFunction)do_multi_setopt, METH_VARARGS, multi_setopt_doc},
-    {"timeout", (PyCFunction)do_multi_timeout, METH_NOARGS, multi_timeout_doc},
-    {"assign", (PyCFunction)do_multi_assign, METH_VARARGS, multi_assign_doc},
-    {"unassign", (PyCFunction)do_multi_unassign, METH_VARARGS, multi_unassign_doc},
+    {"close", (PyCFunction)do_multi_close_locked, METH_NOARGS, multi_close_doc},
+    {"fdset", (PyCFunction)do_multi_fdset_locked, METH_NOARGS, multi_fdset_doc},
+    {"info_read", (PyCFunction)do_multi_info_read_locked, METH_VARARGS, multi_info_read_doc},
+    {"info_read_codes", (PyCFunction)do_multi_info_read_codes_locked, METH_VARARGS, multi_info_read_codes_doc},
+    {"run", (PyCFunction)do_multi_run_locked, METH_VARARGS | METH_KEYWORDS, multi_run_doc},
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 66, 0)
+    {"poll", (PyCFunction)do_multi_poll_locked, METH_VARARGS | METH_KEYWORDS, multi_poll_doc},
+#endif
+#if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 68, 0)
+    {"wakeup", (PyCFunction)do_multi_wakeup, METH_NOARGS, multi_wakeup_doc},
+#endif
+    {"iter_chunks", (PyCFunction)do_multi_iter_chunks_locked, METH_VARARGS | METH_KEYWORDS, multi_iter_chunks_doc},
+    {"perform", (PyCFunction)do_multi_perform_locked, METH_NOARGS, multi_perform_doc},
+    {"socket_action", (PyCFunction)do_multi_socket_action_locked, METH_VARARGS | METH_KEYWORDS, multi_socket_action_doc},
+    {"socket_all", (PyCFunction)do_multi_socket_all_locked, METH_NOARGS, multi_socket_all_doc},
+    {"collect_socket_events", (PyCFunction)do_multi_collect_socket_events_locked, METH_NOARGS, multi_collect_socket_events_doc},
+    {"socket_events", (PyCFunction)do_multi_socket_events_locked, METH_NOARGS, multi_socket_events_doc},
+    {"setopt", (PyCFunction)do_multi_setopt_locked, METH_VARARGS, multi_setopt_doc},
+    {"timeout", (PyCFunction)do_multi_timeout_locked, METH_NOARGS, multi_timeout_doc},
+    {"assign", (PyCFunction)do_multi_assign_locked, METH_VARARGS, multi_assign_doc},
+    {"unassign", (PyCFunction)do_multi_unassign_locked, METH_VARARGS, multi_unassign_doc},
     {"remove_handle", (PyCFunction)do_multi_remove_handle, METH_VARARGS, multi_remove_handle_doc},
-    {"select", (PyCFunction)do_multi_select, METH_VARARGS, multi_select_doc},
+    {"select", (PyCFunction)do_multi_select_locked, METH_VARARGS, multi_select_doc},
 #ifdef HAVE_CURL_MULTI_NOTIFY
-    {"notify_enable", (PyCFunction)do_multi_notify_enable, METH_VARARGS, multi_notify_enable_doc},
-    {"notify_disable", (PyCFunction)do_multi_notify_disable, METH_VARARGS, multi_notify_disable_doc},
+    {"notify_enable", (PyCFunction)do_multi_notify_enable_locked, METH_VARARGS, multi_notify_enable_doc},
+    {"notify_disable", (PyCFunction)do_multi_notify_disable_locked, METH_VARARGS, multi_notify_disable_doc},
 #endif
     {"__getstate__", (PyCFunction)do_curlmulti_getstate, METH_NOARGS, NULL},
     {"__setstate__", (PyCFunction)do_curlmulti_setstate, METH_VARARGS, NULL},
@@ -1464,8 +2467,10 @@ do_multi_getattro(PyObject *o, PyObject *n)
     if( !v && PyErr_ExceptionMatches(PyExc_AttributeError) )
     {
         PyErr_Clear();
+        Py_BEGIN_CRITICAL_SECTION(o);
         v = my_getattro(o, n, ((CurlMultiObject *)o)->dict,
                         curlmultiobject_constants, curlmultiobject_methods);
+        Py_END_CRITICAL_SECTION();
     }
     return v;
 }
@@ -1473,8 +2478,12 @@ do_multi_getattro(PyObject *o, PyObject *n)
 PYCURL_INTERNAL int
 do_multi_setattro(PyObject *o, PyObject *n, PyObject *v)
 {
+    int res;
     assert_multi_state((CurlMultiObject *)o);
-    return my_setattro(&((CurlMultiObject *)o)->dict, n, v);
+    Py_BEGIN_CRITICAL_SECTION(o);
+    res = my_setattro(&((CurlMultiObject *)o)->dict, n, v);
+    Py_END_CRITICAL_SECTION();
+    return res;
 }
 
 PYCURL_INTERNAL PyTypeObject CurlMulti_Type = {
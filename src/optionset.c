@@ -0,0 +1,393 @@
+#include "pycurl.h"
+#include "docstrings.h"
+
+/* An OptionSet converts the values of a mapping of options once: strings are
+ * encoded, lists become curl_slists and integers are converted to the C type
+ * of their option. apply() then sets them on a handle without going through
+ * setopt's argument dispatch. Values that need per-handle bookkeeping, such
+ * as callbacks, files or POSTFIELDS, are kept as objects and set by the same
+ * code as setopt.
+ *
+ * The set also keeps a handle with all of its options set. It is created with
+ * the set, which checks every value up front, and duphandle() copies it. */
+
+
+/*************************************************************************
+// entries
+**************************************************************************/
+
+/* A set holds one value per option and sets it on every handle it is applied
+ * to, so the objects a transfer writes to or reads from would be used by all
+ * of them at once. Only buffers without a read() method, which every handle
+ * uploads from its own offset, are allowed. Returns 0, or -1 with an
+ * exception set. */
+static int
+optionset_check_shareable(int option, PyObject *value)
+{
+    if (option != CURLOPT_WRITEDATA &&
+        option != CURLOPT_WRITEHEADER &&
+        option != CURLOPT_READDATA) {
+        return 0;
+    }
+    if (value == Py_None) {
+        return 0;
+    }
+    if (option == CURLOPT_READDATA && PyObject_CheckBuffer(value) &&
+        !PyObject_HasAttrString(value, "read")) {
+        return 0;
+    }
+    PyErr_Format(PyExc_TypeError,
+                 "OptionSet cannot hold a %.200s for WRITEDATA, WRITEHEADER or READDATA: "
+                 "every handle would use the same one, set it on each handle instead",
+                 Py_TYPE(value)->tp_name);
+    return -1;
+}
+
+
+/* Convert `value` for `option`. Returns 0, or -1 with an exception set. */
+static int
+optionset_compile(CurlOptionSetEntry *entry, CurlObject *curl, int option, PyObject *value)
+{
+    int which;
+
+    entry->option = option;
+    if (PyLong_Check(value)) {
+        switch (util_curl_int_option_kind(option)) {
+        case PYCURL_INT_OPTION_LONG:
+            entry->lvalue = PyLong_AsLong(value);
+            if (entry->lvalue == -1 && PyErr_Occurred()) {
+                return -1;
+            }
+            entry->kind = PYCURL_OPTIONSET_LONG;
+            return 0;
+        case PYCURL_INT_OPTION_OFF_T:
+            entry->offvalue = (curl_off_t) PyLong_AsLongLong(value);
+            if (entry->offvalue == -1 && PyErr_Occurred()) {
+                return -1;
+            }
+            entry->kind = PYCURL_OPTIONSET_OFF_T;
+            return 0;
+        }
+    } else if (PyText_Check(value)) {
+        PyObject *encoded_obj;
+
+        switch (util_curl_string_option_kind(option)) {
+        case PYCURL_STRING_OPTION_DEPRECATED:
+            if (PyErr_WarnEx(PyExc_DeprecationWarning, "setopt option is deprecated", 1) != 0) {
+                return -1;
+            }
+        case PYCURL_STRING_OPTION:
+            if (PyText_AsString_NoNUL(value, &encoded_obj) == NULL) {
+                return -1;
+            }
+            entry->obj = encoded_obj != NULL ? encoded_obj : Py_NewRef(value);
+            entry->kind = PYCURL_OPTIONSET_STRING;
+            return 0;
+        }
+    } else if ((which = PyListOrTuple_Check(value)) &&
+               util_curl_slist_slot(curl, option) != NULL) {
+        Py_ssize_t len = PyListOrTuple_Size(value, which);
+
+        if (len > 0) {
+            CurlSlistObject *slist_obj = NULL;
+            struct curl_slist *slist;
+
+            slist = pycurl_list_or_tuple_to_slist(which, value, len);
+            if (slist == NULL) {
+                return -1;
+            }
+            if (util_curlslist_update(&slist_obj, slist) != 0) {
+                curl_slist_free_all(slist);
+                return -1;
+            }
+            entry->obj = (PyObject *) slist_obj;
+            entry->kind = PYCURL_OPTIONSET_SLIST;
+            return 0;
+        }
+    }
+
+    /* everything else is set as setopt would */
+    entry->obj = Py_NewRef(value);
+    entry->kind = PYCURL_OPTIONSET_OBJECT;
+    return 0;
+}
+
+
+/* Set one converted option on `curl`. Returns 0, or -1 with an exception
+ * set. */
+static int
+optionset_apply_entry(const CurlOptionSetEntry *entry, CurlObject *curl)
+{
+    CURLoption option = (CURLoption) entry->option;
+    CURLcode res;
+    PyObject *v;
+
+    switch (entry->kind) {
+    case PYCURL_OPTIONSET_LONG:
+        res = curl_easy_setopt(curl->handle, option, entry->lvalue);
+        break;
+    case PYCURL_OPTIONSET_OFF_T:
+        res = curl_easy_setopt(curl->handle, option, entry->offvalue);
+        break;
+    case PYCURL_OPTIONSET_STRING:
+        res = curl_easy_setopt(curl->handle, option, PyBytes_AS_STRING(entry->obj));
+        break;
+    case PYCURL_OPTIONSET_SLIST:
+        res = curl_easy_setopt(curl->handle, option, ((CurlSlistObject *) entry->obj)->slist);
+        if (res == CURLE_OK) {
+            /* the slist is shared by every handle the set is applied to */
+            CurlSlistObject **slot = util_curl_slist_slot(curl, entry->option);
+            Py_XSETREF(*slot, (CurlSlistObject *) Py_NewRef(entry->obj));
+        }
+        break;
+    default:
+        v = util_curl_setopt(curl, entry->option, entry->obj, -1, 0);
+        if (v == NULL) {
+            return -1;
+        }
+        Py_DECREF(v);
+        return 0;
+    }
+    if (res != CURLE_OK) {
+        create_and_set_error_object(curl, (int) res);
+        return -1;
+    }
+    return 0;
+}
+
+
+static int
+optionset_apply(CurlOptionSetObject *self, CurlObject *curl)
+{
+    Py_ssize_t i;
+
+    for (i = 0; i < self->num_entries; i++) {
+        if (optionset_apply_entry(&self->entries[i], curl) != 0) {
+            return -1;
+        }
+    }
+    return 0;
+}
+
+
+/*************************************************************************
+// OptionSet
+**************************************************************************/
+
+PYCURL_INTERNAL PyObject *
+do_optionset_new(PyTypeObject *subtype, PyObject *args, PyObject *kwds)
+{
+    CurlOptionSetObject *self;
+    PyObject *mapping, *items;
+    Py_ssize_t i, n;
+    static char *kwlist[] = {"options", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O:OptionSet", kwlist, &mapping)) {
+        return NULL;
+    }
+    if (!PyMapping_Check(mapping) || PyListOrTuple_Check(mapping)) {
+        PyErr_SetString(PyExc_TypeError, "OptionSet argument must be a mapping of options to values");
+        return NULL;
+    }
+    items = PyMapping_Items(mapping);
+    if (items == NULL) {
+        return NULL;
+    }
+    n = PyList_GET_SIZE(items);
+
+    self = (CurlOptionSetObject *) subtype->tp_alloc(subtype, 0);
+    if (self == NULL) {
+        Py_DECREF(items);
+        return NULL;
+    }
+    self->entries = PyMem_Calloc(n > 0 ? n : 1, sizeof(CurlOptionSetEntry));
+    if (self->entries == NULL) {
+        PyErr_NoMemory();
+        goto error;
+    }
+    self->curl = (CurlObject *) PyObject_CallNoArgs((PyObject *) p_Curl_Type);
+    if (self->curl == NULL) {
+        goto error;
+    }
+
+    for (i = 0; i < n; i++) {
+        PyObject *item = PyList_GET_ITEM(items, i);
+        PyObject *key = PyTuple_GET_ITEM(item, 0);
+        CurlOptionSetEntry *entry = &self->entries[i];
+        int option;
+
+        if (!PyLong_Check(key)) {
+            PyErr_Format(PyExc_TypeError, "OptionSet options must be integers, not %.200s",
+                         Py_TYPE(key)->tp_name);
+            goto error;
+        }
+        if (pycurl_long_as_int(key, &option) != 0) {
+            goto error;
+        }
+        if (!util_curl_option_in_range(option)) {
+            PyErr_Format(PyExc_TypeError, "invalid option to OptionSet: %d", option);
+            goto error;
+        }
+        if (optionset_check_shareable(option, PyTuple_GET_ITEM(item, 1)) != 0) {
+            goto error;
+        }
+        if (optionset_compile(entry, self->curl, option, PyTuple_GET_ITEM(item, 1)) != 0) {
+            goto error;
+        }
+        self->num_entries++;
+        /* setting the option on our own handle rejects bad values now
+         * rather than in apply() */
+        if (optionset_apply_entry(entry, self->curl) != 0) {
+            goto error;
+        }
+    }
+    Py_DECREF(items);
+    return (PyObject *) self;
+
+error:
+    Py_DECREF(items);
+    Py_DECREF(self);
+    return NULL;
+}
+
+
+static int
+do_optionset_traverse(CurlOptionSetObject *self, visitproc visit, void *arg)
+{
+    Py_ssize_t i;
+
+    for (i = 0; i < self->num_entries; i++) {
+        Py_VISIT(self->entries[i].obj);
+    }
+    Py_VISIT(self->curl);
+    return 0;
+}
+
+
+static int
+do_optionset_clear(CurlOptionSetObject *self)
+{
+    Py_ssize_t i, n = self->num_entries;
+
+    self->num_entries = 0;
+    for (i = 0; i < n; i++) {
+        Py_CLEAR(self->entries[i].obj);
+    }
+    Py_CLEAR(self->curl);
+    return 0;
+}
+
+
+static void
+do_optionset_dealloc(CurlOptionSetObject *self)
+{
+    PyObject_GC_UnTrack(self);
+    do_optionset_clear(self);
+    PyMem_Free(self->entries);
+    self->entries = NULL;
+    Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+
+static PyObject *
+do_optionset_apply(CurlOptionSetObject *self, PyObject *args)
+{
+    CurlObject *curl;
+    int rv;
+
+    if (!PyArg_ParseTuple(args, "O!:apply", p_Curl_Type, &curl)) {
+        return NULL;
+    }
+    /* the same critical section as the methods of the Curl object */
+    Py_BEGIN_CRITICAL_SECTION(curl);
+    rv = check_curl_state(curl, PYCURL_REQUIRE_HANDLE | PYCURL_REQUIRE_NOT_RUNNING, "apply");
+    if (rv == 0) {
+        rv = optionset_apply(self, curl);
+    }
+    Py_END_CRITICAL_SECTION();
+    if (rv != 0) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+
+static PyObject *
+do_optionset_duphandle(CurlOptionSetObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *dup;
+
+    if (self->curl == NULL) {
+        PyErr_SetString(ErrorObject, "OptionSet has no template handle");
+        return NULL;
+    }
+    Py_BEGIN_CRITICAL_SECTION(self->curl);
+    dup = (PyObject *) do_curl_duphandle(self->curl, NULL);
+    Py_END_CRITICAL_SECTION();
+    return dup;
+}
+
+
+static Py_ssize_t
+do_optionset_len(CurlOptionSetObject *self)
+{
+    return self->num_entries;
+}
+
+
+static PyMethodDef optionsetobject_methods[] = {
+    {"apply", (PyCFunction)do_optionset_apply, METH_VARARGS, optionset_apply_doc},
+    {"duphandle", (PyCFunction)do_optionset_duphandle, METH_NOARGS, optionset_duphandle_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+
+static PySequenceMethods optionsetobject_as_sequence = {
+    (lenfunc)do_optionset_len,  /* sq_length */
+};
+
+
+PYCURL_INTERNAL PyTypeObject CurlOptionSet_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "pycurl.OptionSet",         /* tp_name */
+    sizeof(CurlOptionSetObject), /* tp_basicsize */
+    0,                          /* tp_itemsize */
+    (destructor)do_optionset_dealloc, /* tp_dealloc */
+    0,                          /* tp_print */
+    0,                          /* tp_getattr */
+    0,                          /* tp_setattr */
+    0,                          /* tp_reserved */
+    0,                          /* tp_repr */
+    0,                          /* tp_as_number */
+    &optionsetobject_as_sequence, /* tp_as_sequence */
+    0,                          /* tp_as_mapping */
+    0,                          /* tp_hash  */
+    0,                          /* tp_call */
+    0,                          /* tp_str */
+    0,                          /* tp_getattro */
+    0,                          /* tp_setattro */
+    0,                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC, /* tp_flags */
+    optionset_doc,              /* tp_doc */
+    (traverseproc)do_optionset_traverse, /* tp_traverse */
+    (inquiry)do_optionset_clear, /* tp_clear */
+    0,                          /* tp_richcompare */
+    0,                          /* tp_weaklistoffset */
+    0,                          /* tp_iter */
+    0,                          /* tp_iternext */
+    optionsetobject_methods,    /* tp_methods */
+    0,                          /* tp_members */
+    0,                          /* tp_getset */
+    0,                          /* tp_base */
+    0,                          /* tp_dict */
+    0,                          /* tp_descr_get */
+    0,                          /* tp_descr_set */
+    0,                          /* tp_dictoffset */
+    0,                          /* tp_init */
+    PyType_GenericAlloc,        /* tp_alloc */
+    (newfunc)do_optionset_new,  /* tp_new */
+    PyObject_GC_Del,            /* tp_free */
+};
+
+/* vi:ts=4:et:nowrap
+ */
@@ -1,4 +1,7 @@
 #include "pycurl.h"
+#if !defined(WIN32)
+#include <time.h>
+#endif
 
 #if defined(WIN32)
 PYCURL_INTERNAL curl_socket_t
@@ -53,5 +56,18 @@ pycurl_inet_ntop (int family, void *addr, char *string, size_t string_size)
 }
 #endif
 
+PYCURL_INTERNAL double
+pycurl_monotonic(void)
+{
+#if defined(WIN32)
+    return (double) GetTickCount64() / 1000.0;
+#else
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (double) ts.tv_sec + (double) ts.tv_nsec / 1e9;
+#endif
+}
+
 /* vi:ts=4:et:nowrap
  */
@@ -18,6 +18,12 @@
 #include <sys/un.h>
 #endif
 
+#if defined(__linux__)
+#include <sys/epoll.h>
+#include <sys/timerfd.h>
+#define HAVE_EPOLL_DRIVER
+#endif
+
 #if defined(WIN32)
 /*
  * Since setup.py uses a '-WX' in the CFLAGS (treat warnings as errors),
@@ -96,6 +102,10 @@ pycurl_inet_ntop (int family, void *addr, char *string, size_t string_size);
 #define inet_ntop(fam,addr,string,size) pycurl_inet_ntop(fam,addr,string,size)
 #endif
 
+/* Seconds since an arbitrary point, from a clock that does not jump */
+PYCURL_INTERNAL double
+pycurl_monotonic(void);
+
 #if !defined(LIBCURL_VERSION_NUM) || (LIBCURL_VERSION_NUM < 0x071300)
 #  error "Need libcurl version 7.19.0 or greater to compile pycurl."
 #endif
@@ -308,38 +318,80 @@ PYCURL_INTERNAL void pycurl_ssl_cleanup(void);
 #  define PYCURL_END_CALLBACK(retval) \
        PYCURL_PYTHON_LEAVE(); \
        return (retval)
+/* The thread state slots are read by other threads on free-threaded builds,
+   in check_curl_state() for instance, so they are accessed atomically there */
+#ifdef Py_GIL_DISABLED
+#  define PYCURL_LOAD_STATE(slot) \
+       ((PyThreadState *) _Py_atomic_load_ptr_relaxed(&(slot)))
+#  define PYCURL_STORE_STATE(slot, value) \
+       _Py_atomic_store_ptr_relaxed(&(slot), (value))
+#else
+#  define PYCURL_LOAD_STATE(slot) (slot)
+#  define PYCURL_STORE_STATE(slot, value) ((slot) = (value))
+#endif
 /* Replacement for Py_BEGIN_ALLOW_THREADS/Py_END_ALLOW_THREADS when python
    callbacks are expected during blocking i/o operations: self->state will hold
-   the handle to current thread to be used as context */
+   the handle to current thread to be used as context. The slot is set before
+   the thread state is detached, which also releases the critical section on
+   self, so that another thread never sees the object idle while it runs */
 #  define PYCURL_BEGIN_ALLOW_THREADS \
-       self->state = PyEval_SaveThread(); \
-       assert(self->state != NULL);
+       PYCURL_STORE_STATE(self->state, PyThreadState_Get()); \
+       (void) PyEval_SaveThread();
 #  define PYCURL_END_ALLOW_THREADS \
        assert(self->state != NULL); \
        PyEval_RestoreThread(self->state); \
-       self->state = NULL;
+       PYCURL_STORE_STATE(self->state, NULL);
 #  define PYCURL_BEGIN_ALLOW_THREADS_EASY \
        if (self->multi_stack == NULL) { \
-           self->state = PyEval_SaveThread(); \
-           assert(self->state != NULL); \
+           PYCURL_STORE_STATE(self->state, PyThreadState_Get()); \
        } else { \
-           self->multi_stack->state = PyEval_SaveThread(); \
-           assert(self->multi_stack->state != NULL); \
-       }
+           PYCURL_STORE_STATE(self->multi_stack->state, PyThreadState_Get()); \
+       } \
+       (void) PyEval_SaveThread();
 #  define PYCURL_END_ALLOW_THREADS_EASY \
        if (self->multi_stack == NULL) { \
            assert(self->state != NULL); \
            PyEval_RestoreThread(self->state); \
-           self->state = NULL; \
+           PYCURL_STORE_STATE(self->state, NULL); \
        } else { \
            assert(self->multi_stack->state != NULL); \
            PyEval_RestoreThread(self->multi_stack->state); \
-           self->multi_stack->state = NULL; \
+           PYCURL_STORE_STATE(self->multi_stack->state, NULL); \
        }
 
 #if PY_VERSION_HEX < 0x030D0000  /* Python 3.13 */
 #  define Py_IsFinalizing _Py_IsFinalizing
-#endif
+#  define Py_BEGIN_CRITICAL_SECTION(op) {
+#  define Py_END_CRITICAL_SECTION() }
+#  define Py_BEGIN_CRITICAL_SECTION2(a, b) {
+#  define Py_END_CRITICAL_SECTION2() }
+#endif
+
+/* Methods of Curl and CurlMulti objects run in a critical section on the
+   object. With the GIL this costs nothing; on free-threaded builds it keeps
+   two threads from changing the same handle at once, while different handles
+   are used in parallel. The section is released whenever the thread state
+   is detached, around blocking libcurl calls in particular. */
+#define PYCURL_LOCKED_METHOD(func, type) \
+    static PyObject * \
+    func##_locked(type *self, PyObject *args) \
+    { \
+        PyObject *res; \
+        Py_BEGIN_CRITICAL_SECTION(self); \
+        res = (PyObject *) func(self, args); \
+        Py_END_CRITICAL_SECTION(); \
+        return res; \
+    }
+#define PYCURL_LOCKED_METHOD_KW(func, type) \
+    static PyObject * \
+    func##_locked(type *self, PyObject *args, PyObject *kwds) \
+    { \
+        PyObject *res; \
+        Py_BEGIN_CRITICAL_SECTION(self); \
+        res = (PyObject *) func(self, args, kwds); \
+        Py_END_CRITICAL_SECTION(); \
+        return res; \
+    }
 
 #define PYCURL_BEGIN_CALLBACK_COMMON(get_expr, retval, callback_name) \
     if (Py_IsFinalizing()) { \
@@ -432,6 +484,11 @@ create_and_set_error_object(struct CurlObject *self, int code);
 #define OPTIONS_SIZE    ((int)CURLOPT_LASTENTRY % 10000)
 #define MOPTIONS_SIZE   ((int)CURLMOPT_LASTENTRY % 10000)
 
+/* Kinds of native READDATA sources */
+#define PYCURL_READ_SOURCE_NONE     0
+#define PYCURL_READ_SOURCE_BUFFER   1
+#define PYCURL_READ_SOURCE_FD       2
+
 /* Memory groups */
 /* Attributes dictionary */
 #define PYCURL_MEMGROUP_ATTRDICT        1
@@ -517,6 +574,11 @@ typedef struct CurlObject {
     /* callbacks */
     PyObject *w_cb;
     int       w_cb_memoryview;
+    /* data held back until WRITEFUNCTION min_chunk bytes have arrived */
+    size_t    w_cb_min_chunk;
+    char     *w_cb_pending;
+    size_t    w_cb_pending_len;
+    size_t    w_cb_pending_cap;
     PyObject *h_cb;
     int       h_cb_memoryview;
     PyObject *r_cb;
@@ -553,6 +615,13 @@ typedef struct CurlObject {
     PyObject *readdata_fp;
     PyObject *writedata_fp;
     PyObject *writeheader_fp;
+    /* native READDATA source, see PYCURL_READ_SOURCE_*; readdata_fp holds
+     * the object it came from */
+    int read_source;
+    Py_buffer read_view;        /* for a buffer */
+    int read_fd;                /* for a file descriptor */
+    curl_off_t read_start;      /* descriptor offset of the upload, or -1 */
+    curl_off_t read_pos;        /* position in the buffer */
     /* reference to the object used for CURLOPT_POSTFIELDS */
     PyObject *postfields_obj;
     /* reference to the object containing ca certs */
@@ -563,6 +632,12 @@ typedef struct CurlObject {
     char error[CURL_ERROR_SIZE+1];
 } CurlObject;
 
+/* A socket state change recorded by collect_socket_events() */
+typedef struct {
+    curl_socket_t fd;
+    int what;
+} CurlSocketEvent;
+
 typedef struct CurlMultiObject {
     PyObject_HEAD
     PyObject *dict;                 /* Python attributes dictionary */
@@ -585,6 +660,20 @@ typedef struct CurlMultiObject {
 
     PyObject *easy_object_refs;
     int close_handles; /* boolean: False by default */
+
+    /* (curl, code) pairs of transfers that completed while iter_chunks()
+     * ran the multi, or NULL */
+    PyObject *done_stash;
+
+    /* socket state changes not yet returned by socket_events(), recorded
+     * while collect_socket_events is true */
+    CurlSocketEvent *socket_events;
+    int num_socket_events;
+    int max_socket_events;
+    int collect_socket_events;
+
+    /* driver of run(epoll=True), or NULL */
+    struct CurlEpollDriver *epoll;
 } CurlMultiObject;
 
 typedef struct {
@@ -626,6 +715,93 @@ PYCURL_INTERNAL void
 curlmime_duphandle_incref_data_cb_owners(PyObject *mime_obj);
 #endif
 
+typedef struct CurlBufferSinkObject {
+    PyObject_HEAD
+    PyObject *weakreflist;
+    char *buf;                  /* PyMem_Raw allocated, grows by doubling */
+    size_t len;
+    size_t cap;
+    pycurl_mutex_t lock;        /* held while the buffer is read or written */
+} CurlBufferSinkObject;
+
+typedef struct CurlFdSinkObject {
+    PyObject_HEAD
+    PyObject *weakreflist;
+    int fd;
+    PyObject *file;             /* object the fd came from, or NULL for a bare fd */
+} CurlFdSinkObject;
+
+typedef struct CurlMmapSinkObject {
+    PyObject_HEAD
+    PyObject *weakreflist;
+    int fd;
+    PyObject *file;             /* object the fd came from, or NULL for a bare fd */
+    int started;                /* a transfer is writing its body */
+    curl_off_t start;           /* file offset of the body */
+    size_t pos;                 /* bytes of the body written so far */
+    size_t length;              /* announced length of the mapped body */
+    char *map;                  /* mapping of the body, or NULL when writing */
+    size_t map_len;
+    size_t map_delta;           /* offset of the body within the mapping */
+    pycurl_mutex_t lock;        /* held while the mapping is used or changed */
+} CurlMmapSinkObject;
+
+typedef struct CurlChunkIteratorObject {
+    PyObject_HEAD
+    CurlObject *curl;
+    CurlMultiObject *multi;
+    int owns_multi;             /* multi was created by Curl.iter_chunks() */
+    char *buf;                  /* PyMem_Raw allocated, data not yet handed out */
+    size_t len;
+    size_t cap;
+    size_t limit;               /* buffer_size; the transfer pauses beyond it */
+    int paused;                 /* the write callback paused the transfer */
+    int done;                   /* the transfer has completed */
+    int finished;               /* detached from the handle and multi */
+    CURLcode result;
+    pycurl_mutex_t lock;        /* held while the buffer is read or written */
+} CurlChunkIteratorObject;
+
+/* Longest wait of the loops that drive a multi from C, so that signals are
+ * handled promptly */
+#define PYCURL_MULTI_POLL_INTERVAL_MS 1000
+
+/* Default buffer_size of iter_chunks() */
+#define PYCURL_CHUNK_ITER_BUFFER_SIZE 65536
+
+/* One option of an OptionSet, converted when the set is created */
+typedef struct CurlOptionSetEntry {
+    int option;
+    int kind;                   /* PYCURL_OPTIONSET_* */
+    long lvalue;
+    curl_off_t offvalue;
+    PyObject *obj;              /* encoded string, CurlSlistObject or the value */
+} CurlOptionSetEntry;
+
+#define PYCURL_OPTIONSET_LONG   1
+#define PYCURL_OPTIONSET_OFF_T  2
+#define PYCURL_OPTIONSET_STRING 3
+#define PYCURL_OPTIONSET_SLIST  4
+#define PYCURL_OPTIONSET_OBJECT 5
+
+typedef struct CurlOptionSetObject {
+    PyObject_HEAD
+    CurlOptionSetEntry *entries;    /* PyMem allocated */
+    Py_ssize_t num_entries;
+    CurlObject *curl;           /* has the options set, copied by duphandle() */
+} CurlOptionSetObject;
+
+/* Return values of util_curl_string_option_kind */
+#define PYCURL_STRING_OPTION_NONE       0
+#define PYCURL_STRING_OPTION            1
+#define PYCURL_STRING_OPTION_DEPRECATED 2
+#define PYCURL_STRING_OPTION_POSTFIELDS 3
+
+/* Return values of util_curl_int_option_kind */
+#define PYCURL_INT_OPTION_NONE  0
+#define PYCURL_INT_OPTION_LONG  1
+#define PYCURL_INT_OPTION_OFF_T 2
+
 #ifdef HAVE_CURL_URL
 typedef struct CurlUrlObject {
     PyObject_HEAD
@@ -702,8 +878,25 @@ do_url_strerror(PyObject *dummy, PyObject *args);
 PYCURL_INTERNAL PyObject *
 do_curl_setopt(CurlObject *self, PyObject *args, PyObject *kwargs);
 PYCURL_INTERNAL PyObject *
+do_curl_setopt_many(CurlObject *self, PyObject *args);
+PYCURL_INTERNAL PyObject *
 do_curl_setopt_string(CurlObject *self, PyObject *args);
 PYCURL_INTERNAL PyObject *
+util_curl_setopt(CurlObject *self, int option, PyObject *obj,
+                 int use_memoryview_flag, Py_ssize_t min_chunk);
+PYCURL_INTERNAL int
+util_curl_option_in_range(int option);
+PYCURL_INTERNAL int
+util_curl_string_option_kind(int option);
+PYCURL_INTERNAL int
+util_curl_int_option_kind(int option);
+PYCURL_INTERNAL CurlSlistObject **
+util_curl_slist_slot(CurlObject *self, int option);
+PYCURL_INTERNAL CurlObject *
+do_curl_duphandle(CurlObject *self, PyObject *Py_UNUSED(ignored));
+PYCURL_INTERNAL PyObject *
+do_curl_duphandle_many(CurlObject *self, PyObject *args, PyObject *kwds);
+PYCURL_INTERNAL PyObject *
 do_curl_unsetopt(CurlObject *self, PyObject *args);
 #if defined(HAVE_CURL_OPENSSL)
 PYCURL_INTERNAL PyObject *
@@ -755,6 +948,8 @@ PYCURL_INTERNAL void
 util_curl_xdecref(CurlObject *self, int flags, CURL *handle);
 PYCURL_INTERNAL PyObject *
 do_curl_setopt_filelike(CurlObject *self, int option, PyObject *obj);
+PYCURL_INTERNAL PyObject *
+do_curl_setopt_sink(CurlObject *self, int option, PyObject *obj);
 
 PYCURL_INTERNAL int
 util_curlslist_update(CurlSlistObject **old, struct curl_slist *slist);
@@ -766,6 +961,10 @@ do_curl_getinfo_raw(CurlObject *self, PyObject *args);
 PYCURL_INTERNAL PyObject *
 do_curl_getinfo(CurlObject *self, PyObject *args);
 PYCURL_INTERNAL PyObject *
+do_curl_getinfo_many(CurlObject *self, PyObject *args);
+PYCURL_INTERNAL PyObject *
+do_curl_stats(CurlObject *self, PyObject *Py_UNUSED(ignored));
+PYCURL_INTERNAL PyObject *
 do_curl_errstr(CurlObject *self, PyObject *Py_UNUSED(ignored));
 PYCURL_INTERNAL PyObject *
 do_curl_errstr_raw(CurlObject *self, PyObject *Py_UNUSED(ignored));
@@ -774,6 +973,39 @@ PYCURL_INTERNAL size_t
 write_callback(char *ptr, size_t size, size_t nmemb, void *stream);
 PYCURL_INTERNAL size_t
 header_callback(char *ptr, size_t size, size_t nmemb, void *stream);
+PYCURL_INTERNAL CURLcode
+write_callback_flush(CurlObject *self);
+PYCURL_INTERNAL size_t
+sink_write_callback(char *ptr, size_t size, size_t nmemb, void *stream);
+PYCURL_INTERNAL size_t
+sink_header_callback(char *ptr, size_t size, size_t nmemb, void *stream);
+PYCURL_INTERNAL CURLcode
+sink_finish_transfer(CurlObject *self, CURLcode res);
+PYCURL_INTERNAL int
+util_curl_set_read_source(CurlObject *self, PyObject *obj);
+PYCURL_INTERNAL void
+util_curl_release_read_source(CurlObject *self);
+PYCURL_INTERNAL int
+util_curl_dup_read_source(CurlObject *dup, CurlObject *self);
+PYCURL_INTERNAL void
+util_curl_rewind_read_source(CurlObject *self);
+PYCURL_INTERNAL size_t
+source_read_callback(char *ptr, size_t size, size_t nmemb, void *stream);
+PYCURL_INTERNAL int
+source_seek_callback(void *stream, curl_off_t offset, int origin);
+PYCURL_INTERNAL void
+util_curl_begin_transfer(CurlObject *self);
+PYCURL_INTERNAL void
+util_curl_restore_write(CurlObject *self);
+PYCURL_INTERNAL int
+util_multi_run_until(CurlMultiObject *self, CurlObject *target,
+                     int (*stop)(void *), void *arg, CURLcode *target_result);
+PYCURL_INTERNAL PyObject *
+do_curl_iter_chunks(CurlObject *self, PyObject *args, PyObject *kwds);
+PYCURL_INTERNAL PyObject *
+do_multi_iter_chunks(CurlMultiObject *self, PyObject *args, PyObject *kwds);
+PYCURL_INTERNAL int
+buffer_sink_append(CurlBufferSinkObject *self, const char *data, size_t len, CURL *handle);
 PYCURL_INTERNAL curl_socket_t
 opensocket_callback(void *clientp, curlsocktype purpose,
                     struct curl_sockaddr *address);
@@ -849,6 +1081,12 @@ extern PyTypeObject CurlSlist_Type;
 extern PyTypeObject CurlHttppost_Type;
 extern PyTypeObject CurlMulti_Type;
 extern PyTypeObject CurlShare_Type;
+extern PyTypeObject CurlBufferSink_Type;
+extern PyTypeObject CurlFdSink_Type;
+extern PyTypeObject CurlMmapSink_Type;
+extern PyTypeObject CurlHeaderSink_Type;
+extern PyTypeObject CurlChunkIterator_Type;
+extern PyTypeObject CurlOptionSet_Type;
 #ifdef HAVE_CURL_MIME
 extern PyTypeObject CurlMime_Type;
 extern PyTypeObject CurlMimePart_Type;
@@ -863,6 +1101,12 @@ extern PyTypeObject *p_CurlSlist_Type;
 extern PyTypeObject *p_CurlHttppost_Type;
 extern PyTypeObject *p_CurlMulti_Type;
 extern PyTypeObject *p_CurlShare_Type;
+extern PyTypeObject *p_CurlBufferSink_Type;
+extern PyTypeObject *p_CurlFdSink_Type;
+extern PyTypeObject *p_CurlMmapSink_Type;
+extern PyTypeObject *p_CurlHeaderSink_Type;
+extern PyTypeObject *p_CurlChunkIterator_Type;
+extern PyTypeObject *p_CurlOptionSet_Type;
 #ifdef HAVE_CURL_MIME
 extern PyTypeObject *p_CurlMime_Type;
 extern PyTypeObject *p_CurlMimePart_Type;
@@ -872,6 +1116,8 @@ extern PyTypeObject *p_CurlUrl_Type;
 #endif
 extern PyObject *khkey_type;
 extern PyObject *curl_sockaddr_type;
+extern PyTypeObject *transfer_stats_type;
+extern PyStructSequence_Desc transfer_stats_desc;
 #if LIBCURL_VERSION_NUM >= MAKE_LIBCURL_VERSION(7, 74, 0)
 extern PyObject *hsts_entry_type;
 extern PyObject *hsts_index_type;
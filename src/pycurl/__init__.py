@@ -1,6 +1,12 @@
 from pycurl import _pycurl
 from pycurl._pycurl import *  # noqa: F401, F403
 from pycurl.async_multi import AsyncCurlMulti as AsyncCurlMulti
+from pycurl.pool import CurlPool as CurlPool
+from pycurl.pool import CurlPoolStats as CurlPoolStats
+from pycurl.sharded import ShardedMulti as ShardedMulti
 
 __all__ = [name for name in dir(_pycurl) if not name.startswith("_")]
 __all__.append("AsyncCurlMulti")
+__all__.append("CurlPool")
+__all__.append("CurlPoolStats")
+__all__.append("ShardedMulti")
@@ -3,7 +3,8 @@
 Drives :py:class:`pycurl.CurlMulti` transfers from an asyncio event loop
 using libcurl's multi-socket API. No threads, no busy-polling. A
 selector-style event loop is required (on Windows install
-``WindowsSelectorEventLoopPolicy``).
+``WindowsSelectorEventLoopPolicy``), unless the transfers run in a
+worker thread with ``threaded=True``.
 
 Example::
 
@@ -16,26 +17,35 @@ Example::
 
 from __future__ import annotations
 
+import heapq
+import itertools
+import threading
+from collections import deque
 from dataclasses import dataclass
 from functools import partial
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     import asyncio
-    from collections.abc import Iterable
+    from collections.abc import AsyncIterator, Callable, Iterable
 
 from pycurl._pycurl import (
     CSELECT_IN,
     CSELECT_OUT,
+    E_OK,
+    E_OPERATION_TIMEDOUT,
     Curl,
     CurlMulti,
     M_SOCKETFUNCTION,
     M_TIMERFUNCTION,
+    PAUSE_CONT,
     POLL_IN,
     POLL_NONE,
     POLL_OUT,
     POLL_REMOVE,
     SOCKET_TIMEOUT,
+    WRITEFUNC_PAUSE,
+    WRITEFUNCTION,
     error as _pycurl_error,
 )
 
@@ -55,6 +65,16 @@ _BLOCKED_OPTIONS_MSG = "AsyncCurlMulti owns M_SOCKETFUNCTION/M_TIMERFUNCTION" +
     "/M_NOTIFYFUNCTION" if _NOTIFY_SUPPORTED else ""
 )
 
+# Longest wait of the worker thread, in seconds; libcurl's own timeouts and
+# wakeup() end it earlier.
+_WORKER_POLL_INTERVAL = 1.0
+
+# Commands to the worker thread of a threaded AsyncCurlMulti
+_ADD = 0
+_REMOVE = 1
+_UNPAUSE = 2
+_STOP = 3
+
 
 @dataclass(slots=True)
 class _SocketState:
@@ -69,8 +89,22 @@ class _SocketState:
     write_registered: bool = False
 
 
+@dataclass(slots=True, order=True)
+class _QueuedTransfer:
+    """A transfer waiting for admission in the pending heap.
+
+    Ordered by priority, then by submission order. A transfer removed while
+    queued has *curl* set to ``None`` and is skipped when popped.
+    """
+
+    priority: int
+    seq: int
+    curl: Curl | None = None
+    host: str | None = None
+
+
 class AsyncCurlMulti:
-    """AsyncCurlMulti(close_handles=False) -> AsyncCurlMulti object
+    """AsyncCurlMulti(close_handles=False, max_in_flight=None, max_per_host=None, threaded=False) -> AsyncCurlMulti object
 
     An asyncio-driven wrapper around :py:class:`pycurl.CurlMulti`. Each
     :py:class:`pycurl.Curl` transfer is represented by an
@@ -92,6 +126,25 @@ class AsyncCurlMulti:
     ``True``, any easy handle still attached to the multi when
     :py:meth:`aclose` runs is also closed by libcurl.
 
+    *max_in_flight* limits the number of transfers handed to libcurl at
+    once, and *max_per_host* the number of those that share the *host*
+    given to :py:meth:`add_handle`. Handles added beyond the limits wait in
+    a queue, ordered by *priority*, and are handed to libcurl as running
+    transfers complete. ``None`` means no limit. If the multi handle fails,
+    only the transfers handed to libcurl fail with its error; queued ones
+    are handed to it as before.
+
+    With *threaded* set to ``True`` the multi handle is driven by a worker
+    thread, started by the first :py:meth:`add_handle`, which waits with
+    ``curl_multi_poll`` and hands completed transfers to the event loop
+    with :py:meth:`asyncio.loop.call_soon_threadsafe`. libcurl's work, and
+    the callbacks of the easy handles, then run outside the event loop
+    thread, and any event loop can be used. This requires libcurl 7.68.0
+    or later. Handles are added to and removed from libcurl by the worker,
+    so :py:meth:`add_handle` and :py:meth:`remove_handle` report libcurl's
+    errors through the future rather than by raising, and :py:meth:`setopt`
+    can only be called before the first :py:meth:`add_handle`.
+
     Example::
 
         async with pycurl.AsyncCurlMulti() as multi:
@@ -110,14 +163,49 @@ class AsyncCurlMulti:
             results = await asyncio.gather(*multi.futures())
     """
 
-    def __init__(self, close_handles: bool = False) -> None:
+    def __init__(
+        self,
+        close_handles: bool = False,
+        max_in_flight: int | None = None,
+        max_per_host: int | None = None,
+        threaded: bool = False,
+    ) -> None:
+        if threaded and not hasattr(CurlMulti, "wakeup"):
+            raise RuntimeError("threaded=True requires libcurl 7.68.0 or later")
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if max_per_host is not None and max_per_host < 1:
+            raise ValueError("max_per_host must be at least 1")
         self._multi: CurlMulti = CurlMulti(close_handles=close_handles)
         self._loop: asyncio.AbstractEventLoop | None = None
         self._futures: dict[Curl, asyncio.Future[Curl]] = {}
+        self._limited: bool = max_in_flight is not None or max_per_host is not None
+        self._max_in_flight: int | None = max_in_flight
+        self._max_per_host: int | None = max_per_host
+        # Host of every transfer handed to libcurl, when limits are set
+        self._running: dict[Curl, str | None] = {}
+        self._host_running: dict[str, int] = {}
+        self._queued: dict[Curl, _QueuedTransfer] = {}
+        self._pending: list[_QueuedTransfer] = []
+        # Transfers popped while their host was at max_per_host
+        self._host_pending: dict[str, list[_QueuedTransfer]] = {}
+        self._seq = itertools.count()
+        # (deadline, seq, curl, future); stale once the future is no longer
+        # the one registered for curl
+        self._deadlines: list[tuple[float, int, Curl, asyncio.Future[Curl]]] = []
+        self._deadline_timer: asyncio.TimerHandle | None = None
         self._assigned_fds: set[int] = set()
         self._timer: asyncio.Handle | None = None
         self._closing: bool = False
         self._notify_handle: asyncio.Handle | None = None
+        self._threaded: bool = threaded
+        self._worker: threading.Thread | None = None
+        # Why the worker thread stopped before aclose(), if it did
+        self._worker_error: BaseException | None = None
+        # Commands to the worker thread; deque appends and pops are atomic
+        self._commands: deque[tuple[int, Any, Any]] = deque()
+        if threaded:
+            return
         self._multi.setopt(M_SOCKETFUNCTION, self._on_socket)
         self._multi.setopt(M_TIMERFUNCTION, self._on_timer)
         if _NOTIFY_SUPPORTED:
@@ -139,10 +227,18 @@ class AsyncCurlMulti:
         """
         if option in _BLOCKED_OPTIONS:
             raise ValueError(_BLOCKED_OPTIONS_MSG)
+        if self._worker is not None:
+            raise RuntimeError("setopt() must be called before the worker thread starts")
         self._multi.setopt(option, value)
 
-    def add_handle(self, curl: Curl) -> asyncio.Future[Curl]:
-        """add_handle(curl) -> asyncio.Future
+    def add_handle(
+        self,
+        curl: Curl,
+        priority: int = 0,
+        host: str | None = None,
+        deadline: float | None = None,
+    ) -> asyncio.Future[Curl]:
+        """add_handle(curl, priority=0, host=None, deadline=None) -> asyncio.Future
 
         Schedules *curl* for transfer and returns an
         :py:class:`asyncio.Future` that resolves to *curl* on success or
@@ -151,10 +247,27 @@ class AsyncCurlMulti:
 
         *curl* is a :py:class:`pycurl.Curl` easy handle.
 
+        *priority* and *host* only matter when the instance was created
+        with *max_in_flight* or *max_per_host*. Queued handles with a lower
+        *priority* are handed to libcurl first, and handles of equal
+        priority in the order they were added. *host* is the key that
+        *max_per_host* counts transfers by, usually the host name of the
+        URL; handles without one are not limited per host. With limits set,
+        a handle that libcurl rejects fails its future with the error
+        instead of raising.
+
+        *deadline*, if given, is a time on the event loop's clock
+        (:py:meth:`asyncio.loop.time`) by which the transfer must complete,
+        whether it is still queued or running. An overdue transfer is
+        removed and its future raises :py:class:`pycurl.error` with
+        ``E_OPERATION_TIMEDOUT``. All deadlines share one timer, so they
+        cost much less than an :py:func:`asyncio.wait_for` per transfer.
+
         The first call captures the running event loop and binds this
         instance to it. Raises :py:exc:`RuntimeError` if called outside
-        a running loop, after :py:meth:`aclose`, or if *curl* is already
-        registered.
+        a running loop, after :py:meth:`aclose`, if *curl* is already
+        registered, or if the worker thread of a threaded instance stopped
+        on an error.
         """
         if self.closed:
             raise RuntimeError("AsyncCurlMulti is closed")
@@ -166,12 +279,20 @@ class AsyncCurlMulti:
         # Bind curl into the done-callback so cancellation can find the
         # right handle without a reverse-lookup map.
         fut.add_done_callback(partial(self._on_future_done, curl))
-        try:
-            self._multi.add_handle(curl)
-        except Exception:
-            # Roll back bookkeeping; the unreachable future GCs cleanly.
-            self._futures.pop(curl, None)
-            raise
+        if self._limited:
+            entry = _QueuedTransfer(priority, next(self._seq), curl, host)
+            self._queued[curl] = entry
+            heapq.heappush(self._pending, entry)
+            self._admit()
+        else:
+            try:
+                self._start(curl, host)
+            except Exception:
+                # Roll back bookkeeping; the unreachable future GCs cleanly.
+                self._futures.pop(curl, None)
+                raise
+        if deadline is not None and not fut.done():
+            self._add_deadline(deadline, curl, fut)
         return fut
 
     def remove_handle(self, curl: Curl) -> None:
@@ -182,6 +303,12 @@ class AsyncCurlMulti:
         cancellation propagate, await the future returned from the
         original :py:meth:`add_handle` call.
 
+        With *threaded* set, the worker thread detaches the handle shortly
+        after this call returns. Until it has, the handle must not be
+        closed or added to another multi handle; adding it to this instance
+        again is fine, and every handle is detached once :py:meth:`aclose`
+        returns.
+
         *curl* is a :py:class:`pycurl.Curl` easy handle. Raises
         :py:exc:`RuntimeError` if *curl* is not registered or after
         :py:meth:`aclose`. Raises :py:class:`pycurl.error` if libcurl
@@ -192,20 +319,101 @@ class AsyncCurlMulti:
         fut = self._futures.pop(curl, None)
         if fut is None:
             raise RuntimeError("Curl handle is not registered")
-        self._multi.remove_handle(curl)
+        if not self._unqueue(curl):
+            if self._worker is not None:
+                self._command(_REMOVE, curl)
+            else:
+                self._multi.remove_handle(curl)
+            self._release(curl)
         if not fut.done():
             fut.cancel()
 
-    async def perform(self, curl: Curl) -> Curl:
-        """perform(curl) -> Curl object
+    async def perform(
+        self,
+        curl: Curl,
+        priority: int = 0,
+        host: str | None = None,
+        deadline: float | None = None,
+    ) -> Curl:
+        """perform(curl, priority=0, host=None, deadline=None) -> Curl object
 
-        Coroutine equivalent to ``await self.add_handle(curl)``. Schedules
-        *curl* for transfer and returns it once the transfer completes.
-        Raises :py:class:`pycurl.error` on failure.
+        Coroutine equivalent to ``await self.add_handle(curl, priority,
+        host, deadline)``. Schedules *curl* for transfer and returns it once
+        the transfer completes. Raises :py:class:`pycurl.error` on failure.
 
         *curl* is a :py:class:`pycurl.Curl` easy handle.
         """
-        return await self.add_handle(curl)
+        return await self.add_handle(curl, priority, host, deadline)
+
+    async def stream(self, curl: Curl, max_queue: int = 16) -> AsyncIterator[bytes]:
+        """stream(curl, max_queue=16) -> async iterator of bytes
+
+        Schedules *curl* for transfer and yields its response body as
+        ``bytes`` chunks as they arrive::
+
+            async for chunk in multi.stream(curl):
+                await writer.write(chunk)
+
+        Received chunks wait in a queue of at most *max_queue* chunks.
+        When the queue is full the transfer is paused, and it is resumed
+        once the consumer has drained the queue to half that size, so a
+        slow consumer slows the download down instead of growing memory.
+
+        The body is delivered through a ``WRITEFUNCTION`` installed on
+        *curl*, replacing any ``WRITEFUNCTION`` or ``WRITEDATA`` set
+        before. Set them again before reusing the handle elsewhere.
+
+        Raises :py:class:`pycurl.error` from the iterator if the transfer
+        fails, after the chunks received before the failure. Leaving the
+        loop early, or closing the iterator, removes *curl* from this
+        multi handle.
+        """
+        import asyncio
+
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        chunks: deque[bytes] = deque()
+        paused = False
+        wakeup = asyncio.Event()
+        if self._threaded:
+            # write() runs in the worker thread.
+            notify = partial(self._ensure_loop().call_soon_threadsafe, wakeup.set)
+        else:
+            notify = wakeup.set
+
+        def write(chunk: bytes) -> int | None:
+            nonlocal paused
+            if len(chunks) >= max_queue:
+                # libcurl delivers this chunk again once unpaused.
+                paused = True
+                notify()
+                return WRITEFUNC_PAUSE
+            chunks.append(chunk)
+            notify()
+            return None
+
+        curl.setopt(WRITEFUNCTION, write)
+        fut = self.add_handle(curl)
+        fut.add_done_callback(lambda _fut: wakeup.set())
+        try:
+            while True:
+                if paused and len(chunks) <= max_queue // 2:
+                    paused = False
+                    if self._threaded:
+                        self._command(_UNPAUSE, curl)
+                    else:
+                        curl.pause(PAUSE_CONT)
+                if chunks:
+                    yield chunks.popleft()
+                    continue
+                if fut.done():
+                    fut.result()
+                    return
+                wakeup.clear()
+                await wakeup.wait()
+        finally:
+            if not fut.done() and not self.closed:
+                self.remove_handle(curl)
 
     def futures(
         self,
@@ -240,6 +448,16 @@ class AsyncCurlMulti:
                 raise KeyError(curl) from None
         return tuple(out)
 
+    @property
+    def in_flight(self) -> int:
+        """Number of transfers handed to libcurl and not yet completed."""
+        return len(self._futures) - len(self._queued)
+
+    @property
+    def pending(self) -> int:
+        """Number of transfers waiting for *max_in_flight* or *max_per_host*."""
+        return len(self._queued)
+
     @property
     def closed(self) -> bool:
         """Whether the underlying :py:class:`pycurl.CurlMulti` handle is closed."""
@@ -255,19 +473,35 @@ class AsyncCurlMulti:
         if self.closed:
             return
         self._closing = True
+        if self._worker is not None:
+            import asyncio
+
+            self._command(_STOP, None)
+            await asyncio.to_thread(self._worker.join)
+            self._worker = None
         if self._notify_handle is not None:
             self._notify_handle.cancel()
             self._notify_handle = None
         self._cancel_timer()
+        if self._deadline_timer is not None:
+            self._deadline_timer.cancel()
+            self._deadline_timer = None
+        self._deadlines.clear()
         # remove_handle fires POLL_REMOVE, which unregisters watchers and unassigns.
         for curl, fut in list(self._futures.items()):
             self._futures.pop(curl, None)
-            try:
-                self._multi.remove_handle(curl)
-            except _pycurl_error:
-                pass
+            if curl not in self._queued:
+                try:
+                    self._multi.remove_handle(curl)
+                except _pycurl_error:
+                    pass
             if not fut.done():
                 fut.cancel()
+        self._queued.clear()
+        self._pending.clear()
+        self._host_pending.clear()
+        self._running.clear()
+        self._host_running.clear()
         # Defensive: clean up any fds libcurl did not fire POLL_REMOVE for.
         if self._loop is not None:
             for fd in list(self._assigned_fds):
@@ -303,11 +537,16 @@ class AsyncCurlMulti:
         loop = asyncio.get_running_loop()
         if self._loop is None:
             proactor = getattr(asyncio, "ProactorEventLoop", None)
-            if proactor is not None and isinstance(loop, proactor):
+            if not self._threaded and proactor is not None and isinstance(loop, proactor):
                 raise RuntimeError(
                     "AsyncCurlMulti requires a selector-style event loop"
                 )
             self._loop = loop
+            if self._threaded:
+                self._worker = threading.Thread(
+                    target=self._run_worker, name="pycurl-AsyncCurlMulti", daemon=True
+                )
+                self._worker.start()
         elif self._loop is not loop:
             raise RuntimeError("AsyncCurlMulti is bound to a different event loop")
         return loop
@@ -432,33 +671,163 @@ class AsyncCurlMulti:
         if self._closing:
             return
         try:
-            self._multi.socket_action(fd, mask)
+            _, done = self._multi.socket_action(fd, mask, collect=True)
         except _pycurl_error as exc:
             # Multi is in a bad state; info_read will not produce completions.
-            self._fail_all_pending(exc)
+            self._fail_running(exc)
             return
-        if not _NOTIFY_SUPPORTED:
-            self._drain()
+        self._resolve_done(done)
+
+    def _fail_running(self, exc: BaseException) -> None:
+        """Fail the transfers handed to libcurl; queued ones stay queued."""
+        # Taken before resolving, which admits queued transfers.
+        running = [curl for curl in self._futures if curl not in self._queued]
+        for curl in running:
+            self._resolve(curl, exc)
 
     def _fail_all_pending(self, exc: BaseException) -> None:
         for curl in list(self._futures):
             self._resolve(curl, exc)
 
     def _drain(self) -> None:
-        _, ok, err = self._multi.info_read()
-        for curl in ok:
-            self._resolve(curl, None)
-        for curl, code, msg in err:
-            self._resolve(curl, _pycurl_error(code, msg))
+        _, done = self._multi.info_read_codes()
+        self._resolve_done(done)
 
-    def _resolve(self, curl: Curl, exc: BaseException | None) -> None:
-        fut = self._futures.pop(curl, None)
-        if fut is None:
+    def _resolve_done(self, done: list[tuple[Curl, int]]) -> None:
+        for curl, code in done:
+            if code == E_OK:
+                self._resolve(curl, None)
+            else:
+                self._resolve(curl, _pycurl_error(code, curl.errstr()))
+
+    def _has_slot(self, host: str | None) -> bool:
+        if self._max_in_flight is not None and len(self._running) >= self._max_in_flight:
+            return False
+        if self._max_per_host is not None and host is not None:
+            return self._host_running.get(host, 0) < self._max_per_host
+        return True
+
+    def _start(self, curl: Curl, host: str | None) -> None:
+        if self._worker is not None:
+            if self._worker_error is not None:
+                raise RuntimeError("AsyncCurlMulti worker thread stopped") from self._worker_error
+            self._command(_ADD, curl, self._futures[curl])
+        else:
+            self._multi.add_handle(curl)
+        if self._limited:
+            self._running[curl] = host
+            if host is not None:
+                self._host_running[host] = self._host_running.get(host, 0) + 1
+
+    def _unqueue(self, curl: Curl) -> bool:
+        """Drop *curl* from the queue; return whether it was queued."""
+        entry = self._queued.pop(curl, None)
+        if entry is None:
+            return False
+        entry.curl = None
+        return True
+
+    def _release(self, curl: Curl) -> None:
+        """Free the slot of a transfer that left libcurl and admit others."""
+        if curl not in self._running:
+            return
+        host = self._running.pop(curl)
+        if host is not None:
+            count = self._host_running[host] - 1
+            if count:
+                self._host_running[host] = count
+            else:
+                del self._host_running[host]
+            waiting = self._host_pending.get(host)
+            if waiting:
+                # Skip the entries of transfers that were unqueued while
+                # they waited; nothing else would move the ones behind them.
+                while waiting:
+                    entry = heapq.heappop(waiting)
+                    if entry.curl is not None:
+                        heapq.heappush(self._pending, entry)
+                        break
+                if not waiting:
+                    del self._host_pending[host]
+        self._admit()
+
+    def _admit(self) -> None:
+        while self._pending and not self._closing:
+            if self._max_in_flight is not None and len(self._running) >= self._max_in_flight:
+                return
+            entry = heapq.heappop(self._pending)
+            curl = entry.curl
+            if curl is None:
+                continue
+            if not self._has_slot(entry.host):
+                assert entry.host is not None
+                heapq.heappush(self._host_pending.setdefault(entry.host, []), entry)
+                continue
+            del self._queued[curl]
+            try:
+                self._start(curl, entry.host)
+            except (_pycurl_error, RuntimeError) as exc:
+                fut = self._futures.pop(curl, None)
+                if fut is not None and not fut.done():
+                    fut.set_exception(exc)
+
+    def _add_deadline(self, deadline: float, curl: Curl, fut: asyncio.Future[Curl]) -> None:
+        deadlines = self._deadlines
+        if len(deadlines) > 64 and len(deadlines) > 2 * len(self._futures):
+            # Drop the entries of transfers that are gone.
+            deadlines[:] = [d for d in deadlines if self._futures.get(d[2]) is d[3]]
+            heapq.heapify(deadlines)
+        heapq.heappush(deadlines, (deadline, next(self._seq), curl, fut))
+        if self._deadline_timer is None or deadline < self._deadline_timer.when():
+            self._arm_deadline_timer()
+
+    def _arm_deadline_timer(self) -> None:
+        if self._deadline_timer is not None:
+            self._deadline_timer.cancel()
+            self._deadline_timer = None
+        deadlines = self._deadlines
+        while deadlines and self._futures.get(deadlines[0][2]) is not deadlines[0][3]:
+            heapq.heappop(deadlines)
+        if deadlines:
+            assert self._loop is not None, "deadline set before _ensure_loop"
+            self._deadline_timer = self._loop.call_at(deadlines[0][0], self._expire_deadlines)
+
+    def _expire_deadlines(self) -> None:
+        self._deadline_timer = None
+        if self._closing:
+            return
+        assert self._loop is not None, "timer fired before _ensure_loop"
+        now = self._loop.time()
+        deadlines = self._deadlines
+        overdue = []
+        while deadlines and deadlines[0][0] <= now:
+            _, _, curl, fut = heapq.heappop(deadlines)
+            if self._futures.get(curl) is fut:
+                overdue.append(curl)
+        # Queued transfers go first, so that removing the running ones does
+        # not start transfers that are overdue as well.
+        overdue.sort(key=lambda curl: curl not in self._queued)
+        for curl in overdue:
+            self._resolve(curl, _pycurl_error(E_OPERATION_TIMEDOUT, "deadline exceeded"))
+        self._arm_deadline_timer()
+
+    def _detach(self, curl: Curl) -> None:
+        if self._worker is not None:
+            self._command(_REMOVE, curl)
             return
         try:
             self._multi.remove_handle(curl)
         except _pycurl_error:
             pass
+
+    def _resolve(self, curl: Curl, exc: BaseException | None, detached: bool = False) -> None:
+        fut = self._futures.pop(curl, None)
+        if fut is None:
+            return
+        if not self._unqueue(curl):
+            if not detached:
+                self._detach(curl)
+            self._release(curl)
         if fut.done():
             return
         if exc is None:
@@ -471,7 +840,84 @@ class AsyncCurlMulti:
         if self._closing or curl not in self._futures:
             return
         self._futures.pop(curl, None)
+        if self._unqueue(curl):
+            return
+        self._detach(curl)
+        self._release(curl)
+
+    def _command(self, op: int, curl: Any, arg: Any = None) -> None:
+        self._commands.append((op, curl, arg))
+        self._multi.wakeup()
+
+    def _deliver(self, done: list[tuple[Curl, asyncio.Future[Curl], BaseException | None]]) -> None:
+        # Runs on the event loop; the worker already removed the handles.
+        if self._closing:
+            return
+        for curl, fut, exc in done:
+            # A handle may have been resolved and added again meanwhile.
+            if self._futures.get(curl) is fut:
+                self._resolve(curl, exc, detached=True)
+
+    def _run_worker(self) -> None:
+        assert self._loop is not None, "worker started before _ensure_loop"
+        post = self._loop.call_soon_threadsafe
         try:
-            self._multi.remove_handle(curl)
-        except _pycurl_error:
-            pass
+            self._worker_loop(post)
+        except BaseException as exc:
+            # Nothing drives the multi handle any more; fail what is left
+            # and every later transfer.
+            post(self._worker_stopped, exc)
+
+    def _worker_loop(self, post: Callable[..., Any]) -> None:
+        multi = self._multi
+        commands = self._commands
+        attached: dict[Curl, asyncio.Future[Curl]] = {}
+        while True:
+            done: list[tuple[Curl, asyncio.Future[Curl], BaseException | None]] = []
+            while commands:
+                op, curl, arg = commands.popleft()
+                if op == _STOP:
+                    return
+                try:
+                    if op == _ADD:
+                        multi.add_handle(curl)
+                        attached[curl] = arg
+                    elif op == _REMOVE:
+                        if attached.pop(curl, None) is not None:
+                            multi.remove_handle(curl)
+                    else:
+                        curl.pause(PAUSE_CONT)
+                except _pycurl_error as exc:
+                    if op == _ADD:
+                        done.append((curl, arg, exc))
+            try:
+                multi.perform()
+                _, codes = multi.info_read_codes()
+                for curl, code in codes:
+                    fut = attached.pop(curl, None)
+                    multi.remove_handle(curl)
+                    if fut is not None:
+                        exc = None if code == E_OK else _pycurl_error(code, curl.errstr())
+                        done.append((curl, fut, exc))
+            except _pycurl_error as exc:
+                # Multi is in a bad state; no completions will be reported
+                # for the transfers on it. Handles left on it would also
+                # keep poll() from waiting. Queued transfers and pending
+                # commands are not affected.
+                for curl, fut in attached.items():
+                    try:
+                        multi.remove_handle(curl)
+                    except _pycurl_error:
+                        pass
+                    done.append((curl, fut, exc))
+                attached.clear()
+            if done:
+                post(self._deliver, done)
+            # Also paces the retries after a failure; an error here ends the
+            # worker.
+            multi.poll(_WORKER_POLL_INTERVAL)
+
+    def _worker_stopped(self, exc: BaseException) -> None:
+        self._worker_error = exc
+        if not self._closing:
+            self._fail_all_pending(exc)
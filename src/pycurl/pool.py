@@ -0,0 +1,198 @@
+"""A pool of reusable ``pycurl.Curl`` handles.
+
+Creating a :py:class:`pycurl.Curl` allocates a new handle with empty
+connection, DNS and TLS session caches. A :py:class:`CurlPool` keeps handles
+between requests instead, so that keep-alive connections survive from one
+request to the next.
+
+Example::
+
+    pool = pycurl.CurlPool({pycurl.TIMEOUT_MS: 10000})
+    with pool.lease() as curl:
+        curl.setopt(pycurl.URL, "https://example.com")
+        body = curl.perform_rb()
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+from pycurl._pycurl import Curl, OptionSet
+
+
+class CurlPoolStats(NamedTuple):
+    """Counters returned by :py:meth:`CurlPool.stats`."""
+
+    #: Leases served by an idle handle.
+    hits: int
+    #: Leases that had to create a handle.
+    misses: int
+    #: Handles waiting in the pool.
+    idle: int
+    #: Handles currently leased out.
+    leased: int
+    #: Released handles that were closed because the pool was full or closed.
+    discarded: int
+
+
+class CurlPool:
+    """CurlPool(options=None, maxsize=10) -> CurlPool object
+
+    A thread-safe pool of :py:class:`pycurl.Curl` handles that all start out
+    with the same options.
+
+    *options* is a mapping of option constants to values, or a
+    :py:class:`pycurl.OptionSet`, that every handle of the pool has set when
+    it is leased. New handles are created with
+    :py:meth:`pycurl.OptionSet.duphandle`.
+
+    *maxsize* is the number of idle handles the pool keeps. It does not limit
+    the number of handles leased at the same time: when no idle handle is
+    available a new one is created, and a handle released into a full pool is
+    closed.
+
+    Releasing a handle calls :py:meth:`pycurl.Curl.reset` and applies
+    *options* again, which undoes whatever was set for the request, callbacks
+    included. ``reset`` keeps the handle's live connections, DNS cache and TLS
+    session cache, so the next request to the same host can reuse its
+    connection.
+
+    A leased handle belongs to the caller until it is released and must not
+    be used afterwards.
+
+    Example::
+
+        pool = pycurl.CurlPool({pycurl.FOLLOWLOCATION: True}, maxsize=4)
+        with pool.lease() as curl:
+            curl.setopt(pycurl.URL, "https://example.com")
+            curl.perform()
+        print(pool.stats())
+    """
+
+    def __init__(
+        self,
+        options: Mapping[int, Any] | OptionSet | None = None,
+        maxsize: int = 10,
+    ) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must not be negative")
+        if not isinstance(options, OptionSet):
+            options = OptionSet({} if options is None else options)
+        self._options: OptionSet = options
+        self._maxsize: int = maxsize
+        self._lock = threading.Lock()
+        # LIFO, so that the most recently used connections are reused first
+        self._idle: list[Curl] = []
+        self._leased: set[Curl] = set()
+        self._hits: int = 0
+        self._misses: int = 0
+        self._discarded: int = 0
+        self._closed: bool = False
+
+    def acquire(self) -> Curl:
+        """acquire() -> Curl
+
+        Leases a handle from the pool, creating one if no idle handle is
+        available. The handle must be given back with :py:meth:`release`.
+
+        Raises :py:exc:`RuntimeError` after :py:meth:`close`.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("CurlPool is closed")
+            if self._idle:
+                curl = self._idle.pop()
+                self._hits += 1
+                self._leased.add(curl)
+                return curl
+            self._misses += 1
+        curl = self._options.duphandle()
+        with self._lock:
+            self._leased.add(curl)
+        return curl
+
+    def release(self, curl: Curl) -> None:
+        """release(curl) -> None
+
+        Gives back a handle leased with :py:meth:`acquire`. Its options are
+        reset to those of the pool, and it is kept for a later lease unless
+        the pool already holds *maxsize* idle handles or is closed, in which
+        case it is closed.
+
+        A closed handle is accepted and dropped. Raises :py:exc:`ValueError`
+        if *curl* is not leased from this pool, and :py:class:`pycurl.error`
+        if it cannot be reset, for instance because it is still performing a
+        transfer; the handle then remains leased.
+        """
+        with self._lock:
+            if curl not in self._leased:
+                raise ValueError("Curl handle is not leased from this pool")
+        keep = not curl.closed
+        if keep:
+            curl.reset()
+            self._options.apply(curl)
+        with self._lock:
+            self._leased.discard(curl)
+            if keep and not self._closed and len(self._idle) < self._maxsize:
+                self._idle.append(curl)
+                return
+            self._discarded += 1
+        curl.close()
+
+    @contextmanager
+    def lease(self) -> Iterator[Curl]:
+        """lease() -> context manager
+
+        Leases a handle with :py:meth:`acquire` for the duration of a
+        ``with`` block and releases it when the block exits.
+        """
+        curl = self.acquire()
+        try:
+            yield curl
+        finally:
+            self.release(curl)
+
+    def stats(self) -> CurlPoolStats:
+        """stats() -> CurlPoolStats
+
+        Returns the number of leases served by idle handles (*hits*) and by
+        new handles (*misses*), the number of *idle* and *leased* handles, and
+        the number of released handles that were *discarded*.
+        """
+        with self._lock:
+            return CurlPoolStats(
+                self._hits,
+                self._misses,
+                len(self._idle),
+                len(self._leased),
+                self._discarded,
+            )
+
+    def close(self) -> None:
+        """close() -> None
+
+        Closes the idle handles. Leased handles are closed when they are
+        released. Further calls to :py:meth:`acquire` raise
+        :py:exc:`RuntimeError`. Calling ``close`` more than once is allowed.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for curl in idle:
+            curl.close()
+
+    @property
+    def closed(self) -> bool:
+        """``True`` after :py:meth:`close` has been called."""
+        return self._closed
+
+    def __enter__(self) -> CurlPool:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -0,0 +1,328 @@
+"""Transfers spread over several ``pycurl.CurlMulti`` handles and threads.
+
+A :py:class:`pycurl.CurlMulti` is driven by one thread at a time, so a
+single multi handle keeps one core busy at most. A :py:class:`ShardedMulti`
+runs several multi handles, each in its own thread. The threads spend their
+time in libcurl with the GIL released.
+
+Example::
+
+    with pycurl.ShardedMulti(4) as multi:
+        for url in urls:
+            curl = pycurl.Curl()
+            curl.setopt(pycurl.URL, url)
+            curl.setopt(pycurl.WRITEDATA, pycurl.BufferSink())
+            multi.add_handle(curl)
+        for _ in urls:
+            curl, code = multi.get()
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import queue
+import threading
+import time
+import weakref
+import zlib
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+from pycurl._pycurl import (
+    E_MULTI_INTERNAL_ERROR,
+    LOCK_DATA_DNS,
+    LOCK_DATA_SSL_SESSION,
+    SHARE,
+    Curl,
+    CurlMulti,
+    CurlShare,
+    error as _pycurl_error,
+)
+
+# Longest wait of a shard thread, in seconds; libcurl's own timeouts and
+# wakeup() end it earlier.
+_POLL_INTERVAL = 1.0
+
+# Commands to a shard thread
+_ADD = 0
+_REMOVE = 1
+_STOP = 2
+
+
+class _Shard:
+    """A multi handle and the thread that drives it."""
+
+    def __init__(self, index: int, done: queue.SimpleQueue[tuple[Curl, int, int]]) -> None:
+        self.multi = CurlMulti()
+        # deque appends and pops are atomic. The argument of a command is
+        # the token of an _ADD and the event set when a _REMOVE is done.
+        self.commands: deque[tuple[int, Curl | None, Any]] = deque()
+        self.done = done
+        self.thread = threading.Thread(
+            target=self.run, name=f"pycurl-ShardedMulti-{index}", daemon=True
+        )
+
+    def command(self, op: int, curl: Curl | None = None, arg: Any = None) -> None:
+        self.commands.append((op, curl, arg))
+        self.multi.wakeup()
+
+    def run(self) -> None:
+        multi = self.multi
+        commands = self.commands
+        # token of each attached handle, reported with its completion
+        attached: dict[Curl, int] = {}
+        while True:
+            while commands:
+                op, curl, arg = commands.popleft()
+                if op == _STOP:
+                    return
+                if op == _ADD:
+                    try:
+                        multi.add_handle(curl)
+                    except _pycurl_error as exc:
+                        self.done.put((curl, exc.args[0], arg))
+                    else:
+                        attached[curl] = arg
+                else:
+                    self.remove(attached, curl, arg)
+            try:
+                multi.perform()
+                _, codes = multi.info_read_codes()
+                for curl, code in codes:
+                    token = attached.pop(curl)
+                    multi.remove_handle(curl)
+                    self.done.put((curl, code, token))
+                multi.poll(_POLL_INTERVAL)
+            except Exception as exc:
+                self.fail(attached, exc)
+
+    def remove(self, attached: dict[Curl, int], curl: Curl, removed: threading.Event) -> None:
+        """Detach *curl* if it is attached and set *removed*."""
+        try:
+            if attached.pop(curl, None) is not None:
+                self.multi.remove_handle(curl)
+        except _pycurl_error:
+            pass
+        finally:
+            removed.set()
+
+    def fail(self, attached: dict[Curl, int], exc: Exception) -> None:
+        """Report the transfers of a multi handle that failed."""
+        # The multi handle will not complete them; whatever raised, the
+        # shard keeps serving commands.
+        if isinstance(exc, _pycurl_error) and exc.args:
+            code = exc.args[0]
+        else:
+            code = E_MULTI_INTERNAL_ERROR
+        for curl, token in attached.items():
+            try:
+                self.multi.remove_handle(curl)
+            except _pycurl_error:
+                pass
+            self.done.put((curl, code, token))
+        attached.clear()
+        # Pace the retries; poll() itself may be what fails.
+        time.sleep(_POLL_INTERVAL)
+
+
+class ShardedMulti:
+    """ShardedMulti(shards=None, share=True) -> ShardedMulti object
+
+    Runs transfers on *shards* :py:class:`pycurl.CurlMulti` handles, each
+    driven by its own thread, and reports completed transfers through a
+    single queue. *shards* defaults to the number of CPUs.
+
+    Each handle goes to one shard: handles added with the same *key* go to
+    the same shard, and handles without a key are spread round-robin. Using
+    the host name of the URL as the key keeps the connections to a host in
+    one shard, where they can be reused.
+
+    *share* is a :py:class:`pycurl.CurlShare` set as the ``SHARE`` option of
+    every added handle, so that the shards share DNS and TLS session caches.
+    ``True``, the default, creates one sharing ``LOCK_DATA_DNS`` and
+    ``LOCK_DATA_SSL_SESSION``. ``False`` leaves the handles alone, which
+    is what handles that already use another share need.
+
+    The callbacks of a handle run in the thread of its shard. Completed
+    handles are removed from their shard before they are reported, so they
+    can be reused right away. If the multi handle of a shard fails, the
+    transfers it was running are reported with the ``E_MULTI_*`` code of
+    the failure. This requires libcurl 7.68.0 or later.
+
+    Example::
+
+        multi = pycurl.ShardedMulti()
+        for url in urls:
+            curl = pycurl.Curl()
+            curl.setopt(pycurl.URL, url)
+            multi.add_handle(curl, key=urllib.parse.urlsplit(url).hostname)
+        for curl, code in multi.completed(len(urls)):
+            print(curl.getinfo(pycurl.EFFECTIVE_URL), code)
+        multi.close()
+    """
+
+    def __init__(
+        self,
+        shards: int | None = None,
+        share: CurlShare | bool = True,
+    ) -> None:
+        if not hasattr(CurlMulti, "wakeup"):
+            raise RuntimeError("ShardedMulti requires libcurl 7.68.0 or later")
+        if shards is None:
+            shards = os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        if share is True:
+            share = CurlShare()
+            share.share(LOCK_DATA_DNS, LOCK_DATA_SSL_SESSION)
+        self._share: CurlShare | None = share or None
+        self._done: queue.SimpleQueue[tuple[Curl, int, int]] = queue.SimpleQueue()
+        self._shards = [_Shard(i, self._done) for i in range(shards)]
+        self._next_shard = itertools.cycle(self._shards)
+        self._lock = threading.Lock()
+        # Shard and token of each handle in flight. The token tells the
+        # completion of the current transfer of a handle from one of a
+        # transfer that was removed.
+        self._in_flight: dict[Curl, tuple[_Shard, int]] = {}
+        self._tokens = itertools.count()
+        # handles that have the share set already; libcurl refuses to set
+        # it twice
+        self._shared: weakref.WeakSet[Curl] = weakref.WeakSet()
+        self._closed: bool = False
+        for shard in self._shards:
+            shard.thread.start()
+
+    def add_handle(self, curl: Curl, key: str | None = None) -> None:
+        """add_handle(curl, key=None) -> None
+
+        Hands *curl* to a shard. Its completion is reported by :py:meth:`get`
+        as a *(curl, code)* pair, where *code* is the ``pycurl.E_*`` result
+        of the transfer, or the error raised by libcurl if it rejected the
+        handle.
+
+        Handles with the same *key* go to the same shard; without a key the
+        shard is chosen round-robin.
+
+        Raises :py:exc:`RuntimeError` after :py:meth:`close` or if *curl* has
+        already been added and has not completed yet.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ShardedMulti is closed")
+            if curl in self._in_flight:
+                raise RuntimeError("Curl handle is already added")
+            if key is None:
+                shard = next(self._next_shard)
+            else:
+                shard = self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+            if self._share is not None and curl not in self._shared:
+                curl.setopt(SHARE, self._share)
+                self._shared.add(curl)
+            token = next(self._tokens)
+            self._in_flight[curl] = (shard, token)
+            # under the lock, so that close() cannot stop the shard first
+            shard.command(_ADD, curl, token)
+
+    def remove_handle(self, curl: Curl) -> None:
+        """remove_handle(curl) -> None
+
+        Removes *curl* from its shard before it completes. The removal
+        happens in the thread of the shard; this call waits for it, after
+        which *curl* may be closed or added again. The handle is not
+        reported by :py:meth:`get`.
+
+        Called from a callback, which runs in the thread of a shard, it
+        does not wait, and *curl* must not be closed or reused until the
+        callback has returned.
+
+        Raises :py:exc:`RuntimeError` if *curl* is not in flight.
+        """
+        removed = threading.Event()
+        with self._lock:
+            entry = self._in_flight.pop(curl, None)
+            if entry is None:
+                raise RuntimeError("Curl handle is not in flight")
+            shard = entry[0]
+            shard.command(_REMOVE, curl, removed)
+        if threading.current_thread() is not shard.thread:
+            removed.wait()
+
+    def get(self, timeout: float | None = None) -> tuple[Curl, int]:
+        """get(timeout=None) -> (curl, code)
+
+        Returns the next completed transfer, waiting up to *timeout*
+        seconds for one, or without limit if *timeout* is ``None``. Raises
+        :py:exc:`queue.Empty` if none completed in time.
+        """
+        while True:
+            curl, code, token = self._done.get(timeout=timeout)
+            with self._lock:
+                # a handle removed after it completed is not reported, even
+                # if it has been added again since
+                entry = self._in_flight.get(curl)
+                if entry is not None and entry[1] == token:
+                    del self._in_flight[curl]
+                    return curl, code
+
+    def completed(self, count: int, timeout: float | None = None) -> Iterator[tuple[Curl, int]]:
+        """completed(count, timeout=None) -> iterator of (curl, code)
+
+        Yields the next *count* completed transfers as :py:meth:`get` returns
+        them, with *timeout* applying to each of them.
+        """
+        for _ in range(count):
+            yield self.get(timeout)
+
+    @property
+    def shards(self) -> int:
+        """Number of shards."""
+        return len(self._shards)
+
+    @property
+    def share(self) -> CurlShare | None:
+        """The :py:class:`pycurl.CurlShare` set on added handles, or ``None``."""
+        return self._share
+
+    def __len__(self) -> int:
+        """Number of handles added and not yet returned by :py:meth:`get`."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def close(self) -> None:
+        """close() -> None
+
+        Stops the shard threads, removes the handles still in flight and
+        closes the multi handles. The easy handles themselves are not
+        closed. Calling ``close`` more than once is allowed.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            in_flight, self._in_flight = self._in_flight, {}
+        for shard in self._shards:
+            shard.command(_STOP)
+        for shard in self._shards:
+            shard.thread.join()
+        for curl, (shard, _) in in_flight.items():
+            try:
+                shard.multi.remove_handle(curl)
+            except _pycurl_error:
+                pass
+        for shard in self._shards:
+            shard.multi.close()
+
+    @property
+    def closed(self) -> bool:
+        """``True`` after :py:meth:`close` has been called."""
+        return self._closed
+
+    def __enter__(self) -> ShardedMulti:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -337,8 +337,9 @@ share_cleanup_and_count_live_easies(CurlShareObject *self)
                 CurlObject *easy = (CurlObject *)obj;
 
                 if (easy && easy->share == self) {
-                    int performing = (easy->state != NULL) ||
-                                     (easy->multi_stack != NULL && easy->multi_stack->state != NULL);
+                    int performing = (PYCURL_LOAD_STATE(easy->state) != NULL) ||
+                                     (easy->multi_stack != NULL &&
+                                      PYCURL_LOAD_STATE(easy->multi_stack->state) != NULL);
 
                     if (self->detach_on_close && !performing) {
                         curl_easy_setopt(easy->handle, CURLOPT_SHARE, NULL);
@@ -598,8 +599,10 @@ do_share_getattro(PyObject *o, PyObject *n)
     if( !v && PyErr_ExceptionMatches(PyExc_AttributeError) )
     {
         PyErr_Clear();
+        Py_BEGIN_CRITICAL_SECTION(o);
         v = my_getattro(o, n, ((CurlShareObject *)o)->dict,
                         curlshareobject_constants, curlshareobject_methods);
+        Py_END_CRITICAL_SECTION();
     }
     return v;
 }
@@ -607,8 +610,12 @@ do_share_getattro(PyObject *o, PyObject *n)
 PYCURL_INTERNAL int
 do_share_setattro(PyObject *o, PyObject *n, PyObject *v)
 {
+    int res;
     assert_share_state((CurlShareObject *)o);
-    return my_setattro(&((CurlShareObject *)o)->dict, n, v);
+    Py_BEGIN_CRITICAL_SECTION(o);
+    res = my_setattro(&((CurlShareObject *)o)->dict, n, v);
+    Py_END_CRITICAL_SECTION();
+    return res;
 }
 
 PYCURL_INTERNAL PyTypeObject CurlShare_Type = {
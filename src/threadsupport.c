@@ -20,11 +20,15 @@ pycurl_get_thread_state_slot(CurlObject *self)
      * `self->multi_stack->state' when running inside multi_perform().
      * When the result is != NULL we also implicitly assert
      * a valid `self->handle'.
+     *
+     * On free-threaded builds the caller holds the critical section of
+     * `self' but not that of its multi handle, whose perform() may be
+     * publishing its state from another thread, hence the atomic loads.
      */
     if (self == NULL)
         return NULL;
     assert(PyObject_IsInstance((PyObject *) self, (PyObject *) p_Curl_Type) == 1);
-    if (self->state != NULL)
+    if (PYCURL_LOAD_STATE(self->state) != NULL)
     {
         /* inside perform() */
         assert(self->handle != NULL);
@@ -33,7 +37,7 @@ pycurl_get_thread_state_slot(CurlObject *self)
         }
         return &self->state;
     }
-    if (self->multi_stack != NULL && self->multi_stack->state != NULL)
+    if (self->multi_stack != NULL && PYCURL_LOAD_STATE(self->multi_stack->state) != NULL)
     {
         /* inside multi_perform() */
         assert(self->handle != NULL);
@@ -54,7 +58,7 @@ pycurl_get_thread_state_slot_multi(CurlMultiObject *self)
     if (self == NULL)
         return NULL;
     assert(PyObject_IsInstance((PyObject *) self, (PyObject *) p_CurlMulti_Type) == 1);
-    if (self->state != NULL)
+    if (PYCURL_LOAD_STATE(self->state) != NULL)
     {
         /* inside multi_perform() */
         assert(self->multi_handle != NULL);
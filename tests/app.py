@@ -41,6 +41,21 @@ def upload_redirect():
 def upload_target():
     return str(len(flask.request.get_data()))
 
+@app.route('/echo', methods=['PUT', 'POST'])
+def echo():
+    return flask.Response(flask.request.get_data(),
+        mimetype='application/octet-stream')
+
+@app.route('/redirect')
+def redirect():
+    return flask.Response(status=302,
+        headers={'Location': flask.url_for('ok')})
+
+@app.route('/repeated_header')
+def repeated_header():
+    return flask.Response('success',
+        headers=[('X-Repeated', 'one'), ('X-Repeated', 'two')])
+
 @app.route('/raw_utf8', methods=['POST'])
 def raw_utf8():
     data = flask.request.data.decode('utf8')
@@ -120,6 +135,12 @@ def chunks():
             _time.sleep(delay)
     return flask.Response(gen(), mimetype='text/plain')
 
+@app.route('/bytes')
+def bytes_body():
+    size = int(flask.request.args.get('size', 1024))
+    body = bytes(range(256)) * (size // 256 + 1)
+    return flask.Response(body[:size], mimetype='application/octet-stream')
+
 @app.route('/utf8_body')
 def utf8_body():
     # bottle encodes the body
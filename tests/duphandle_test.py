@@ -162,3 +162,68 @@ def test_duphandle_after_close_raises(curl):
     curl.close()
     with pytest.raises(pycurl.error, match="no curl handle"):
         curl.duphandle()
+
+
+def test_duphandle_many(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/header?h=X-Test")
+    curl.setopt(pycurl.HTTPHEADER, ["X-Test: many"])
+    dups = curl.duphandle_many(3)
+    assert len(dups) == 3
+    assert len(set(map(id, dups))) == 3
+    for dup in dups:
+        assert isinstance(dup, pycurl.Curl)
+        assert dup.perform_rb() == b"many"
+        dup.close()
+
+
+def test_duphandle_many_urls(curl, app):
+    bodies = []
+    curl.setopt(pycurl.WRITEFUNCTION, bodies.append)
+    urls = [f"{app}/success?n=0", f"{app}/success?n=1", b"%s/success?n=2" % app.encode()]
+    dups = curl.duphandle_many(urls=iter(urls))
+    assert len(dups) == 3
+    for i, dup in enumerate(dups):
+        dup.perform()
+        assert dup.getinfo(pycurl.EFFECTIVE_URL) == f"{app}/success?n={i}"
+        dup.close()
+    assert bodies == [b"success"] * 3
+
+
+def test_duphandle_many_zero(curl):
+    assert curl.duphandle_many(0) == []
+    assert curl.duphandle_many(urls=[]) == []
+
+
+@pytest.mark.parametrize("kwargs, exc", [
+    ({}, ValueError),
+    ({"n": -1}, ValueError),
+    ({"n": 2, "urls": ["http://localhost/"]}, ValueError),
+    ({"urls": 1}, TypeError),
+    ({"urls": [1]}, TypeError),
+    ({"urls": ["http://local\0host/"]}, ValueError),
+])
+def test_duphandle_many_invalid(curl, kwargs, exc):
+    with pytest.raises(exc):
+        curl.duphandle_many(**kwargs)
+
+
+def test_duphandle_many_after_close_raises(curl):
+    curl.close()
+    with pytest.raises(pycurl.error, match="no curl handle"):
+        curl.duphandle_many(1)
+
+
+@pytest.mark.parametrize("option", [pycurl.WRITEDATA, pycurl.WRITEHEADER])
+def test_duphandle_many_with_sink_raises(curl, option):
+    curl.setopt(option, pycurl.BufferSink())
+    with pytest.raises(pycurl.error, match="sink"):
+        curl.duphandle_many(2)
+
+
+def test_duphandle_mmap_sink_raises(curl, tmp_path):
+    with open(tmp_path / "out", "w+b") as f:
+        curl.setopt(pycurl.WRITEDATA, pycurl.MmapSink(f))
+        with pytest.raises(pycurl.error, match="MmapSink"):
+            curl.duphandle()
+        with pytest.raises(pycurl.error, match="sink"):
+            curl.duphandle_many(1)
@@ -171,3 +171,48 @@ def test_deprecated_getinfo_options(curl, app, option):
     make_request(curl, app)
     with pytest.warns(DeprecationWarning, match=DEPRECATED_STR):
         curl.getinfo(option)
+
+def test_getinfo_many(curl, app):
+    make_request(curl, app)
+    options = [pycurl.RESPONSE_CODE, pycurl.CONTENT_TYPE, pycurl.TOTAL_TIME, pycurl.EFFECTIVE_URL]
+    info = curl.getinfo_many(options)
+    assert info == {option: curl.getinfo(option) for option in options}
+
+def test_getinfo_many_empty(curl, app):
+    make_request(curl, app)
+    assert {} == curl.getinfo_many(())
+
+def test_getinfo_many_invalid_option(curl, app):
+    make_request(curl, app)
+    with pytest.raises(ValueError):
+        curl.getinfo_many([pycurl.RESPONSE_CODE, -1])
+    with pytest.raises(TypeError):
+        curl.getinfo_many([pycurl.RESPONSE_CODE, "x"])
+    with pytest.raises(TypeError):
+        curl.getinfo_many(pycurl.RESPONSE_CODE)
+
+def test_getinfo_many_closed(curl):
+    curl.close()
+    with pytest.raises(pycurl.error):
+        curl.getinfo_many([pycurl.RESPONSE_CODE])
+
+@util.min_libcurl(7, 61, 0)
+def test_stats(curl, app):
+    make_request(curl, app)
+    stats = curl.stats()
+    assert isinstance(stats, pycurl.TransferStats)
+    assert isinstance(stats, tuple)
+    assert 200 == stats.response_code
+    assert 7 == stats.size_download
+    assert stats.total_time == curl.getinfo(pycurl.TOTAL_TIME_T)
+    assert stats.connect_time == curl.getinfo(pycurl.CONNECT_TIME_T)
+    assert stats.header_size == curl.getinfo(pycurl.HEADER_SIZE)
+    assert stats.primary_port == curl.getinfo(pycurl.PRIMARY_PORT)
+    assert 0 == stats.redirect_count
+    assert 1 == stats.num_connects
+    assert all(value is None or type(value) is int for value in stats)
+
+def test_stats_closed(curl):
+    curl.close()
+    with pytest.raises(pycurl.error):
+        curl.stats()
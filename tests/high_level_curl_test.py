@@ -9,6 +9,7 @@ with pytest.warns(
     match="The 'curl' high-level wrapper module is deprecated and will be removed in a future release. Use 'pycurl' directly instead.",
 ):
     import curl
+import pycurl
 import unittest
 
 from . import appmanager
@@ -38,3 +39,18 @@ class RelativeUrlTest(unittest.TestCase):
 
         result = self.curl.get('/success')
         self.assertEqual('success', result.decode())
+
+    def test_header(self):
+        self.curl.get('/success')
+        header = self.curl.header()
+        self.assertTrue(header.startswith('HTTP/1.'))
+        self.assertIn('Content-Length: 7\r\n', header)
+
+        self.curl.get('/success')
+        self.assertEqual(1, self.curl.header().count('HTTP/1.'))
+
+    def test_header_of_failed_transfer(self):
+        self.curl.set_option(pycurl.TIMEOUT_MS, 300)
+        with pytest.raises(pycurl.error):
+            self.curl.get('/long_pause')
+        self.assertTrue(self.curl.header().startswith('HTTP/1.'))
@@ -50,3 +50,36 @@ class PerformTest(unittest.TestCase):
             pass
         else:
             self.fail('Should have raised')
+
+    def test_perform_rb_large(self):
+        # sized from Content-Length
+        size = 1000000
+        self.curl.setopt(pycurl.URL, 'http://%s:8380/bytes?size=%d' % (localhost, size))
+        body = self.curl.perform_rb()
+        self.assertEqual((bytes(range(256)) * (size // 256 + 1))[:size], body)
+
+    def test_perform_rb_chunked(self):
+        # no Content-Length to size the buffer from
+        self.curl.setopt(pycurl.URL, 'http://%s:8380/chunks?num_chunks=3&delay=0' % localhost)
+        body = self.curl.perform_rb()
+        self.assertEqual(util.b('chunk0\nchunk1\nchunk2\n'), body)
+
+    def test_perform_rb_repeated(self):
+        self.curl.setopt(pycurl.URL, 'http://%s:8380/success' % localhost)
+        self.assertEqual(util.b('success'), self.curl.perform_rb())
+        self.assertEqual(util.b('success'), self.curl.perform_rb())
+
+    def test_perform_rb_keeps_writedata(self):
+        sink = pycurl.BufferSink()
+        self.curl.setopt(pycurl.WRITEDATA, sink)
+        self.curl.setopt(pycurl.URL, 'http://%s:8380/success' % localhost)
+        self.assertEqual(util.b('success'), self.curl.perform_rb())
+        self.assertEqual(util.b(''), sink.getvalue())
+        self.curl.perform()
+        self.assertEqual(util.b('success'), sink.getvalue())
+
+    def test_perform_rb_empty(self):
+        self.curl.setopt(pycurl.URL, 'http://%s:8380/success' % localhost)
+        self.curl.setopt(pycurl.NOBODY, True)
+        self.assertEqual(util.b(''), self.curl.perform_rb())
+        self.assertEqual(util.u(''), self.curl.perform_rs())
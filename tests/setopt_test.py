@@ -241,3 +241,79 @@ def test_httppost_bufferptr_stays_pinned(curl):
     with pytest.warns(DeprecationWarning, match="HTTPPOST is deprecated"):
         curl.setopt(pycurl.HTTPPOST, [("field", [pycurl.FORM_CONTENTS, "other"])])
     assert sys.getrefcount(payload) == before
+
+
+def test_setopt_many(app, curl):
+    body = BytesIO()
+    curl.setopt_many({
+        pycurl.URL: f"{app}/header?h=x-test",
+        pycurl.HTTPHEADER: ["X-Test: many"],
+        pycurl.TIMEOUT_MS: 5000,
+        pycurl.WRITEDATA: body,
+    })
+    curl.perform()
+    assert body.getvalue() == b"many"
+
+
+def test_setopt_many_empty(curl):
+    curl.setopt_many({})
+
+
+def test_setopt_many_none_unsets(app, curl):
+    curl.setopt(pycurl.HTTPHEADER, ["X-Test: many"])
+    body = BytesIO()
+    curl.setopt_many({
+        pycurl.URL: f"{app}/header?h=x-test",
+        pycurl.HTTPHEADER: None,
+        pycurl.WRITEDATA: body,
+    })
+    curl.perform()
+    assert body.getvalue() == b""
+
+
+@pytest.mark.parametrize("options", [
+    {"url": "http://localhost"},
+    {-1: 1},
+    {10**20: 1},
+])
+def test_setopt_many_invalid_option_sets_nothing(app, curl, options):
+    body = BytesIO()
+    curl.setopt(pycurl.WRITEDATA, body)
+    with pytest.raises((TypeError, OverflowError)):
+        curl.setopt_many({pycurl.WRITEDATA: None, **options})
+    # WRITEDATA was not unset
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.perform()
+    assert body.getvalue() == b"success"
+
+
+def test_setopt_many_invalid_value(curl):
+    with pytest.raises(TypeError):
+        curl.setopt_many({pycurl.URL: "http://localhost", pycurl.VERBOSE: "yes"})
+
+
+def test_setopt_many_invalid_value_sets_nothing(app, curl):
+    body = BytesIO()
+    curl.setopt(pycurl.WRITEDATA, body)
+    curl.setopt(pycurl.URL, f"{app}/success")
+    with pytest.raises(TypeError):
+        curl.setopt_many({
+            pycurl.WRITEDATA: None,
+            pycurl.URL: "http://localhost:1/",
+            pycurl.VERBOSE: "yes",
+        })
+    # neither WRITEDATA nor URL was changed
+    curl.perform()
+    assert body.getvalue() == b"success"
+
+
+@pytest.mark.parametrize("options", [[(pycurl.VERBOSE, 1)], None, 1])
+def test_setopt_many_requires_mapping(curl, options):
+    with pytest.raises(TypeError):
+        curl.setopt_many(options)
+
+
+def test_setopt_many_closed(curl):
+    curl.close()
+    with pytest.raises(pycurl.error):
+        curl.setopt_many({pycurl.VERBOSE: 1})
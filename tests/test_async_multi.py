@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import sys
+import threading
 from collections.abc import Callable, Coroutine, Iterator
 from io import BytesIO
 from typing import Any
@@ -353,6 +354,42 @@ def test_gather_with_sibling_failure(app: str) -> None:
     _run(main())
 
 
+def test_socket_action_failure_spares_queued(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(max_in_flight=1) as multi:
+            handles = [_easy(f"{app}/long_pause")[0] for _ in range(2)]
+            try:
+                running = multi.add_handle(handles[0])
+                queued = multi.add_handle(handles[1])
+                injected = pycurl.error(7, "injected socket_action failure")
+                real_multi = multi._multi
+
+                class _RaisingMulti:
+                    def __getattr__(self, name: str) -> Any:
+                        return getattr(real_multi, name)
+
+                    def socket_action(self, fd: int, mask: int, collect: bool = False) -> None:
+                        raise injected
+
+                multi._multi = _RaisingMulti()  # type: ignore[assignment]
+                try:
+                    multi._fire_timeout()
+                finally:
+                    multi._multi = real_multi
+
+                with pytest.raises(pycurl.error):
+                    await running
+                # the queued transfer was handed to libcurl instead of failing
+                assert not queued.done()
+                assert multi.pending == 0 and multi.in_flight == 1
+                multi.remove_handle(handles[1])
+            finally:
+                for c in handles:
+                    c.close()
+
+    _run(main())
+
+
 def test_socket_action_failure_fails_pending_futures() -> None:
     async def main() -> None:
         multi = pycurl.AsyncCurlMulti()
@@ -368,14 +405,14 @@ def test_socket_action_failure_fails_pending_futures() -> None:
             real_multi = multi._multi
 
             class _RaisingMulti:
-                def socket_action(self, fd: int, mask: int) -> None:
+                def socket_action(self, fd: int, mask: int, collect: bool = False) -> None:
                     raise injected
 
                 def remove_handle(self, curl: object) -> None:
                     pass
 
-                def info_read(self, *_a: object) -> tuple[int, list, list]:
-                    return (0, [], [])
+                def info_read_codes(self, *_a: object) -> tuple[int, list]:
+                    return (0, [])
 
                 @property
                 def closed(self) -> bool:
@@ -720,6 +757,101 @@ def test_futures_compose_with_gather(app: str) -> None:
     _run(main())
 
 
+def test_stream_yields_body(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti() as multi:
+            curl = pycurl.Curl()
+            curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=5&delay=0.01")
+            try:
+                chunks = [chunk async for chunk in multi.stream(curl)]
+                assert b"".join(chunks) == b"".join(
+                    f"chunk{i}\n".encode() for i in range(5)
+                )
+                assert curl.getinfo(pycurl.RESPONSE_CODE) == 200
+                assert multi.futures() == ()
+            finally:
+                curl.close()
+
+    _run(main())
+
+
+def test_stream_slow_consumer_pauses_transfer(app: str) -> None:
+    size = 10000000
+
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti() as multi:
+            curl = pycurl.Curl()
+            curl.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+            curl.setopt(pycurl.NOPROGRESS, False)
+            progress = [0]
+
+            def xferinfo(dltotal: int, dlnow: int, ultotal: int, ulnow: int) -> None:
+                progress[0] = dlnow
+
+            curl.setopt(pycurl.XFERINFOFUNCTION, xferinfo)
+            try:
+                received = 0
+                async for chunk in multi.stream(curl, max_queue=2):
+                    if received == 0:
+                        # let the transfer run while nothing is consumed
+                        await asyncio.sleep(0.3)
+                        assert progress[0] < size // 2
+                    received += len(chunk)
+                assert received == size
+            finally:
+                curl.close()
+
+    _run(main())
+
+
+def test_stream_failure_raises() -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti() as multi:
+            curl = pycurl.Curl()
+            curl.setopt(pycurl.URL, "http://127.0.0.1:1/")
+            curl.setopt(pycurl.CONNECTTIMEOUT, 2)
+            try:
+                with pytest.raises(pycurl.error) as excinfo:
+                    async for _ in multi.stream(curl):
+                        pass
+                assert excinfo.value.args[0] == pycurl.E_COULDNT_CONNECT
+            finally:
+                curl.close()
+
+    _run(main())
+
+
+def test_stream_early_exit_removes_handle(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti() as multi:
+            curl = pycurl.Curl()
+            curl.setopt(pycurl.URL, f"{app}/bytes?size=10000000")
+            try:
+                stream = multi.stream(curl, max_queue=1)
+                assert await stream.__anext__()
+                assert len(multi.futures()) == 1
+                await stream.aclose()
+                assert multi.futures() == ()
+                assert curl.multi() is None
+            finally:
+                curl.close()
+
+    _run(main())
+
+
+def test_stream_invalid_max_queue(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti() as multi:
+            curl = pycurl.Curl()
+            try:
+                with pytest.raises(ValueError):
+                    await multi.stream(curl, max_queue=0).__anext__()
+            finally:
+                curl.close()
+
+    _run(main())
+
+
 @pytest.mark.skipif(
     util.pycurl_version_less_than(8, 17, 0),
     reason="libcurl < 8.17.0",
@@ -756,3 +888,451 @@ class TestNotify:
                     curl.close()
 
         _run(main())
+
+
+def test_max_in_flight(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(max_in_flight=2) as multi:
+            handles = [_easy(f"{app}/short_wait?delay=0.1") for _ in range(5)]
+            observed = []
+            try:
+                futures = [multi.add_handle(c) for c, _ in handles]
+                assert (multi.in_flight, multi.pending) == (2, 3)
+                for fut in asyncio.as_completed(futures):
+                    await fut
+                    observed.append(multi.in_flight)
+                assert max(observed) <= 2
+                assert (multi.in_flight, multi.pending) == (0, 0)
+                for c, buf in handles:
+                    assert c.getinfo(pycurl.RESPONSE_CODE) == 200
+            finally:
+                for c, _ in handles:
+                    c.close()
+
+    _run(main())
+
+
+def test_priority_jumps_queue(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(max_in_flight=1) as multi:
+            bulk = [_easy(f"{app}/success")[0] for _ in range(3)]
+            urgent, _ = _easy(f"{app}/success")
+            order: list[pycurl.Curl] = []
+            try:
+                futures = [multi.add_handle(c, priority=1) for c in bulk]
+                futures.append(multi.add_handle(urgent, priority=-1))
+                for fut in futures:
+                    fut.add_done_callback(lambda f: order.append(f.result()))
+                await asyncio.gather(*futures)
+                # the first bulk transfer was already running
+                assert order == [bulk[0], urgent, bulk[1], bulk[2]]
+            finally:
+                for c in bulk + [urgent]:
+                    c.close()
+
+    _run(main())
+
+
+def test_max_per_host(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(max_per_host=1) as multi:
+            handles = [_easy(f"{app}/short_wait?delay=0.1")[0] for _ in range(4)]
+            try:
+                futures = [multi.add_handle(c, host="a") for c in handles[:3]]
+                futures.append(multi.add_handle(handles[3], host="b"))
+                assert (multi.in_flight, multi.pending) == (2, 2)
+                await asyncio.gather(*futures)
+                assert multi.pending == 0
+            finally:
+                for c in handles:
+                    c.close()
+
+    _run(main())
+
+
+def test_host_pending_handle_removed(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(max_per_host=1) as multi:
+            handles = [_easy(f"{app}/short_wait?delay=0.1")[0] for _ in range(3)]
+            try:
+                first, _, last = [multi.add_handle(c, host="h") for c in handles]
+                multi.remove_handle(handles[1])
+                assert await first is handles[0]
+                assert await asyncio.wait_for(last, 5) is handles[2]
+                assert (multi.in_flight, multi.pending) == (0, 0)
+            finally:
+                for c in handles:
+                    c.close()
+
+    _run(main())
+
+
+def test_queued_handle_cancel_and_remove(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(max_in_flight=1) as multi:
+            handles = [_easy(f"{app}/success")[0] for _ in range(3)]
+            try:
+                first, cancelled, _ = [multi.add_handle(c) for c in handles]
+                removed = multi.futures([handles[2]])[0]
+                cancelled.cancel()
+                multi.remove_handle(handles[2])
+                assert removed.cancelled()
+                await asyncio.sleep(0)
+                assert multi.pending == 0
+                assert await first is handles[0]
+                assert multi.futures() == ()
+            finally:
+                for c in handles:
+                    c.close()
+
+    _run(main())
+
+
+def test_aclose_cancels_queued(app: str) -> None:
+    async def main() -> None:
+        multi = pycurl.AsyncCurlMulti(max_in_flight=1)
+        handles = [_easy(f"{app}/long_pause")[0] for _ in range(2)]
+        try:
+            futures = [multi.add_handle(c) for c in handles]
+            await multi.aclose()
+            assert all(fut.cancelled() for fut in futures)
+            assert multi.pending == 0
+        finally:
+            for c in handles:
+                c.close()
+
+    _run(main())
+
+
+def test_queued_handle_rejected(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(max_in_flight=1) as multi:
+            first, _ = _easy(f"{app}/success")
+            closed, _ = _easy(f"{app}/success")
+            closed.close()
+            try:
+                futures = [multi.add_handle(first), multi.add_handle(closed)]
+                await futures[0]
+                with pytest.raises(pycurl.error):
+                    await futures[1]
+            finally:
+                first.close()
+
+    _run(main())
+
+
+@pytest.mark.parametrize("kwargs", [{"max_in_flight": 0}, {"max_per_host": 0}])
+def test_invalid_limits(kwargs: dict[str, int]) -> None:
+    with pytest.raises(ValueError):
+        pycurl.AsyncCurlMulti(**kwargs)
+
+
+def test_deadline_expires(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti() as multi:
+            loop = asyncio.get_running_loop()
+            slow = [_easy(f"{app}/long_pause")[0] for _ in range(3)]
+            fast, _ = _easy(f"{app}/success")
+            try:
+                deadline = loop.time() + 0.2
+                futures = [multi.add_handle(c, deadline=deadline) for c in slow]
+                futures.append(multi.add_handle(fast, deadline=loop.time() + 30))
+                results = await asyncio.gather(*futures, return_exceptions=True)
+                assert loop.time() - deadline < 2
+                for exc in results[:3]:
+                    assert isinstance(exc, pycurl.error)
+                    assert exc.args[0] == pycurl.E_OPERATION_TIMEDOUT
+                assert results[3] is fast
+                assert multi.in_flight == 0
+            finally:
+                for c in slow + [fast]:
+                    c.close()
+
+    _run(main())
+
+
+def test_deadline_of_queued_handle(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(max_in_flight=1) as multi:
+            loop = asyncio.get_running_loop()
+            running, _ = _easy(f"{app}/short_wait?delay=0.5")
+            queued, _ = _easy(f"{app}/success")
+            try:
+                first = multi.add_handle(running)
+                second = multi.add_handle(queued, deadline=loop.time() + 0.1)
+                with pytest.raises(pycurl.error):
+                    await second
+                assert multi.pending == 0
+                assert multi.in_flight == 1
+                assert await first is running
+            finally:
+                running.close()
+                queued.close()
+
+    _run(main())
+
+
+def test_deadline_of_host_pending_handle(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(max_per_host=1) as multi:
+            loop = asyncio.get_running_loop()
+            handles = [_easy(f"{app}/short_wait?delay=0.3")[0] for _ in range(3)]
+            try:
+                first = multi.add_handle(handles[0], host="h")
+                expired = multi.add_handle(handles[1], host="h", deadline=loop.time() + 0.1)
+                last = multi.add_handle(handles[2], host="h")
+                with pytest.raises(pycurl.error):
+                    await expired
+                assert multi.pending == 1
+                assert await first is handles[0]
+                assert await asyncio.wait_for(last, 5) is handles[2]
+                assert (multi.in_flight, multi.pending) == (0, 0)
+            finally:
+                for c in handles:
+                    c.close()
+
+    _run(main())
+
+
+def test_deadline_after_completion(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti() as multi:
+            loop = asyncio.get_running_loop()
+            curl, _ = _easy(f"{app}/success")
+            try:
+                assert await multi.perform(curl, deadline=loop.time() + 0.1) is curl
+                await asyncio.sleep(0.2)
+                assert multi.in_flight == 0
+            finally:
+                curl.close()
+
+    _run(main())
+
+
+only_threaded = pytest.mark.skipif(
+    not hasattr(pycurl.CurlMulti, "wakeup"), reason="libcurl < 7.68.0"
+)
+
+
+@only_threaded
+def test_threaded_perform(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(threaded=True) as multi:
+            handles = [_easy(f"{app}/success") for _ in range(3)]
+            threads = set()
+
+            def writer(buf: BytesIO) -> Callable[[bytes], None]:
+                def write(data: bytes) -> None:
+                    threads.add(threading.get_ident())
+                    buf.write(data)
+
+                return write
+
+            for c, buf in handles:
+                c.setopt(pycurl.WRITEFUNCTION, writer(buf))
+            try:
+                results = await asyncio.gather(*[multi.perform(c) for c, _ in handles])
+                assert results == [c for c, _ in handles]
+                for c, buf in handles:
+                    assert buf.getvalue() == b"success"
+                # easy callbacks run in the worker thread
+                assert threads and threading.get_ident() not in threads
+                # completed handles are detached and can be added again
+                assert await multi.perform(handles[0][0]) is handles[0][0]
+            finally:
+                for c, _ in handles:
+                    c.close()
+
+    _run(main())
+
+
+@only_threaded
+def test_threaded_failure() -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(threaded=True) as multi:
+            curl = pycurl.Curl()
+            curl.setopt(pycurl.URL, "http://127.0.0.1:1/")
+            try:
+                with pytest.raises(pycurl.error) as excinfo:
+                    await multi.perform(curl)
+                assert excinfo.value.args[0] == pycurl.E_COULDNT_CONNECT
+            finally:
+                curl.close()
+
+    _run(main())
+
+
+class _BrokenMulti:
+    """Wraps a CurlMulti whose perform() raises *exc*; with *times*, only
+    that many times once a handle has been added."""
+
+    def __init__(
+        self, multi: pycurl.CurlMulti, exc: BaseException, times: int | None = None
+    ) -> None:
+        self._multi = multi
+        self._exc = exc
+        self._times = times
+        self._armed = times is None
+        self.performs = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._multi, name)
+
+    def add_handle(self, curl: pycurl.Curl) -> None:
+        self._multi.add_handle(curl)
+        self._armed = True
+
+    def perform(self) -> tuple[int, int]:
+        if not self._armed:
+            return self._multi.perform()
+        self.performs += 1
+        if self._times is not None and self.performs > self._times:
+            return self._multi.perform()
+        raise self._exc
+
+
+@only_threaded
+def test_threaded_multi_error_is_paced(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(threaded=True) as multi:
+            broken = _BrokenMulti(multi._multi, pycurl.error(pycurl.E_MULTI_INTERNAL_ERROR))
+            multi._multi = broken
+            handles = [_easy(f"{app}/success")[0] for _ in range(2)]
+            try:
+                results = await asyncio.gather(
+                    *[multi.add_handle(c) for c in handles], return_exceptions=True
+                )
+                assert all(isinstance(exc, pycurl.error) for exc in results)
+                await asyncio.sleep(0.3)
+                # the worker waits in poll() after a failure instead of
+                # spinning; only the wakeups of the adds end the wait early
+                assert broken.performs < 10
+                # and keeps running for later transfers
+                with pytest.raises(pycurl.error):
+                    await asyncio.wait_for(multi.add_handle(handles[0]), 5)
+            finally:
+                for c in handles:
+                    c.close()
+
+    _run(main())
+
+
+@only_threaded
+def test_threaded_multi_error_spares_queued(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(threaded=True, max_in_flight=1) as multi:
+            error = pycurl.error(pycurl.E_MULTI_INTERNAL_ERROR)
+            multi._multi = _BrokenMulti(multi._multi, error, times=1)
+            handles = [_easy(f"{app}/success")[0] for _ in range(3)]
+            try:
+                results = await asyncio.wait_for(
+                    asyncio.gather(
+                        *[multi.add_handle(c) for c in handles], return_exceptions=True
+                    ),
+                    10,
+                )
+                # only the transfer libcurl was running fails
+                assert results == [error, handles[1], handles[2]]
+            finally:
+                for c in handles:
+                    c.close()
+
+    _run(main())
+
+
+@only_threaded
+def test_threaded_worker_crash(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(threaded=True) as multi:
+            multi._multi = _BrokenMulti(multi._multi, ValueError("boom"))
+            curl, _ = _easy(f"{app}/success")
+            try:
+                with pytest.raises(ValueError):
+                    await asyncio.wait_for(multi.add_handle(curl), 5)
+                with pytest.raises(RuntimeError):
+                    multi.add_handle(curl)
+            finally:
+                curl.close()
+
+    _run(main())
+
+
+@only_threaded
+def test_threaded_cancel_and_aclose(app: str) -> None:
+    async def main() -> None:
+        multi = pycurl.AsyncCurlMulti(threaded=True)
+        handles = [_easy(f"{app}/long_pause")[0] for _ in range(2)]
+        try:
+            cancelled = multi.add_handle(handles[0])
+            pending = multi.add_handle(handles[1])
+            await asyncio.sleep(0.05)
+            cancelled.cancel()
+            await asyncio.sleep(0.05)
+            assert multi.in_flight == 1
+            await multi.aclose()
+            assert pending.cancelled()
+            assert multi.closed
+            assert handles[0].multi() is None and handles[1].multi() is None
+        finally:
+            for c in handles:
+                c.close()
+
+    _run(main())
+
+
+@only_threaded
+def test_threaded_stream_pauses_transfer(app: str) -> None:
+    size = 10000000
+
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(threaded=True) as multi:
+            curl = pycurl.Curl()
+            curl.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+            try:
+                received = 0
+                async for chunk in multi.stream(curl, max_queue=2):
+                    if received == 0:
+                        await asyncio.sleep(0.1)
+                    received += len(chunk)
+                assert received == size
+            finally:
+                curl.close()
+
+    _run(main())
+
+
+@only_threaded
+def test_threaded_limits_and_deadline(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(threaded=True, max_in_flight=1) as multi:
+            loop = asyncio.get_running_loop()
+            slow, _ = _easy(f"{app}/long_pause")
+            fast, _ = _easy(f"{app}/success")
+            try:
+                first = multi.add_handle(slow, deadline=loop.time() + 0.2)
+                second = multi.add_handle(fast)
+                assert multi.pending == 1
+                with pytest.raises(pycurl.error):
+                    await first
+                assert await second is fast
+            finally:
+                slow.close()
+                fast.close()
+
+    _run(main())
+
+
+@only_threaded
+def test_threaded_setopt_before_start(app: str) -> None:
+    async def main() -> None:
+        async with pycurl.AsyncCurlMulti(threaded=True) as multi:
+            multi.setopt(pycurl.M_MAXCONNECTS, 4)
+            curl, _ = _easy(f"{app}/success")
+            try:
+                await multi.perform(curl)
+                with pytest.raises(RuntimeError):
+                    multi.setopt(pycurl.M_MAXCONNECTS, 8)
+            finally:
+                curl.close()
+
+    _run(main())
@@ -0,0 +1,165 @@
+import threading
+import weakref
+
+import pycurl
+import pytest
+
+
+def expected_bytes(size):
+    return (bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+def test_empty():
+    sink = pycurl.BufferSink()
+    assert len(sink) == 0
+    assert sink.getvalue() == b""
+
+
+def test_no_arguments():
+    with pytest.raises(TypeError):
+        pycurl.BufferSink(1)
+
+
+def test_writedata(curl, app):
+    sink = pycurl.BufferSink()
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEDATA, sink)
+    curl.perform()
+    assert sink.getvalue() == b"success"
+    assert len(sink) == 7
+
+
+def test_writedata_grows_buffer(curl, app):
+    size = 1000000
+    sink = pycurl.BufferSink()
+    curl.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+    curl.setopt(pycurl.WRITEDATA, sink)
+    curl.perform()
+    assert sink.getvalue() == expected_bytes(size)
+
+
+def test_writeheader(curl, app):
+    body = pycurl.BufferSink()
+    headers = pycurl.BufferSink()
+    curl.setopt(pycurl.URL, f"{app}/header?h=x-test")
+    curl.setopt(pycurl.HTTPHEADER, ["x-test: value"])
+    curl.setopt(pycurl.WRITEDATA, body)
+    curl.setopt(pycurl.WRITEHEADER, headers)
+    curl.perform()
+    assert body.getvalue() == b"value"
+    assert headers.getvalue().startswith(b"HTTP/1.")
+    assert headers.getvalue().endswith(b"\r\n\r\n")
+
+
+def test_accumulates_across_transfers_until_cleared(curl, app):
+    sink = pycurl.BufferSink()
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEDATA, sink)
+    curl.perform()
+    curl.perform()
+    assert sink.getvalue() == b"successsuccess"
+    sink.clear()
+    assert len(sink) == 0
+    curl.perform()
+    assert sink.getvalue() == b"success"
+
+
+def test_accumulates_large_bodies(curl, app):
+    # each transfer overflows the buffer presized for the one before
+    sink = pycurl.BufferSink()
+    curl.setopt(pycurl.URL, f"{app}/bytes?size=100000")
+    curl.setopt(pycurl.WRITEDATA, sink)
+    for _ in range(20):
+        curl.perform()
+    assert sink.getvalue() == expected_bytes(100000) * 20
+
+
+def test_writefunction_replaces_sink(curl, app):
+    sink = pycurl.BufferSink()
+    chunks = []
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEDATA, sink)
+    curl.setopt(pycurl.WRITEFUNCTION, chunks.append)
+    curl.perform()
+    assert b"".join(chunks) == b"success"
+    assert sink.getvalue() == b""
+
+
+def test_sink_replaces_writefunction(curl, app):
+    sink = pycurl.BufferSink()
+    chunks = []
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEFUNCTION, chunks.append)
+    curl.setopt(pycurl.WRITEDATA, sink)
+    curl.perform()
+    assert chunks == []
+    assert sink.getvalue() == b"success"
+
+
+def test_unsetopt_writeheader_removes_sink(curl, app):
+    sink = pycurl.BufferSink()
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEFUNCTION, lambda data: None)
+    curl.setopt(pycurl.WRITEHEADER, sink)
+    curl.unsetopt(pycurl.WRITEHEADER)
+    curl.perform()
+    assert sink.getvalue() == b""
+
+
+def test_unsetopt_headerfunction_removes_sink(curl, app):
+    sink = pycurl.BufferSink()
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEFUNCTION, lambda data: None)
+    curl.setopt(pycurl.WRITEHEADER, sink)
+    curl.unsetopt(pycurl.HEADERFUNCTION)
+    curl.perform()
+    assert sink.getvalue() == b""
+
+
+def test_readdata_rejected(curl):
+    with pytest.raises(TypeError):
+        curl.setopt(pycurl.READDATA, pycurl.BufferSink())
+
+
+def test_duphandle(curl, app):
+    sink = pycurl.BufferSink()
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEDATA, sink)
+    dup = curl.duphandle()
+    curl.close()
+    dup.perform()
+    dup.close()
+    assert sink.getvalue() == b"success"
+
+
+def test_handle_keeps_sink_alive(curl, app):
+    sink = pycurl.BufferSink()
+    ref = weakref.ref(sink)
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEDATA, sink)
+    del sink
+    assert ref() is not None
+    curl.perform()
+    assert ref().getvalue() == b"success"
+    curl.reset()
+    assert ref() is None
+
+
+def test_concurrent_transfers(app):
+    size = 100000
+    sinks = [pycurl.BufferSink() for _ in range(4)]
+
+    def fetch(sink):
+        c = pycurl.Curl()
+        c.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+        c.setopt(pycurl.WRITEDATA, sink)
+        c.perform()
+        c.close()
+
+    threads = [threading.Thread(target=fetch, args=(sink,)) for sink in sinks]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for sink in sinks:
+        assert sink.getvalue() == expected_bytes(size)
@@ -0,0 +1,126 @@
+import threading
+
+import pycurl
+import pytest
+
+
+@pytest.fixture
+def pool():
+    pool = pycurl.CurlPool()
+    yield pool
+    pool.close()
+
+
+def test_lease_reuses_handle(app, pool):
+    with pool.lease() as curl:
+        curl.setopt(pycurl.URL, f"{app}/success")
+        assert curl.perform_rb() == b"success"
+    with pool.lease() as again:
+        assert again is curl
+    assert pool.stats() == pycurl.CurlPoolStats(hits=1, misses=1, idle=1, leased=0, discarded=0)
+
+
+def test_base_options_restored(app):
+    pool = pycurl.CurlPool({pycurl.HTTPHEADER: ["X-Test: base"]})
+    try:
+        with pool.lease() as curl:
+            curl.setopt(pycurl.URL, f"{app}/header?h=X-Test")
+            assert curl.perform_rb() == b"base"
+            curl.setopt(pycurl.HTTPHEADER, ["X-Test: request"])
+            assert curl.perform_rb() == b"request"
+        with pool.lease() as curl:
+            curl.setopt(pycurl.URL, f"{app}/header?h=X-Test")
+            assert curl.perform_rb() == b"base"
+    finally:
+        pool.close()
+
+
+def test_callbacks_dropped_on_release(app, pool):
+    body = []
+    with pool.lease() as curl:
+        curl.setopt(pycurl.URL, f"{app}/success")
+        curl.setopt(pycurl.WRITEFUNCTION, body.append)
+        curl.perform()
+    with pool.lease() as curl:
+        curl.setopt(pycurl.URL, f"{app}/success")
+        assert curl.perform_rb() == b"success"
+    assert body == [b"success"]
+
+
+def test_option_set(app):
+    options = pycurl.OptionSet({pycurl.URL: f"{app}/success"})
+    with pycurl.CurlPool(options) as pool:
+        with pool.lease() as curl:
+            assert curl.perform_rb() == b"success"
+
+
+def test_maxsize():
+    pool = pycurl.CurlPool(maxsize=1)
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert second.closed and not first.closed
+    assert pool.stats() == pycurl.CurlPoolStats(hits=0, misses=2, idle=1, leased=0, discarded=1)
+    pool.close()
+    assert first.closed
+
+
+def test_negative_maxsize():
+    with pytest.raises(ValueError):
+        pycurl.CurlPool(maxsize=-1)
+
+
+def test_release_foreign_handle(pool, curl):
+    with pytest.raises(ValueError):
+        pool.release(curl)
+
+
+def test_release_twice(pool):
+    curl = pool.acquire()
+    pool.release(curl)
+    with pytest.raises(ValueError):
+        pool.release(curl)
+
+
+def test_release_closed_handle(pool):
+    curl = pool.acquire()
+    curl.close()
+    pool.release(curl)
+    assert pool.stats().idle == 0
+    assert pool.stats().discarded == 1
+
+
+def test_close(pool):
+    curl = pool.acquire()
+    pool.close()
+    pool.close()
+    assert pool.closed
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(curl)
+    assert curl.closed
+
+
+def test_threads(app):
+    pool = pycurl.CurlPool({pycurl.URL: f"{app}/success"}, maxsize=4)
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(10):
+                with pool.lease() as curl:
+                    assert curl.perform_rb() == b"success"
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pool.close()
+    assert errors == []
+    stats = pool.stats()
+    assert stats.hits + stats.misses == 40
+    assert stats.leased == 0
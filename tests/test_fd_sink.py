@@ -0,0 +1,111 @@
+import os
+
+import pycurl
+import pytest
+
+
+def expected_bytes(size):
+    return (bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+def test_from_fd():
+    r, w = os.pipe()
+    try:
+        assert pycurl.FdSink(w).fileno() == w
+    finally:
+        os.close(r)
+        os.close(w)
+
+
+def test_from_file(tmp_path):
+    with open(tmp_path / "out", "wb") as f:
+        assert pycurl.FdSink(f).fileno() == f.fileno()
+
+
+@pytest.mark.parametrize("value", [-1, "1", object()])
+def test_invalid(value):
+    with pytest.raises((TypeError, ValueError)):
+        pycurl.FdSink(value)
+
+
+def test_writedata_file(curl, app, tmp_path):
+    size = 1000000
+    path = tmp_path / "out"
+    curl.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+    with open(path, "wb") as f:
+        curl.setopt(pycurl.WRITEDATA, pycurl.FdSink(f))
+        curl.perform()
+    assert path.read_bytes() == expected_bytes(size)
+
+
+def test_flushes_file_buffer(curl, app, tmp_path):
+    path = tmp_path / "out"
+    curl.setopt(pycurl.URL, f"{app}/success")
+    with open(path, "wb") as f:
+        f.write(b"prefix:")
+        curl.setopt(pycurl.WRITEDATA, pycurl.FdSink(f))
+        curl.perform()
+    assert path.read_bytes() == b"prefix:success"
+
+
+def test_writedata_int(curl, app, tmp_path):
+    path = tmp_path / "out"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    try:
+        curl.setopt(pycurl.URL, f"{app}/success")
+        curl.setopt(pycurl.WRITEDATA, fd)
+        curl.perform()
+    finally:
+        os.close(fd)
+    assert path.read_bytes() == b"success"
+
+
+def test_writeheader_int(curl, app, tmp_path):
+    path = tmp_path / "headers"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    try:
+        curl.setopt(pycurl.URL, f"{app}/success")
+        curl.setopt(pycurl.WRITEFUNCTION, lambda data: None)
+        curl.setopt(pycurl.WRITEHEADER, fd)
+        curl.perform()
+    finally:
+        os.close(fd)
+    headers = path.read_bytes()
+    assert headers.startswith(b"HTTP/1.")
+    assert headers.endswith(b"\r\n\r\n")
+
+
+@pytest.mark.parametrize("option", [pycurl.WRITEDATA, pycurl.WRITEHEADER])
+def test_negative_int_rejected(curl, option):
+    with pytest.raises(ValueError):
+        curl.setopt(option, -1)
+
+
+@pytest.mark.parametrize("option", [pycurl.WRITEDATA, pycurl.WRITEHEADER])
+@pytest.mark.parametrize("value", [True, False])
+def test_bool_rejected(curl, option, value):
+    with pytest.raises(TypeError):
+        curl.setopt(option, value)
+
+
+def test_write_error_aborts(curl, app):
+    r, w = os.pipe()
+    os.close(r)
+    try:
+        curl.setopt(pycurl.URL, f"{app}/success")
+        curl.setopt(pycurl.WRITEDATA, w)
+        with pytest.raises(pycurl.error) as exc_info:
+            curl.perform()
+        assert exc_info.value.args[0] == pycurl.E_WRITE_ERROR
+    finally:
+        os.close(w)
+
+
+def test_sink_keeps_file_alive(curl, app, tmp_path):
+    path = tmp_path / "out"
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEDATA, pycurl.FdSink(open(path, "wb")))
+    curl.perform()
+    curl.reset()
+    assert path.read_bytes() == b"success"
+
@@ -0,0 +1,122 @@
+import pycurl
+import pytest
+
+
+def parse(tmp_path, raw):
+    # Feed raw header text through a file:// transfer to exercise the parser.
+    path = tmp_path / "headers"
+    path.write_bytes(raw)
+    sink = pycurl.HeaderSink()
+    c = pycurl.Curl()
+    c.setopt(pycurl.URL, path.as_uri())
+    c.setopt(pycurl.WRITEDATA, sink)
+    c.perform()
+    c.close()
+    return sink
+
+
+def test_empty():
+    sink = pycurl.HeaderSink()
+    assert sink.responses() == []
+    assert sink.headers() == []
+    assert sink.status_line() is None
+    assert sink.get("Content-Type") is None
+    assert sink.get_all("Content-Type") == []
+
+
+def test_is_buffer_sink():
+    assert isinstance(pycurl.HeaderSink(), pycurl.BufferSink)
+
+
+def test_perform(curl, app):
+    sink = pycurl.HeaderSink()
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEFUNCTION, lambda data: None)
+    curl.setopt(pycurl.WRITEHEADER, sink)
+    curl.perform()
+    assert sink.status_line().startswith("HTTP/1.")
+    assert sink.status_line().endswith("200 OK")
+    assert sink.get("content-type") == "text/html; charset=utf-8"
+    assert sink.get("CONTENT-LENGTH") == "7"
+    assert ("Content-Length", "7") in sink.headers()
+    assert sink.getvalue().endswith(b"\r\n\r\n")
+
+
+def test_repeated_header(curl, app):
+    sink = pycurl.HeaderSink()
+    curl.setopt(pycurl.URL, f"{app}/repeated_header")
+    curl.setopt(pycurl.WRITEFUNCTION, lambda data: None)
+    curl.setopt(pycurl.WRITEHEADER, sink)
+    curl.perform()
+    assert sink.get("x-repeated") == "one"
+    assert sink.get_all("x-repeated") == ["one", "two"]
+
+
+def test_redirect(curl, app):
+    sink = pycurl.HeaderSink()
+    curl.setopt(pycurl.URL, f"{app}/redirect")
+    curl.setopt(pycurl.FOLLOWLOCATION, True)
+    curl.setopt(pycurl.WRITEFUNCTION, lambda data: None)
+    curl.setopt(pycurl.WRITEHEADER, sink)
+    curl.perform()
+    responses = sink.responses()
+    assert len(responses) == 2
+    assert responses[0][0].endswith("302 FOUND")
+    assert dict(responses[0][1])["Location"].endswith("/success")
+    assert sink.status_line().endswith("200 OK")
+    assert sink.get("Location") is None
+    assert sink.headers() == responses[1][1]
+
+
+def test_get_default():
+    assert pycurl.HeaderSink().get("missing", "fallback") == "fallback"
+
+
+def test_get_requires_str():
+    with pytest.raises(TypeError):
+        pycurl.HeaderSink().get(b"name")
+
+
+def test_parse_whitespace_and_folding(tmp_path):
+    sink = parse(tmp_path, (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Name:   padded value  \r\n"
+        b"Folded: first\r\n"
+        b"\t second\r\n"
+        b"Empty:\r\n"
+        b"\r\n"
+    ))
+    assert sink.headers() == [
+        ("Name", "padded value"),
+        ("Folded", "first second"),
+        ("Empty", ""),
+    ]
+
+
+def test_parse_bare_newlines_and_latin1(tmp_path):
+    sink = parse(tmp_path, b"HTTP/2 204\nX-Latin: caf\xe9\n\n")
+    assert sink.status_line() == "HTTP/2 204"
+    assert sink.headers() == [("X-Latin", "caf\xe9")]
+
+
+def test_parse_interim_response_and_trailers(tmp_path):
+    sink = parse(tmp_path, (
+        b"HTTP/1.1 100 Continue\r\n"
+        b"\r\n"
+        b"HTTP/1.1 200 OK\r\n"
+        b"Transfer-Encoding: chunked\r\n"
+        b"\r\n"
+        b"X-Trailer: done\r\n"
+    ))
+    assert sink.responses() == [
+        ("HTTP/1.1 100 Continue", []),
+        ("HTTP/1.1 200 OK", [
+            ("Transfer-Encoding", "chunked"),
+            ("X-Trailer", "done"),
+        ]),
+    ]
+
+
+def test_parse_without_status_line(tmp_path):
+    sink = parse(tmp_path, b"Content-Length: 3\r\nnot a header\r\n")
+    assert sink.responses() == [(None, [("Content-Length", "3")])]
@@ -0,0 +1,87 @@
+import pycurl
+import pytest
+
+
+def run(multi):
+    while True:
+        _, active = multi.perform()
+        if not active:
+            break
+        multi.select(0.1)
+
+
+@pytest.fixture
+def multi():
+    multi = pycurl.CurlMulti()
+    yield multi
+    multi.close()
+
+
+def test_pairs(app, multi):
+    ok = pycurl.Curl()
+    failed = pycurl.Curl()
+    try:
+        ok.setopt(pycurl.URL, f"{app}/success")
+        ok.setopt(pycurl.WRITEDATA, pycurl.BufferSink())
+        failed.setopt(pycurl.URL, "http://localhost:1/")
+        multi.add_handle(ok)
+        multi.add_handle(failed)
+        run(multi)
+        queued, done = multi.info_read_codes()
+        assert queued == 0
+        assert sorted(done, key=lambda pair: pair[1]) == [
+            (ok, pycurl.E_OK),
+            (failed, pycurl.E_COULDNT_CONNECT),
+        ]
+        assert "connect" in failed.errstr().lower()
+        assert multi.info_read_codes() == (0, [])
+        multi.remove_handle(ok)
+        multi.remove_handle(failed)
+    finally:
+        ok.close()
+        failed.close()
+
+
+def test_max_objects(multi):
+    handles = [pycurl.Curl() for _ in range(3)]
+    try:
+        for c in handles:
+            c.setopt(pycurl.URL, "http://localhost:1/")
+            multi.add_handle(c)
+        run(multi)
+        queued, done = multi.info_read_codes(2)
+        assert queued == 1 and len(done) == 2
+        queued, done = multi.info_read_codes()
+        assert queued == 0 and len(done) == 1
+        for c in handles:
+            multi.remove_handle(c)
+    finally:
+        for c in handles:
+            c.close()
+
+
+def test_stashed_by_iter_chunks(app, multi):
+    streamed = pycurl.Curl()
+    other = pycurl.Curl()
+    try:
+        streamed.setopt(pycurl.URL, f"{app}/chunks?num_chunks=3&delay=0.1")
+        other.setopt(pycurl.URL, "http://localhost:1/")
+        multi.add_handle(other)
+        list(multi.iter_chunks(streamed))
+        assert multi.info_read_codes() == (0, [(other, pycurl.E_COULDNT_CONNECT)])
+        multi.remove_handle(other)
+    finally:
+        streamed.close()
+        other.close()
+
+
+@pytest.mark.parametrize("max_objects", [0, -1])
+def test_invalid_max_objects(multi, max_objects):
+    with pytest.raises(pycurl.error):
+        multi.info_read_codes(max_objects)
+
+
+def test_closed(multi):
+    multi.close()
+    with pytest.raises(pycurl.error):
+        multi.info_read_codes()
@@ -0,0 +1,183 @@
+import time
+
+import pycurl
+import pytest
+
+
+def expected_bytes(size):
+    return (bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+def test_yields_body(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=5&delay=0.01")
+    chunks = list(curl.iter_chunks())
+    assert b"".join(chunks) == b"".join(f"chunk{i}\n".encode() for i in range(5))
+    assert all(chunks)
+    assert curl.getinfo(pycurl.RESPONSE_CODE) == 200
+
+
+def test_small_buffer_size(curl, app):
+    size = 1000000
+    curl.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+    chunks = list(curl.iter_chunks(buffer_size=4096))
+    assert b"".join(chunks) == expected_bytes(size)
+    assert len(chunks) > 1
+
+
+def test_slow_consumer_pauses_transfer(curl, app):
+    size = 10000000
+    curl.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+    curl.setopt(pycurl.NOPROGRESS, False)
+    progress = []
+    curl.setopt(pycurl.XFERINFOFUNCTION, lambda dltotal, dlnow, ultotal, ulnow: progress.append(dlnow))
+    it = curl.iter_chunks(buffer_size=4096)
+    received = len(next(it))
+    time.sleep(0.3)
+    received += len(next(it))
+    # the download did not run ahead of the consumer
+    assert max(progress) < size // 2
+    received += sum(len(chunk) for chunk in it)
+    assert received == size
+
+
+def test_headerfunction_still_called(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/success")
+    headers = []
+    curl.setopt(pycurl.HEADERFUNCTION, headers.append)
+    assert b"".join(curl.iter_chunks()) == b"success"
+    assert headers[0].startswith(b"HTTP/")
+
+
+def test_writefunction_restored(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/success")
+    body = []
+    curl.setopt(pycurl.WRITEFUNCTION, body.append)
+    assert b"".join(curl.iter_chunks()) == b"success"
+    assert body == []
+    curl.perform()
+    assert body == [b"success"]
+
+
+def test_writedata_sink_restored(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/success")
+    sink = pycurl.BufferSink()
+    curl.setopt(pycurl.WRITEDATA, sink)
+    assert b"".join(curl.iter_chunks()) == b"success"
+    assert sink.getvalue() == b""
+    curl.perform()
+    assert sink.getvalue() == b"success"
+
+
+def test_error_raised_after_data(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/bytes?size=100000")
+    curl.setopt(pycurl.MAXFILESIZE, 10)
+    it = curl.iter_chunks()
+    with pytest.raises(pycurl.error) as excinfo:
+        list(it)
+    assert excinfo.value.args[0] == pycurl.E_FILESIZE_EXCEEDED
+    with pytest.raises(StopIteration):
+        next(it)
+
+
+def test_connection_error(curl):
+    curl.setopt(pycurl.URL, "http://localhost:1/")
+    with pytest.raises(pycurl.error) as excinfo:
+        list(curl.iter_chunks())
+    assert excinfo.value.args[0] == pycurl.E_COULDNT_CONNECT
+
+
+def test_close_aborts_transfer(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/bytes?size=1000000")
+    it = curl.iter_chunks(buffer_size=1024)
+    assert next(it)
+    it.close()
+    it.close()
+    with pytest.raises(StopIteration):
+        next(it)
+    # the handle is usable again
+    assert curl.multi() is None
+    curl.setopt(pycurl.URL, f"{app}/success")
+    assert curl.perform_rb() == b"success"
+
+
+def test_abandoned_iterator(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/bytes?size=1000000")
+    it = curl.iter_chunks(buffer_size=1024)
+    next(it)
+    del it
+    assert curl.multi() is None
+    curl.setopt(pycurl.URL, f"{app}/success")
+    assert curl.perform_rb() == b"success"
+
+
+def test_reusable(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/success")
+    assert b"".join(curl.iter_chunks()) == b"success"
+    assert b"".join(curl.iter_chunks()) == b"success"
+
+
+@pytest.mark.parametrize("buffer_size", [0, -1])
+def test_invalid_buffer_size(curl, buffer_size):
+    with pytest.raises(ValueError):
+        curl.iter_chunks(buffer_size=buffer_size)
+
+
+def test_not_instantiable():
+    with pytest.raises(TypeError):
+        pycurl.ChunkIterator()
+
+
+def test_multi_other_transfers_reported(app):
+    multi = pycurl.CurlMulti()
+    streamed = pycurl.Curl()
+    other = pycurl.Curl()
+    try:
+        streamed.setopt(pycurl.URL, f"{app}/chunks?num_chunks=5&delay=0.05")
+        other.setopt(pycurl.URL, f"{app}/success")
+        other.setopt(pycurl.WRITEDATA, pycurl.BufferSink())
+        multi.add_handle(other)
+        body = b"".join(multi.iter_chunks(streamed))
+        assert body == b"".join(f"chunk{i}\n".encode() for i in range(5))
+        assert streamed.multi() is None
+        num_q, ok_list, err_list = multi.info_read()
+        assert (num_q, ok_list, err_list) == (0, [other], [])
+        multi.remove_handle(other)
+    finally:
+        streamed.close()
+        other.close()
+        multi.close()
+
+
+def test_multi_stashed_results_respect_max(app):
+    multi = pycurl.CurlMulti()
+    streamed = pycurl.Curl()
+    others = [pycurl.Curl() for _ in range(3)]
+    try:
+        streamed.setopt(pycurl.URL, f"{app}/chunks?num_chunks=3&delay=0.1")
+        for c in others:
+            c.setopt(pycurl.URL, "http://localhost:1/")
+            multi.add_handle(c)
+        list(multi.iter_chunks(streamed))
+        num_q, ok_list, err_list = multi.info_read(2)
+        assert num_q == 1 and ok_list == [] and len(err_list) == 2
+        assert all(code == pycurl.E_COULDNT_CONNECT for _, code, _ in err_list)
+        num_q, ok_list, err_list = multi.info_read()
+        assert num_q == 0 and len(err_list) == 1
+        for c in others:
+            multi.remove_handle(c)
+    finally:
+        streamed.close()
+        for c in others:
+            c.close()
+        multi.close()
+
+
+def test_curl_on_multi_rejected(curl, app):
+    multi = pycurl.CurlMulti()
+    multi.add_handle(curl)
+    try:
+        with pytest.raises(pycurl.error):
+            curl.iter_chunks()
+    finally:
+        multi.remove_handle(curl)
+        multi.close()
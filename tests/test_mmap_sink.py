@@ -0,0 +1,135 @@
+import os
+import sys
+
+import pycurl
+import pytest
+
+
+def expected_bytes(size):
+    return (bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+def is_mapped(path):
+    with open("/proc/self/maps") as f:
+        return any(line.rstrip("\n").endswith(str(path)) for line in f)
+
+
+def test_from_file(tmp_path):
+    with open(tmp_path / "out", "w+b") as f:
+        assert pycurl.MmapSink(f).fileno() == f.fileno()
+
+
+@pytest.mark.parametrize("value", [-1, "1", object()])
+def test_invalid(value):
+    with pytest.raises((TypeError, ValueError)):
+        pycurl.MmapSink(value)
+
+
+@pytest.mark.parametrize("mode", ["w+b", "wb"])
+def test_writedata_file(curl, app, tmp_path, mode):
+    size = 1000000
+    path = tmp_path / "out"
+    curl.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+    with open(path, mode) as f:
+        curl.setopt(pycurl.WRITEDATA, pycurl.MmapSink(f))
+        curl.perform()
+        assert os.lseek(f.fileno(), 0, os.SEEK_CUR) == size
+    assert path.read_bytes() == expected_bytes(size)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs /proc/self/maps")
+def test_known_length_is_mapped(curl, app, tmp_path):
+    path = tmp_path / "out"
+    seen = []
+
+    def progress(dltotal, dlnow, ultotal, ulnow):
+        if dlnow:
+            seen.append(is_mapped(path))
+
+    curl.setopt(pycurl.URL, f"{app}/bytes?size=1000000")
+    curl.setopt(pycurl.NOPROGRESS, False)
+    curl.setopt(pycurl.XFERINFOFUNCTION, progress)
+    with open(path, "w+b") as f:
+        curl.setopt(pycurl.WRITEDATA, pycurl.MmapSink(f))
+        curl.perform()
+    assert seen and all(seen)
+    assert not is_mapped(path)
+    assert path.read_bytes() == expected_bytes(1000000)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs /proc/self/maps")
+def test_unknown_length_is_written(curl, app, tmp_path):
+    path = tmp_path / "out"
+    seen = []
+
+    def progress(dltotal, dlnow, ultotal, ulnow):
+        if dlnow:
+            seen.append(is_mapped(path))
+
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=3&delay=0.01")
+    curl.setopt(pycurl.NOPROGRESS, False)
+    curl.setopt(pycurl.XFERINFOFUNCTION, progress)
+    with open(path, "w+b") as f:
+        curl.setopt(pycurl.WRITEDATA, pycurl.MmapSink(f))
+        curl.perform()
+    assert seen and not any(seen)
+    assert path.read_bytes() == b"chunk0\nchunk1\nchunk2\n"
+
+
+def test_appends_at_file_offset(curl, app, tmp_path):
+    path = tmp_path / "out"
+    curl.setopt(pycurl.URL, f"{app}/bytes?size=10000")
+    with open(path, "w+b") as f:
+        f.write(b"prefix:")
+        sink = pycurl.MmapSink(f)
+        curl.setopt(pycurl.WRITEDATA, sink)
+        curl.perform()
+        curl.perform()
+    assert path.read_bytes() == b"prefix:" + expected_bytes(10000) * 2
+
+
+def test_aborted_transfer_is_truncated(curl, app, tmp_path):
+    size = 10000000
+    path = tmp_path / "out"
+
+    def progress(dltotal, dlnow, ultotal, ulnow):
+        return 1 if dlnow else 0
+
+    curl.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+    curl.setopt(pycurl.NOPROGRESS, False)
+    curl.setopt(pycurl.XFERINFOFUNCTION, progress)
+    with open(path, "w+b") as f:
+        curl.setopt(pycurl.WRITEDATA, pycurl.MmapSink(f))
+        with pytest.raises(pycurl.error):
+            curl.perform()
+    data = path.read_bytes()
+    assert 0 < len(data) < size
+    assert data == expected_bytes(len(data))
+
+
+def test_multi(curl, app, tmp_path):
+    size = 100000
+    path = tmp_path / "out"
+    curl.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+    multi = pycurl.CurlMulti()
+    with open(path, "w+b") as f:
+        curl.setopt(pycurl.WRITEDATA, pycurl.MmapSink(f))
+        multi.add_handle(curl)
+        while True:
+            _, active = multi.perform()
+            if not active:
+                break
+            multi.select(0.1)
+        _, ok_list, err_list = multi.info_read()
+        multi.remove_handle(curl)
+        assert os.lseek(f.fileno(), 0, os.SEEK_CUR) == size
+    multi.close()
+    assert ok_list == [curl]
+    assert err_list == []
+    assert path.read_bytes() == expected_bytes(size)
+
+
+def test_writeheader_rejected(curl, tmp_path):
+    with open(tmp_path / "out", "w+b") as f:
+        with pytest.raises(TypeError):
+            curl.setopt(pycurl.WRITEHEADER, pycurl.MmapSink(f))
@@ -0,0 +1,150 @@
+import socket
+import threading
+import time
+
+import pycurl
+import pytest
+
+from . import util
+
+
+@pytest.fixture
+def multi():
+    multi = pycurl.CurlMulti()
+    yield multi
+    multi.close()
+
+
+@util.min_libcurl(7, 66, 0)
+def test_poll_drives_transfer(app, multi, curl):
+    curl.setopt(pycurl.URL, f"{app}/success")
+    sink = pycurl.BufferSink()
+    curl.setopt(pycurl.WRITEDATA, sink)
+    multi.add_handle(curl)
+    _, num_handles = multi.perform()
+    while num_handles:
+        numfds, ready = multi.poll(1.0)
+        assert ready == []
+        _, num_handles = multi.perform()
+    multi.remove_handle(curl)
+    assert sink.getvalue() == b"success"
+
+
+@util.min_libcurl(7, 66, 0)
+def test_poll_timeout(multi):
+    start = time.monotonic()
+    assert multi.poll(0.1) == (0, [])
+    assert time.monotonic() - start >= 0.09
+
+
+@util.min_libcurl(7, 66, 0)
+def test_poll_extra_fds(multi):
+    a, b = socket.socketpair()
+    try:
+        assert multi.poll(0, [a]) == (0, [])
+        b.send(b"x")
+        numfds, ready = multi.poll(1.0, extra_fds=[a.fileno(), (b, pycurl.WAIT_POLLOUT)])
+        assert numfds == 2
+        assert sorted(ready) == sorted([
+            (a.fileno(), pycurl.WAIT_POLLIN),
+            (b.fileno(), pycurl.WAIT_POLLOUT),
+        ])
+    finally:
+        a.close()
+        b.close()
+
+
+@util.min_libcurl(7, 66, 0)
+def test_poll_many_fds(multi):
+    resource = pytest.importorskip("resource")
+    if resource.getrlimit(resource.RLIMIT_NOFILE)[0] < 1500:
+        pytest.skip("needs more file descriptors")
+    # descriptors above FD_SETSIZE cannot be waited on with select()
+    pairs = [socket.socketpair() for _ in range(600)]
+    try:
+        pairs[-1][1].send(b"x")
+        numfds, ready = multi.poll(1.0, [a for a, _ in pairs])
+        assert numfds == 1
+        assert ready == [(pairs[-1][0].fileno(), pycurl.WAIT_POLLIN)]
+    finally:
+        for a, b in pairs:
+            a.close()
+            b.close()
+
+
+@pytest.mark.parametrize("timeout, extra_fds, exc", [
+    (-1, None, OverflowError),
+    (1e10, None, OverflowError),
+    (0, 1, TypeError),
+    (0, ["x"], TypeError),
+    (0, [-1], ValueError),
+    (0, [(0,)], TypeError),
+])
+@util.min_libcurl(7, 66, 0)
+def test_poll_invalid(multi, timeout, extra_fds, exc):
+    with pytest.raises(exc):
+        multi.poll(timeout, extra_fds)
+
+
+@util.min_libcurl(7, 66, 0)
+def test_poll_closed(multi):
+    multi.close()
+    with pytest.raises(pycurl.error):
+        multi.poll(0)
+
+
+@util.min_libcurl(7, 68, 0)
+def test_wakeup_from_other_thread(multi):
+    timer = threading.Timer(0.1, multi.wakeup)
+    start = time.monotonic()
+    timer.start()
+    try:
+        multi.poll(10.0)
+    finally:
+        timer.join()
+    assert time.monotonic() - start < 5
+
+
+@util.min_libcurl(7, 68, 0)
+def test_wakeup_before_poll(multi):
+    multi.wakeup()
+    start = time.monotonic()
+    multi.poll(10.0)
+    assert time.monotonic() - start < 5
+
+
+@util.min_libcurl(7, 68, 0)
+def test_wakeup_injects_transfer(app, multi):
+    pending = []
+    done = []
+    curl = pycurl.Curl()
+    curl.setopt(pycurl.URL, f"{app}/success")
+    curl.setopt(pycurl.WRITEDATA, pycurl.BufferSink())
+
+    def producer():
+        pending.append(curl)
+        multi.wakeup()
+
+    timer = threading.Timer(0.1, producer)
+    timer.start()
+    try:
+        deadline = time.monotonic() + 10
+        while not done and time.monotonic() < deadline:
+            multi.poll(10.0)
+            while pending:
+                multi.add_handle(pending.pop())
+            multi.perform()
+            _, finished = multi.info_read_codes()
+            done.extend(finished)
+        assert done == [(curl, pycurl.E_OK)]
+        multi.remove_handle(curl)
+    finally:
+        timer.join()
+        curl.close()
+
+
+@util.min_libcurl(7, 68, 0)
+def test_wakeup_closed(multi):
+    multi.close()
+    with pytest.raises(pycurl.error):
+        multi.wakeup()
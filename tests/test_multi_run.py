@@ -0,0 +1,249 @@
+import sys
+import threading
+import time
+
+import pycurl
+import pytest
+
+
+@pytest.fixture
+def multi():
+    multi = pycurl.CurlMulti()
+    yield multi
+    multi.close()
+
+
+def make_handles(urls):
+    handles = []
+    for url in urls:
+        c = pycurl.Curl()
+        c.setopt(pycurl.URL, url)
+        c.setopt(pycurl.WRITEDATA, pycurl.BufferSink())
+        handles.append(c)
+    return handles
+
+
+def test_run_to_completion(app, multi):
+    handles = make_handles([f"{app}/success"] * 3 + ["http://localhost:1/"])
+    try:
+        for c in handles:
+            multi.add_handle(c)
+        assert multi.run() == 0
+        queued, done = multi.info_read_codes()
+        assert queued == 0
+        assert sorted(code for _, code in done) == [0, 0, 0, pycurl.E_COULDNT_CONNECT]
+        for c in handles[:3]:
+            assert c.getinfo(pycurl.RESPONSE_CODE) == 200
+        for c in handles:
+            multi.remove_handle(c)
+    finally:
+        for c in handles:
+            c.close()
+
+
+def test_on_done(app, multi):
+    handles = make_handles([f"{app}/success", f"{app}/short_wait", "http://localhost:1/"])
+    batches = []
+
+    def on_done(done):
+        batches.append(done)
+        for c, _ in done:
+            multi.remove_handle(c)
+
+    try:
+        for c in handles:
+            multi.add_handle(c)
+        assert multi.run(on_done=on_done) == 0
+        assert all(batches)
+        done = [pair for batch in batches for pair in batch]
+        assert sorted(done, key=lambda pair: handles.index(pair[0])) == [
+            (handles[0], pycurl.E_OK),
+            (handles[1], pycurl.E_OK),
+            (handles[2], pycurl.E_COULDNT_CONNECT),
+        ]
+        assert multi.info_read_codes() == (0, [])
+    finally:
+        for c in handles:
+            c.close()
+
+
+def test_on_done_adds_handles(app, multi):
+    handles = make_handles([f"{app}/success"] * 3)
+    pending = list(handles[1:])
+    finished = []
+
+    def on_done(done):
+        for c, code in done:
+            assert code == pycurl.E_OK
+            multi.remove_handle(c)
+            finished.append(c)
+            if pending:
+                multi.add_handle(pending.pop())
+
+    try:
+        multi.add_handle(handles[0])
+        assert multi.run(on_done=on_done) == 0
+        assert len(finished) == 3
+    finally:
+        for c in handles:
+            c.close()
+
+
+def test_on_done_exception(app, multi):
+    handles = make_handles([f"{app}/success"])
+
+    def on_done(done):
+        raise ValueError("stop")
+
+    try:
+        multi.add_handle(handles[0])
+        with pytest.raises(ValueError):
+            multi.run(on_done=on_done)
+        multi.remove_handle(handles[0])
+    finally:
+        handles[0].close()
+
+
+def test_timeout(app, multi):
+    handles = make_handles([f"{app}/long_pause"])
+    try:
+        multi.add_handle(handles[0])
+        start = time.monotonic()
+        assert multi.run(timeout=0.2) == 1
+        assert time.monotonic() - start < 2
+        multi.remove_handle(handles[0])
+    finally:
+        handles[0].close()
+
+
+def test_empty(multi):
+    assert multi.run() == 0
+    assert multi.run(timeout=0) == 0
+
+
+def test_releases_gil(app, multi):
+    handles = make_handles([f"{app}/short_wait?delay=0.5"])
+    ticks = []
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            ticks.append(None)
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=spin)
+    try:
+        multi.add_handle(handles[0])
+        thread.start()
+        multi.run()
+        stop.set()
+        thread.join()
+        assert len(ticks) > 5
+        multi.remove_handle(handles[0])
+    finally:
+        stop.set()
+        handles[0].close()
+
+
+@pytest.mark.parametrize("kwargs, exc", [
+    ({"timeout": -1}, ValueError),
+    ({"timeout": float("nan")}, ValueError),
+    ({"timeout": "1"}, TypeError),
+    ({"on_done": 1}, TypeError),
+])
+def test_invalid_arguments(multi, kwargs, exc):
+    with pytest.raises(exc):
+        multi.run(**kwargs)
+
+
+def test_closed(multi):
+    multi.close()
+    with pytest.raises(pycurl.error):
+        multi.run()
+
+
+only_epoll = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="epoll is Linux only")
+
+
+@only_epoll
+def test_epoll(app, multi):
+    handles = make_handles([f"{app}/success"] * 20 + ["http://localhost:1/"])
+    done = []
+
+    def on_done(batch):
+        for c, code in batch:
+            multi.remove_handle(c)
+            done.append((c, code))
+
+    try:
+        for c in handles:
+            multi.add_handle(c)
+        assert multi.run(on_done=on_done, epoll=True) == 0
+        assert sorted(done, key=lambda pair: handles.index(pair[0])) == (
+            [(c, pycurl.E_OK) for c in handles[:-1]] + [(handles[-1], pycurl.E_COULDNT_CONNECT)]
+        )
+        for c in handles[:-1]:
+            assert c.getinfo(pycurl.RESPONSE_CODE) == 200
+    finally:
+        for c in handles:
+            c.close()
+
+
+@only_epoll
+def test_epoll_on_done_adds_handles(app, multi):
+    handles = make_handles([f"{app}/success"] * 3)
+    pending = list(handles[1:])
+    finished = []
+
+    def on_done(done):
+        for c, code in done:
+            assert code == pycurl.E_OK
+            multi.remove_handle(c)
+            finished.append(c)
+            if pending:
+                multi.add_handle(pending.pop())
+
+    try:
+        multi.add_handle(handles[0])
+        assert multi.run(on_done=on_done, epoll=True) == 0
+        assert len(finished) == 3
+    finally:
+        for c in handles:
+            c.close()
+
+
+@only_epoll
+def test_epoll_timeout_and_resume(app, multi):
+    handles = make_handles([f"{app}/short_wait?delay=0.5"])
+    try:
+        multi.add_handle(handles[0])
+        assert multi.run(timeout=0.1, epoll=True) == 1
+        # the driver stays attached, and perform() works alongside it
+        assert multi.run() == 0
+        assert multi.info_read_codes() == (0, [(handles[0], pycurl.E_OK)])
+        multi.remove_handle(handles[0])
+    finally:
+        handles[0].close()
+
+
+@only_epoll
+def test_epoll_owns_socket_callbacks(multi):
+    multi.run(epoll=True)
+    for option in (pycurl.M_SOCKETFUNCTION, pycurl.M_TIMERFUNCTION):
+        with pytest.raises(pycurl.error):
+            multi.setopt(option, lambda *args: None)
+        with pytest.raises(pycurl.error):
+            multi.setopt(option, None)
+
+
+@only_epoll
+def test_epoll_rejects_python_callbacks(multi):
+    multi.setopt(pycurl.M_TIMERFUNCTION, lambda timeout_ms: None)
+    with pytest.raises(pycurl.error):
+        multi.run(epoll=True)
+
+
+@pytest.mark.skipif(sys.platform.startswith("linux"), reason="epoll is available")
+def test_epoll_unavailable(multi):
+    with pytest.raises(pycurl.error):
+        multi.run(epoll=True)
@@ -0,0 +1,129 @@
+import select
+import sys
+import time
+
+import pycurl
+import pytest
+
+from .multi_driver import install_timer_tracker
+
+
+@pytest.fixture
+def multi():
+    multi = pycurl.CurlMulti()
+    yield multi
+    multi.close()
+
+
+def drive(multi, timer_state, timeout=10):
+    """Run the transfers of `multi`, keeping watchers from socket_events()."""
+    watched = {}
+    history = []
+    running = 1
+    deadline = time.monotonic() + timeout
+    _, running = multi.socket_action(pycurl.SOCKET_TIMEOUT, 0)
+    while running:
+        assert time.monotonic() < deadline
+        for fd, what in multi.socket_events():
+            history.append((fd, what))
+            if what == pycurl.POLL_REMOVE:
+                watched.pop(fd, None)
+            else:
+                watched[fd] = what
+        if timer_state.pending:
+            timer_state.pending = False
+            _, running = multi.socket_action(pycurl.SOCKET_TIMEOUT, 0)
+            continue
+        rlist = [fd for fd, what in watched.items() if what & pycurl.POLL_IN]
+        wlist = [fd for fd, what in watched.items() if what & pycurl.POLL_OUT]
+        timeout_ms = multi.timeout()
+        wait = 0.1 if timeout_ms < 0 else min(timeout_ms / 1000, 0.1)
+        r, w, _ = select.select(rlist, wlist, [], wait)
+        if not r and not w:
+            _, running = multi.socket_action(pycurl.SOCKET_TIMEOUT, 0)
+        for fd in set(r) | set(w):
+            mask = (pycurl.CSELECT_IN if fd in r else 0) | (pycurl.CSELECT_OUT if fd in w else 0)
+            _, running = multi.socket_action(fd, mask)
+    history.extend(multi.socket_events())
+    return history
+
+
+def test_drive_transfers(app, multi):
+    multi.collect_socket_events()
+    timer_state = install_timer_tracker(multi)
+    handles = []
+    try:
+        for _ in range(3):
+            c = pycurl.Curl()
+            c.setopt(pycurl.URL, f"{app}/success")
+            c.setopt(pycurl.WRITEDATA, pycurl.BufferSink())
+            multi.add_handle(c)
+            handles.append(c)
+        history = drive(multi, timer_state)
+        _, done = multi.info_read_codes()
+        assert sorted(code for _, code in done) == [pycurl.E_OK] * 3
+        assert history
+        assert {what for _, what in history} <= {
+            pycurl.POLL_IN, pycurl.POLL_OUT, pycurl.POLL_INOUT, pycurl.POLL_REMOVE,
+        }
+        for c in handles:
+            multi.remove_handle(c)
+    finally:
+        for c in handles:
+            c.close()
+
+
+def test_events_are_consumed(app, multi):
+    multi.collect_socket_events()
+    c = pycurl.Curl()
+    c.setopt(pycurl.URL, f"{app}/long_pause")
+    try:
+        multi.add_handle(c)
+        deadline = time.monotonic() + 5
+        events = []
+        while not events:
+            assert time.monotonic() < deadline
+            multi.socket_action(pycurl.SOCKET_TIMEOUT, 0)
+            events = multi.socket_events()
+        assert all(isinstance(fd, int) for fd, _ in events)
+        assert multi.socket_events() == []
+        multi.remove_handle(c)
+        assert [what for _, what in multi.socket_events()] == [pycurl.POLL_REMOVE] * len({fd for fd, _ in events})
+    finally:
+        c.close()
+
+
+def test_setopt_stops_collection(multi):
+    multi.collect_socket_events()
+    multi.setopt(pycurl.M_SOCKETFUNCTION, lambda *args: None)
+    with pytest.raises(pycurl.error):
+        multi.socket_events()
+    multi.collect_socket_events()
+    multi.setopt(pycurl.M_SOCKETFUNCTION, None)
+    with pytest.raises(pycurl.error):
+        multi.socket_events()
+
+
+def test_not_collecting(multi):
+    with pytest.raises(pycurl.error):
+        multi.socket_events()
+
+
+def test_closed(multi):
+    multi.collect_socket_events()
+    multi.close()
+    with pytest.raises(pycurl.error):
+        multi.socket_events()
+    with pytest.raises(pycurl.error):
+        multi.collect_socket_events()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="epoll is Linux only")
+def test_epoll_driver_conflict(multi):
+    multi.collect_socket_events()
+    with pytest.raises(pycurl.error):
+        multi.run(epoll=True)
+    multi.setopt(pycurl.M_SOCKETFUNCTION, None)
+    multi.run(epoll=True)
+    with pytest.raises(pycurl.error):
+        multi.collect_socket_events()
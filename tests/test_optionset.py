@@ -0,0 +1,193 @@
+import gc
+import io
+import warnings
+import weakref
+
+import pycurl
+import pytest
+
+
+def test_apply(app, curl):
+    options = pycurl.OptionSet({
+        pycurl.URL: f"{app}/header?h=X-Test",
+        pycurl.HTTPHEADER: ["X-Test: optionset"],
+        pycurl.TIMEOUT_MS: 5000,
+        pycurl.MAXFILESIZE_LARGE: 1 << 40,
+    })
+    assert len(options) == 4
+    options.apply(curl)
+    assert curl.perform_rb() == b"optionset"
+
+
+def test_apply_to_many_handles(app):
+    options = pycurl.OptionSet({
+        pycurl.URL: f"{app}/header?h=X-Test",
+        pycurl.HTTPHEADER: ("X-Test: shared",),
+    })
+    handles = [pycurl.Curl() for _ in range(3)]
+    try:
+        for c in handles:
+            options.apply(c)
+        # the set and the handles own the shared list independently
+        del options
+        gc.collect()
+        for c in handles:
+            assert c.perform_rb() == b"shared"
+    finally:
+        for c in handles:
+            c.close()
+
+
+def test_apply_keeps_other_options(app, curl):
+    curl.setopt(pycurl.URL, f"{app}/header?h=X-Test")
+    pycurl.OptionSet({pycurl.HTTPHEADER: ["X-Test: kept"]}).apply(curl)
+    assert curl.perform_rb() == b"kept"
+
+
+def test_apply_replaces_httpheader(app, curl):
+    curl.setopt(pycurl.HTTPHEADER, ["X-Test: old"])
+    pycurl.OptionSet({
+        pycurl.URL: f"{app}/header?h=X-Test",
+        pycurl.HTTPHEADER: ["X-Test: new"],
+    }).apply(curl)
+    assert curl.perform_rb() == b"new"
+    curl.setopt(pycurl.HTTPHEADER, ["X-Test: later"])
+    assert curl.perform_rb() == b"later"
+
+
+def test_duphandle(app):
+    options = pycurl.OptionSet({
+        pycurl.URL: f"{app}/header?h=X-Test",
+        pycurl.HTTPHEADER: ["X-Test: template"],
+    })
+    first = options.duphandle()
+    second = options.duphandle()
+    try:
+        assert isinstance(first, pycurl.Curl)
+        assert first is not second
+        second.setopt(pycurl.HTTPHEADER, ["X-Test: changed"])
+        assert first.perform_rb() == b"template"
+        assert second.perform_rb() == b"changed"
+    finally:
+        first.close()
+        second.close()
+
+
+def test_object_values(app, curl):
+    body = []
+    options = pycurl.OptionSet({
+        pycurl.URL: f"{app}/echo",
+        pycurl.POSTFIELDS: "posted",
+        pycurl.WRITEFUNCTION: body.append,
+    })
+    options.apply(curl)
+    curl.perform()
+    assert body == [b"posted"]
+
+
+def test_options_are_copied(app, curl):
+    headers = ["X-Test: original"]
+    mapping = {pycurl.URL: f"{app}/header?h=X-Test", pycurl.HTTPHEADER: headers}
+    options = pycurl.OptionSet(mapping)
+    headers[0] = "X-Test: mutated"
+    mapping[pycurl.URL] = "http://localhost:1/"
+    options.apply(curl)
+    assert curl.perform_rb() == b"original"
+
+
+def test_empty(curl):
+    options = pycurl.OptionSet({})
+    assert len(options) == 0
+    options.apply(curl)
+
+
+def test_empty_list_is_ignored(app, curl):
+    curl.setopt(pycurl.HTTPHEADER, ["X-Test: kept"])
+    pycurl.OptionSet({
+        pycurl.URL: f"{app}/header?h=X-Test",
+        pycurl.HTTPHEADER: [],
+    }).apply(curl)
+    assert curl.perform_rb() == b"kept"
+
+
+@pytest.mark.parametrize("options, exc", [
+    ({"url": "http://localhost/"}, TypeError),
+    ({-1: 1}, TypeError),
+    ({pycurl.VERBOSE: "yes"}, TypeError),
+    ({pycurl.URL: 1}, TypeError),
+    ({pycurl.URL: "a\0b"}, ValueError),
+    ({pycurl.TIMEOUT: 1 << 100}, OverflowError),
+    ({pycurl.HTTPHEADER: [1]}, TypeError),
+])
+def test_invalid_values_rejected_up_front(options, exc):
+    with pytest.raises(exc):
+        pycurl.OptionSet(options)
+
+
+@pytest.mark.parametrize("option", [pycurl.WRITEDATA, pycurl.WRITEHEADER, pycurl.READDATA])
+@pytest.mark.parametrize("value", [
+    pycurl.BufferSink, lambda: pycurl.FdSink(1), io.BytesIO, lambda: 1,
+])
+def test_shared_io_objects_rejected(option, value):
+    with pytest.raises(TypeError):
+        pycurl.OptionSet({option: value()})
+
+
+def test_readdata_buffer(app):
+    options = pycurl.OptionSet({
+        pycurl.URL: f"{app}/echo",
+        pycurl.UPLOAD: True,
+        pycurl.INFILESIZE_LARGE: 4,
+        pycurl.READDATA: b"data",
+    })
+    for _ in range(2):
+        curl = pycurl.Curl()
+        options.apply(curl)
+        assert curl.perform_rb() == b"data"
+        curl.close()
+
+
+@pytest.mark.parametrize("options", [[(pycurl.URL, "x")], 1, None])
+def test_requires_mapping(options):
+    with pytest.raises(TypeError):
+        pycurl.OptionSet(options)
+
+
+def test_apply_requires_curl():
+    options = pycurl.OptionSet({})
+    with pytest.raises(TypeError):
+        options.apply(pycurl.CurlMulti())
+
+
+def test_apply_closed(curl):
+    options = pycurl.OptionSet({pycurl.VERBOSE: 0})
+    curl.close()
+    with pytest.raises(pycurl.error):
+        options.apply(curl)
+
+
+def test_deprecated_option_warns_once():
+    if not hasattr(pycurl, "RANDOM_FILE"):
+        pytest.skip("RANDOM_FILE is not available")
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        options = pycurl.OptionSet({pycurl.RANDOM_FILE: "/dev/urandom"})
+        c = pycurl.Curl()
+        options.apply(c)
+        options.apply(c)
+        c.close()
+    assert [w.category for w in caught] == [DeprecationWarning]
+
+
+def test_cycle_collected():
+    class Callback:
+        def __call__(self, data):
+            pass
+
+    callback = Callback()
+    callback.options = pycurl.OptionSet({pycurl.WRITEFUNCTION: callback})
+    ref = weakref.ref(callback)
+    del callback
+    gc.collect()
+    assert ref() is None
+
@@ -0,0 +1,158 @@
+import mmap
+import os
+from io import BytesIO
+
+import pycurl
+import pytest
+
+DATA = bytes(range(256)) * 1000
+
+
+def upload(curl, url, source, size=len(DATA)):
+    body = BytesIO()
+    curl.setopt(pycurl.URL, url)
+    curl.setopt(pycurl.UPLOAD, 1)
+    curl.setopt(pycurl.INFILESIZE_LARGE, size)
+    curl.setopt(pycurl.READDATA, source)
+    curl.setopt(pycurl.WRITEDATA, body)
+    curl.perform()
+    return body.getvalue()
+
+
+@pytest.mark.parametrize(
+    "make_source",
+    [bytes, bytearray, memoryview],
+    ids=["bytes", "bytearray", "memoryview"],
+)
+def test_buffer(curl, app, make_source):
+    assert upload(curl, f"{app}/echo", make_source(DATA)) == DATA
+
+
+def test_mmap_read_from_position(curl, app, tmp_path):
+    path = tmp_path / "data"
+    path.write_bytes(b"skipped" + DATA)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        # an object with a read() method is read through it
+        m.seek(len(b"skipped"))
+        assert upload(curl, f"{app}/echo", m) == DATA
+        curl.setopt(pycurl.READDATA, None)
+
+
+def test_mmap_memoryview(curl, app, tmp_path):
+    path = tmp_path / "data"
+    path.write_bytes(DATA)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        with memoryview(m) as view:
+            assert upload(curl, f"{app}/echo", view) == DATA
+            # the mapping stays exported until READDATA is replaced
+            with pytest.raises(BufferError):
+                m.close()
+            curl.setopt(pycurl.READDATA, None)
+
+
+def test_fd(curl, app, tmp_path):
+    path = tmp_path / "data"
+    path.write_bytes(b"skipped" + DATA)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.lseek(fd, len(b"skipped"), os.SEEK_SET)
+        assert upload(curl, f"{app}/echo", fd) == DATA
+        # the next transfer starts from the same offset again
+        curl.setopt(pycurl.WRITEDATA, body := BytesIO())
+        curl.perform()
+        assert body.getvalue() == DATA
+    finally:
+        os.close(fd)
+
+
+def test_pipe(curl, app):
+    r, w = os.pipe()
+    try:
+        os.write(w, b"through a pipe")
+        os.close(w)
+        w = None
+        assert upload(curl, f"{app}/echo", r, 14) == b"through a pipe"
+    finally:
+        os.close(r)
+        if w is not None:
+            os.close(w)
+
+
+def test_repeated_perform_sends_whole_buffer(curl, app):
+    assert upload(curl, f"{app}/echo", DATA) == DATA
+    curl.setopt(pycurl.WRITEDATA, body := BytesIO())
+    curl.perform()
+    assert body.getvalue() == DATA
+
+
+@pytest.mark.parametrize("source", ["buffer", "fd"])
+def test_rewind_on_redirect(curl, app, tmp_path, source):
+    curl.setopt(pycurl.FOLLOWLOCATION, 1)
+    if source == "buffer":
+        value = DATA
+    else:
+        path = tmp_path / "data"
+        path.write_bytes(DATA)
+        value = fd = os.open(path, os.O_RDONLY)
+    try:
+        assert upload(curl, f"{app}/upload_redirect", value) == str(len(DATA)).encode()
+    finally:
+        if source == "fd":
+            os.close(fd)
+
+
+def test_python_seekfunction_takes_precedence(curl, app):
+    calls = []
+
+    def seek(offset, origin):
+        calls.append((offset, origin))
+        return pycurl.SEEKFUNC_CANTSEEK
+
+    curl.setopt(pycurl.FOLLOWLOCATION, 1)
+    curl.setopt(pycurl.SEEKFUNCTION, seek)
+    with pytest.raises(pycurl.error):
+        upload(curl, f"{app}/upload_redirect", DATA)
+    assert calls
+
+    # unsetting it brings native rewinds back
+    curl.setopt(pycurl.SEEKFUNCTION, None)
+    assert upload(curl, f"{app}/upload_redirect", DATA) == str(len(DATA)).encode()
+
+
+def test_bytearray_is_locked_while_set(curl):
+    data = bytearray(b"abc")
+    curl.setopt(pycurl.READDATA, data)
+    with pytest.raises(BufferError):
+        data.extend(b"def")
+    curl.setopt(pycurl.READDATA, None)
+    data.extend(b"def")
+
+
+def test_replaced_by_readfunction(curl, app):
+    data = bytearray(b"abc")
+    curl.setopt(pycurl.READDATA, data)
+    source = BytesIO(DATA)
+    curl.setopt(pycurl.READFUNCTION, source.read)
+    data.extend(b"def")
+    curl.setopt(pycurl.URL, f"{app}/echo")
+    curl.setopt(pycurl.UPLOAD, 1)
+    curl.setopt(pycurl.INFILESIZE_LARGE, len(DATA))
+    curl.setopt(pycurl.WRITEDATA, body := BytesIO())
+    curl.perform()
+    assert body.getvalue() == DATA
+
+
+def test_duphandle(curl, app):
+    upload(curl, f"{app}/echo", DATA)
+    dup = curl.duphandle()
+    try:
+        dup.setopt(pycurl.WRITEDATA, body := BytesIO())
+        dup.perform()
+    finally:
+        dup.close()
+    assert body.getvalue() == DATA
+
+
+def test_negative_fd_rejected(curl):
+    with pytest.raises(ValueError):
+        curl.setopt(pycurl.READDATA, -1)
@@ -0,0 +1,195 @@
+import queue
+import time
+
+import pycurl
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(pycurl.CurlMulti, "wakeup"), reason="requires libcurl 7.68.0 or later"
+)
+
+
+@pytest.fixture
+def multi():
+    multi = pycurl.ShardedMulti(4)
+    yield multi
+    multi.close()
+
+
+def _easy(url):
+    curl = pycurl.Curl()
+    curl.setopt(pycurl.URL, url)
+    sink = pycurl.BufferSink()
+    curl.setopt(pycurl.WRITEDATA, sink)
+    return curl, sink
+
+
+def test_completions(app, multi):
+    handles = {}
+    for _ in range(20):
+        curl, sink = _easy(f"{app}/success")
+        handles[curl] = sink
+        multi.add_handle(curl)
+    assert len(multi) == 20
+    for curl, code in multi.completed(20, timeout=10):
+        assert code == pycurl.E_OK
+        assert handles.pop(curl).getvalue() == b"success"
+        assert curl.getinfo(pycurl.RESPONSE_CODE) == 200
+    assert handles == {}
+    assert len(multi) == 0
+
+
+def test_failure_code(multi):
+    curl, _ = _easy("http://localhost:1/")
+    multi.add_handle(curl)
+    assert multi.get(timeout=10) == (curl, pycurl.E_COULDNT_CONNECT)
+
+
+def test_key_affinity(multi):
+    shards = []
+    for _ in range(5):
+        curl, _ = _easy("http://localhost:1/")
+        multi.add_handle(curl, key="localhost")
+        shards.append(multi._in_flight[curl][0])
+    assert len(set(shards)) == 1
+    for _ in multi.completed(5, timeout=10):
+        pass
+
+
+def test_round_robin(multi):
+    shards = []
+    for _ in range(4):
+        curl, _ = _easy("http://localhost:1/")
+        multi.add_handle(curl)
+        shards.append(multi._in_flight[curl][0])
+    assert len(set(shards)) == 4
+    for _ in multi.completed(4, timeout=10):
+        pass
+
+
+def test_default_share(multi):
+    assert isinstance(multi.share, pycurl.CurlShare)
+    assert multi.shards == 4
+
+
+def test_no_share():
+    with pycurl.ShardedMulti(1, share=False) as multi:
+        assert multi.share is None
+
+
+def test_reuse_handle(app, multi):
+    curl, sink = _easy(f"{app}/success")
+    multi.add_handle(curl)
+    assert multi.get(timeout=10) == (curl, pycurl.E_OK)
+    multi.add_handle(curl)
+    assert multi.get(timeout=10) == (curl, pycurl.E_OK)
+    assert sink.getvalue() == b"successsuccess"
+
+
+def test_add_twice(app, multi):
+    curl, _ = _easy(f"{app}/long_pause")
+    multi.add_handle(curl)
+    with pytest.raises(RuntimeError):
+        multi.add_handle(curl)
+
+
+def test_remove_handle(app, multi):
+    curl, _ = _easy(f"{app}/long_pause")
+    multi.add_handle(curl)
+    multi.remove_handle(curl)
+    assert len(multi) == 0
+    with pytest.raises(queue.Empty):
+        multi.get(timeout=0.2)
+    with pytest.raises(RuntimeError):
+        multi.remove_handle(curl)
+
+
+def test_remove_handle_waits(app, multi):
+    for _ in range(5):
+        curl, _ = _easy(f"{app}/long_pause")
+        multi.add_handle(curl)
+        multi.remove_handle(curl)
+        assert curl.multi() is None
+        curl.close()
+
+
+def test_readd_after_removed_completion(app, multi):
+    curl, _ = _easy("http://localhost:1/")
+    multi.add_handle(curl)
+    deadline = time.monotonic() + 10
+    while multi._done.empty():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    # the completion is queued but not collected by get()
+    multi.remove_handle(curl)
+    curl.setopt(pycurl.URL, f"{app}/long_pause")
+    multi.add_handle(curl)
+    # the result of the removed transfer is not reported for this one
+    with pytest.raises(queue.Empty):
+        multi.get(timeout=0.3)
+    multi.remove_handle(curl)
+
+
+def test_get_timeout(multi):
+    with pytest.raises(queue.Empty):
+        multi.get(timeout=0.1)
+
+
+def test_close_in_flight(app):
+    multi = pycurl.ShardedMulti(2)
+    curl, _ = _easy(f"{app}/long_pause")
+    multi.add_handle(curl)
+    multi.close()
+    multi.close()
+    assert multi.closed
+    assert not curl.closed
+    with pytest.raises(RuntimeError):
+        multi.add_handle(curl)
+    curl.setopt(pycurl.URL, f"{app}/success")
+    assert curl.perform_rb() == b"success"
+
+
+def test_invalid_shards():
+    with pytest.raises(ValueError):
+        pycurl.ShardedMulti(0)
+
+
+def _broken_multi(exc):
+    armed = False
+
+    class BrokenMulti(pycurl.CurlMulti):
+        """Raises *exc* from the first perform() after a handle is added."""
+
+        def add_handle(self, curl):
+            nonlocal armed
+            super().add_handle(curl)
+            armed = exc is not None
+
+        def perform(self):
+            nonlocal armed, exc
+            if armed:
+                armed = False
+                exc, raised = None, exc
+                raise raised
+            return super().perform()
+
+    return BrokenMulti
+
+
+@pytest.mark.parametrize(
+    "exc, code",
+    [
+        (pycurl.error(pycurl.E_MULTI_OUT_OF_MEMORY), pycurl.E_MULTI_OUT_OF_MEMORY),
+        (ValueError("boom"), pycurl.E_MULTI_INTERNAL_ERROR),
+    ],
+)
+def test_multi_failure_reported(app, monkeypatch, exc, code):
+    monkeypatch.setattr(pycurl.sharded, "CurlMulti", _broken_multi(exc))
+    with pycurl.ShardedMulti(1) as multi:
+        curl, _ = _easy(f"{app}/long_pause")
+        multi.add_handle(curl)
+        assert multi.get(timeout=10) == (curl, code)
+        # the shard keeps running
+        curl, _ = _easy(f"{app}/success")
+        multi.add_handle(curl)
+        assert multi.get(timeout=10) == (curl, pycurl.E_OK)
@@ -0,0 +1,82 @@
+import select
+import time
+
+import pycurl
+import pytest
+
+from .multi_driver import install_timer_tracker
+
+
+@pytest.fixture
+def multi():
+    multi = pycurl.CurlMulti()
+    yield multi
+    multi.close()
+
+
+def make_handle(url):
+    c = pycurl.Curl()
+    c.setopt(pycurl.URL, url)
+    c.setopt(pycurl.WRITEDATA, pycurl.BufferSink())
+    return c
+
+
+def drive(multi, timer_state, timeout=10):
+    """Run the transfers of `multi` and return the completions collected."""
+    watched = {}
+    completed = []
+    deadline = time.monotonic() + timeout
+    running, done = multi.socket_action(pycurl.SOCKET_TIMEOUT, 0, collect=True)
+    completed.extend(done)
+    while running:
+        assert time.monotonic() < deadline
+        for fd, what in multi.socket_events():
+            if what == pycurl.POLL_REMOVE:
+                watched.pop(fd, None)
+            else:
+                watched[fd] = what
+        rlist = [fd for fd, what in watched.items() if what & pycurl.POLL_IN]
+        wlist = [fd for fd, what in watched.items() if what & pycurl.POLL_OUT]
+        wait = 0 if timer_state.pending else 0.05
+        timer_state.pending = False
+        r, w, _ = select.select(rlist, wlist, [], wait)
+        actions = [(fd, (pycurl.CSELECT_IN if fd in r else 0) | (pycurl.CSELECT_OUT if fd in w else 0))
+                   for fd in set(r) | set(w)]
+        for fd, mask in actions or [(pycurl.SOCKET_TIMEOUT, 0)]:
+            running, done = multi.socket_action(fd, mask, collect=True)
+            completed.extend(done)
+    return completed
+
+
+def test_collect(app, multi):
+    multi.collect_socket_events()
+    timer_state = install_timer_tracker(multi)
+    handles = [make_handle(f"{app}/success"), make_handle("http://localhost:1/")]
+    try:
+        for c in handles:
+            multi.add_handle(c)
+        completed = drive(multi, timer_state)
+        assert sorted(completed, key=lambda pair: handles.index(pair[0])) == [
+            (handles[0], pycurl.E_OK),
+            (handles[1], pycurl.E_COULDNT_CONNECT),
+        ]
+        assert multi.info_read_codes() == (0, [])
+        for c in handles:
+            multi.remove_handle(c)
+    finally:
+        for c in handles:
+            c.close()
+
+
+def test_collect_empty(multi):
+    assert multi.socket_action(pycurl.SOCKET_TIMEOUT, 0, collect=True) == (0, [])
+
+
+def test_without_collect(multi):
+    assert multi.socket_action(pycurl.SOCKET_TIMEOUT, 0) == (pycurl.E_MULTI_OK, 0)
+    assert multi.socket_action(sock_fd=pycurl.SOCKET_TIMEOUT, ev_bitmask=0) == (pycurl.E_MULTI_OK, 0)
+
+
+def test_collect_is_keyword_only(multi):
+    with pytest.raises(TypeError):
+        multi.socket_action(pycurl.SOCKET_TIMEOUT, 0, True)
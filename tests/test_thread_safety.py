@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import os
+import sys
 import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
@@ -173,3 +176,77 @@ def test_share_with_many_curls_in_parallel(app):
     _run_workers(worker, n_workers)
 
     assert results == [b"success"] * (n_workers * iters_per_worker)
+
+
+@pytest.mark.skipif(
+    not hasattr(sys, "_is_gil_enabled") or sys._is_gil_enabled(),
+    reason="needs free-threaded Python with the GIL disabled",
+)
+@pytest.mark.skipif((os.cpu_count() or 1) < 4, reason="needs 4 CPUs")
+@pytest.mark.timeout(120)
+def test_callback_transfers_scale_with_threads(app):
+    # Each thread runs its own Curl whose write callback does CPU work in
+    # Python. Without a GIL the callbacks of different handles run in
+    # parallel, so N threads doing the same work each should take much less
+    # than N times as long as one thread.
+    n_workers = 4
+    iters_per_worker = 4
+    size = 1000000
+    expected = sum((bytes(range(256)) * (size // 256 + 1))[:size])
+
+    def run(n):
+        barrier = threading.Barrier(n)
+
+        def worker():
+            c = util.DefaultCurl()
+            total = 0
+
+            def write(chunk):
+                nonlocal total
+                for b in chunk:
+                    total += b
+
+            c.setopt(pycurl.URL, f"{app}/bytes?size={size}")
+            c.setopt(pycurl.WRITEFUNCTION, write)
+            barrier.wait()
+            for _ in range(iters_per_worker):
+                c.perform()
+            c.close()
+            return total
+
+        start = time.monotonic()
+        totals = _run_workers(worker, n)
+        elapsed = time.monotonic() - start
+        assert totals == [expected * iters_per_worker] * n
+        return elapsed
+
+    single = run(1)
+    parallel = run(n_workers)
+    assert parallel < single * n_workers / 2, (
+        f"1 thread took {single:.2f}s, {n_workers} threads took {parallel:.2f}s"
+    )
+
+
+@pytest.mark.skipif(not HAS_XFERINFOFUNCTION, reason="needs XFERINFOFUNCTION")
+@pytest.mark.timeout(120)
+def test_same_curl_from_another_thread_during_perform(app):
+    c = util.DefaultCurl()
+    started = threading.Event()
+
+    def progress(_dlt, _dln, _ult, _uln):
+        started.set()
+        return 0
+
+    c.setopt(pycurl.URL, app + "/short_wait?delay=0.5")
+    c.setopt(pycurl.WRITEFUNCTION, lambda _data: None)
+    c.setopt(pycurl.NOPROGRESS, False)
+    c.setopt(pycurl.XFERINFOFUNCTION, progress)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        future = ex.submit(c.perform)
+        assert started.wait(10)
+        with pytest.raises(pycurl.error, match="currently running"):
+            c.setopt(pycurl.URL, app + "/success")
+        with pytest.raises(pycurl.error, match="currently running"):
+            c.perform()
+        future.result()
+    assert c.getinfo(pycurl.RESPONSE_CODE) == 200
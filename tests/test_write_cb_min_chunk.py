@@ -0,0 +1,215 @@
+import pycurl
+import pytest
+
+
+def _expected(num_chunks):
+    return "".join(f"chunk{i}\n" for i in range(num_chunks)).encode()
+
+
+def _perform_multi(curl, on_idle=None):
+    multi = pycurl.CurlMulti()
+    multi.add_handle(curl)
+    try:
+        while True:
+            _, active = multi.perform()
+            if not active:
+                break
+            if on_idle is not None:
+                on_idle()
+            multi.select(0.1)
+        return multi.info_read()
+    finally:
+        multi.remove_handle(curl)
+        multi.close()
+
+
+def test_small_chunks_are_coalesced(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=10&delay=0.01")
+    chunks = []
+    curl.setopt(pycurl.WRITEFUNCTION, chunks.append, min_chunk=1 << 20)
+    curl.perform()
+    assert chunks == [_expected(10)]
+
+
+def test_chunks_reach_min_chunk_except_last(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=10&delay=0.01")
+    chunks = []
+    curl.setopt(pycurl.WRITEFUNCTION, chunks.append, min_chunk=20)
+    curl.perform()
+    assert b"".join(chunks) == _expected(10)
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 20 for chunk in chunks[:-1])
+
+
+def test_large_chunks_are_passed_through(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/bytes?size=100000")
+    sizes = []
+    curl.setopt(pycurl.WRITEFUNCTION, lambda chunk: sizes.append(len(chunk)), min_chunk=1)
+    curl.perform()
+    assert sum(sizes) == 100000
+
+
+def test_zero_disables_coalescing(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=5&delay=0.05")
+    chunks = []
+    curl.setopt(pycurl.WRITEFUNCTION, chunks.append, min_chunk=0)
+    curl.perform()
+    assert b"".join(chunks) == _expected(5)
+    assert len(chunks) > 1
+
+
+def test_memoryview(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=5&delay=0.01")
+    chunks = []
+
+    def cb(chunk):
+        assert type(chunk) is memoryview
+        chunks.append(bytes(chunk))
+
+    curl.setopt(pycurl.WRITEFUNCTION, cb, use_memoryview=True, min_chunk=1 << 20)
+    curl.perform()
+    assert chunks == [_expected(5)]
+
+
+def test_short_write_aborts(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=10&delay=0.01")
+    calls = []
+
+    def cb(chunk):
+        calls.append(chunk)
+        return 0
+
+    curl.setopt(pycurl.WRITEFUNCTION, cb, min_chunk=20)
+    with pytest.raises(pycurl.error) as excinfo:
+        curl.perform()
+    assert excinfo.value.args[0] == pycurl.E_WRITE_ERROR
+    assert len(calls) == 1
+
+
+def test_short_write_in_final_flush_fails(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=3&delay=0.01")
+    curl.setopt(pycurl.WRITEFUNCTION, lambda chunk: 0, min_chunk=1 << 20)
+    with pytest.raises(pycurl.error) as excinfo:
+        curl.perform()
+    assert excinfo.value.args[0] == pycurl.E_WRITE_ERROR
+
+
+def test_exception_in_final_flush(curl, app, capsys):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=3&delay=0.01")
+
+    def cb(chunk):
+        raise ValueError("boom")
+
+    curl.setopt(pycurl.WRITEFUNCTION, cb, min_chunk=1 << 20)
+    with pytest.raises(pycurl.error) as excinfo:
+        curl.perform()
+    assert excinfo.value.args[0] == pycurl.E_WRITE_ERROR
+    assert "boom" in capsys.readouterr().err
+
+
+def test_pause_redelivers_held_back_data(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=10&delay=0.01")
+    calls = []
+    state = {"paused": False}
+
+    def cb(chunk):
+        calls.append(chunk)
+        if len(calls) == 1:
+            state["paused"] = True
+            return pycurl.WRITEFUNC_PAUSE
+        return None
+
+    def on_idle():
+        if state["paused"]:
+            state["paused"] = False
+            curl.pause(pycurl.PAUSE_CONT)
+
+    curl.setopt(pycurl.WRITEFUNCTION, cb, min_chunk=20)
+    _, ok_list, err_list = _perform_multi(curl, on_idle)
+    assert ok_list == [curl]
+    assert err_list == []
+    assert calls[1].startswith(calls[0])
+    assert b"".join(calls[1:]) == _expected(10)
+
+
+def test_multi_final_flush(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=5&delay=0.01")
+    chunks = []
+    curl.setopt(pycurl.WRITEFUNCTION, chunks.append, min_chunk=1 << 20)
+    _, ok_list, err_list = _perform_multi(curl)
+    assert ok_list == [curl]
+    assert err_list == []
+    assert chunks == [_expected(5)]
+
+
+def test_multi_final_flush_failure_is_reported(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=5&delay=0.01")
+    curl.setopt(pycurl.WRITEFUNCTION, lambda chunk: 0, min_chunk=1 << 20)
+    _, ok_list, err_list = _perform_multi(curl)
+    assert ok_list == []
+    assert [(c, code) for c, code, _ in err_list] == [(curl, pycurl.E_WRITE_ERROR)]
+
+
+def test_multi_interrupted_final_flush_keeps_results(curl, app):
+    def interrupt(chunk):
+        raise KeyboardInterrupt
+
+    other = pycurl.Curl()
+    other.setopt(pycurl.URL, f"{app}/success")
+    other.setopt(pycurl.WRITEFUNCTION, lambda chunk: None)
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=5&delay=0.01")
+    curl.setopt(pycurl.WRITEFUNCTION, interrupt, min_chunk=1 << 20)
+    multi = pycurl.CurlMulti()
+    multi.add_handle(other)
+    multi.add_handle(curl)
+    try:
+        _, active = multi.perform()
+        while active:
+            multi.select(0.1)
+            _, active = multi.perform()
+        with pytest.raises(KeyboardInterrupt):
+            multi.info_read()
+        # the transfers read by the interrupted call are reported next time
+        _, ok_list, err_list = multi.info_read()
+        assert ok_list == [other]
+        assert [(c, code) for c, code, _ in err_list] == [(curl, pycurl.E_WRITE_ERROR)]
+    finally:
+        multi.remove_handle(other)
+        multi.remove_handle(curl)
+        multi.close()
+        other.close()
+
+
+def test_reused_handle_starts_empty(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=3&delay=0.01")
+    curl.setopt(pycurl.WRITEFUNCTION, lambda chunk: 0, min_chunk=1 << 20)
+    with pytest.raises(pycurl.error):
+        curl.perform()
+    chunks = []
+    curl.setopt(pycurl.WRITEFUNCTION, chunks.append, min_chunk=1 << 20)
+    curl.perform()
+    assert chunks == [_expected(3)]
+
+
+def test_duphandle_keeps_min_chunk(curl, app):
+    curl.setopt(pycurl.URL, f"{app}/chunks?num_chunks=5&delay=0.01")
+    chunks = []
+    curl.setopt(pycurl.WRITEFUNCTION, chunks.append, min_chunk=1 << 20)
+    dup = curl.duphandle()
+    try:
+        dup.perform()
+    finally:
+        dup.close()
+    assert chunks == [_expected(5)]
+
+
+def test_rejected_for_other_options(curl):
+    with pytest.raises(TypeError, match="min_chunk"):
+        curl.setopt(pycurl.HEADERFUNCTION, lambda chunk: None, min_chunk=10)
+    with pytest.raises(TypeError, match="min_chunk"):
+        curl.setopt(pycurl.URL, "http://localhost", min_chunk=10)
+
+
+def test_negative_rejected(curl):
+    with pytest.raises(ValueError):
+        curl.setopt(pycurl.WRITEFUNCTION, lambda chunk: None, min_chunk=-1)